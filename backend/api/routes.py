@@ -2,31 +2,156 @@ from flask import Blueprint, request, jsonify
 from chess_engine.board import ChessBoard
 from chess_engine.rules import ChessRules
 from chess_engine.ai_suggestion import AIChessSuggestionEngine
-from api.validators import validate_move_request
+from chess_engine.cache import PositionCache
+from chess_engine.loader import BackgroundLoader, FileWatcher
+from chess_engine.codec import FORMAT_STRING, FORMAT_FEN, FORMAT_PACKED, detect_format, decode_position, encode, fen_side
+from api.validators import validate_move_request, validate_legal_moves_request, validate_explorer_request, validate_ai_request
+from config import Config
 import os
 
-# 初始化AI引擎
-ai_suggestion_engine = None
+# 解析后局面的共享缓存（路由和AI引擎共用，缓存中的棋盘只读，走棋前需先 copy）
+position_cache = PositionCache(Config.POSITION_CACHE_SIZE)
 
-try:
-    # 查找频率模型数据文件
-    frequency_model_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), '..', 'data', 'move_frequency_analysis.json')
-    
-    if os.path.exists(frequency_model_path):
-        print(f"加载AI建议引擎: {frequency_model_path}")
-        ai_suggestion_engine = AIChessSuggestionEngine(frequency_model_path)
-        print("AI建议引擎加载成功")
-    else:
-        print(f"频率模型文件不存在: {frequency_model_path}")
-        
-except Exception as e:
-    print(f"AI引擎加载失败: {e}")
+# 频率模型数据文件
+frequency_model_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), '..', 'data', 'move_frequency_analysis.json')
+
+
+def _load_opening_book():
+    """打开开局库（mmap，几乎不耗时）；文件不存在或无效时返回 None"""
+    from chess_engine.opening_book import OpeningBook
+    if not os.path.exists(Config.OPENING_BOOK_PATH):
+        return None
+    try:
+        return OpeningBook(Config.OPENING_BOOK_PATH)
+    except (OSError, ValueError) as e:
+        print(f"加载开局库失败: {e}")
+        return None
+
+
+# 开局库（开局浏览接口和AI引擎共用），由 init_services() 打开
+opening_book = None
+
+
+def _load_ai_engine(progress):
+    from chess_engine.frequency_snapshot import snapshot_path_for
+    if not os.path.exists(frequency_model_path) and not os.path.exists(snapshot_path_for(frequency_model_path)):
+        raise FileNotFoundError(f"频率模型文件不存在: {frequency_model_path}")
+    print(f"加载AI建议引擎: {frequency_model_path}")
+    engine = AIChessSuggestionEngine(frequency_model_path, position_cache=position_cache, progress_callback=progress,
+                                     ann_threshold=Config.SIMILARITY_ANN_THRESHOLD,
+                                     ann_probe_radius=Config.SIMILARITY_PROBE_RADIUS,
+                                     result_cache_size=Config.AI_RESULT_CACHE_SIZE,
+                                     result_cache_ttl=Config.AI_RESULT_CACHE_TTL,
+                                     opening_book=opening_book,
+                                     search_depth=Config.SEARCH_MAX_DEPTH,
+                                     search_node_budget=Config.SEARCH_NODE_BUDGET,
+                                     tt_size_mb=Config.SEARCH_TT_MB,
+                                     search_workers=Config.SEARCH_WORKERS,
+                                     search_max_workers=Config.SEARCH_MAX_WORKERS)
+    print("AI建议引擎加载成功")
+    return engine
+
+
+# AI引擎在后台线程中加载，导入蓝图和 create_app() 不会被阻塞；
+# 关闭预加载时在第一次AI请求时才开始加载。加载完成前AI接口返回503，其余接口照常服务
+ai_engine_loader = BackgroundLoader(_load_ai_engine, name='AI建议引擎')
+
+# 频率数据文件更新后在后台重新加载，加载完成前继续使用旧引擎
+frequency_watcher = None
+
+
+def init_services():
+    """
+    打开开局库、开始后台加载AI引擎并启动频率数据监视（create_app() 调用，重复调用无副作用）
+    不放在模块导入时执行：搜索进程池用 spawn 启动，子进程会重新导入主模块
+    """
+    global opening_book, frequency_watcher
+    if opening_book is None:
+        opening_book = _load_opening_book()
+    if Config.AI_ENGINE_PRELOAD:
+        ai_engine_loader.start()
+    if Config.FREQUENCY_WATCH_INTERVAL > 0 and frequency_watcher is None:
+        from chess_engine.frequency_snapshot import snapshot_path_for
+        frequency_watcher = FileWatcher([frequency_model_path, snapshot_path_for(frequency_model_path)],
+                                        ai_engine_loader.reload, Config.FREQUENCY_WATCH_INTERVAL,
+                                        name='频率数据监视').start()
 
-# 设置chess_ai为ai_suggestion_engine以保持兼容性
-chess_ai = ai_suggestion_engine
 
 api_bp = Blueprint('api', __name__)
 
+
+def _engine_board_state(board_state):
+    """
+    局面对比按占位进行：FEN/紧凑格式先转换为180字符格式，其余原样返回
+    转换失败时抛出 ValueError
+    """
+    if not isinstance(board_state, str) or board_state.isdigit():
+        return board_state
+    return encode(decode_position(board_state))
+
+
+def _ai_board_state(board_state):
+    """
+    AI接口的局面原样交给引擎：FEN/紧凑格式保留棋子身份用于走棋和搜索，引擎只在查历史数据时按占位转换为180字符格式
+    FEN/紧凑格式无法解析时抛出 ValueError
+    """
+    if isinstance(board_state, str) and not board_state.isdigit():
+        decode_position(board_state)
+    return board_state
+
+
+def _ai_engine_unavailable(message):
+    """AI引擎不可用时的503响应：加载中时提示稍后重试"""
+    status = ai_engine_loader.status()
+    if not status['ready'] and status['state'] != 'failed':
+        message = 'AI引擎正在加载，请稍后重试'
+    return jsonify({
+        'status': 'error',
+        'message': message,
+        'engine_state': status['state']
+    }), 503
+
+
+def _invalid_board_response(e):
+    return jsonify({
+        'status': 'error',
+        'message': f'棋盘状态无效: {str(e)}'
+    }), 400
+
+def _move_history(data):
+    """请求中可选的走法序列 moves（格式无效时忽略，不影响基于局面的建议）"""
+    moves = data.get('moves')
+    if moves is None or not validate_explorer_request({'moves': moves})['valid']:
+        return None
+    return moves
+
+def _search_workers(data):
+    """请求中可选的搜索进程数 workers（不是正整数时忽略，使用引擎的默认值）"""
+    workers = data.get('workers')
+    if isinstance(workers, int) and not isinstance(workers, bool) and workers >= 1:
+        return workers
+    return None
+
+def _admin_forbidden():
+    """校验管理令牌，通过时返回 None"""
+    token = request.headers.get('X-Admin-Token', '')
+    if not Config.ADMIN_TOKEN or token != Config.ADMIN_TOKEN:
+        return jsonify({
+            'status': 'error',
+            'message': '无权访问管理接口'
+        }), 403
+    return None
+
+@api_bp.route('/health/ready', methods=['GET'])
+def health_ready():
+    """就绪检查：AI引擎加载完成时返回200，加载中或加载失败时返回503，并附带加载进度"""
+    status = ai_engine_loader.status()
+    return jsonify({
+        'status': 'ready' if status['ready'] else status['state'],
+        'ai_engine': status
+    }), 200 if status['ready'] else 503
+
+
 @api_bp.route('/move', methods=['POST'])
 def move_piece():
     try:
@@ -54,9 +179,9 @@ def move_piece():
         to_x = int(move_string[2])
         to_y = int(move_string[3])
         
-        # 创建棋盘对象
+        # 创建棋盘对象（从局面缓存取得，只读）
         try:
-            board = ChessBoard(board_string)
+            board = position_cache.board(board_string)
         except ValueError as e:
             return jsonify({
                 'status': 'error',
@@ -71,7 +196,9 @@ def move_piece():
                 'message': validation_result['reason']
             })
 
-        # 执行移动
+        # 执行移动（在副本上走棋，不修改缓存中的棋盘）
+        mover = board.get_piece_at(from_x, from_y).type
+        board = board.copy()
         move_result = board.move_piece(from_x, from_y, to_x, to_y)
         if not move_result['success']:
             return jsonify({
@@ -79,21 +206,32 @@ def move_piece():
                 'message': '移动失败：坐标超出范围或棋子不存在'
             })
 
-        # 返回新的棋盘状态
-        new_board_string = board.to_string()
+        # 返回新的棋盘状态（与请求使用相同的格式，FEN 附带下一步的走棋方）
+        position_format = detect_format(board_string)
+        next_side = 'black' if mover == 'red' else 'red'
+        new_board_string = board.to_position(position_format, next_side if position_format == FORMAT_FEN else None)
 
         response_data = {
             'status': 'success',
             'board': new_board_string,
             'message': '移动成功',
             'game_over': move_result['game_over'],
-            'winner': move_result['winner']
+            'winner': move_result['winner'],
+            'reason': move_result['reason'],
+            'in_check': move_result['in_check']
         }
 
         # 如果游戏结束，更新消息
         if move_result['game_over']:
             winner_name = '红方' if move_result['winner'] == 'red' else '黑方'
-            response_data['message'] = f'游戏结束！{winner_name}获胜！'
+            if move_result['reason'] == 'checkmate':
+                response_data['message'] = f'绝杀！{winner_name}获胜！'
+            elif move_result['reason'] == 'stalemate':
+                response_data['message'] = f'困毙！{winner_name}获胜！'
+            else:
+                response_data['message'] = f'游戏结束！{winner_name}获胜！'
+        elif move_result['in_check']:
+            response_data['message'] = '将军！'
 
         return jsonify(response_data)
         
@@ -106,9 +244,17 @@ def move_piece():
 @api_bp.route('/init', methods=['GET'])
 def init_board():
     try:
+        # 局面格式：180（默认）、fen 或 packed
+        position_format = request.args.get('format', FORMAT_STRING)
+        if position_format not in (FORMAT_STRING, FORMAT_FEN, FORMAT_PACKED):
+            return jsonify({
+                'status': 'error',
+                'message': '不支持的棋盘格式（可选 180、fen、packed）'
+            }), 400
+
         # 创建初始棋盘
         board = ChessBoard()
-        board_string = board.to_string()
+        board_string = board.to_position(position_format, 'red' if position_format == FORMAT_FEN else None)
         
         return jsonify({
             'status': 'success',
@@ -149,9 +295,9 @@ def validate_move():
         to_x = int(move_string[2])
         to_y = int(move_string[3])
         
-        # 创建棋盘对象
+        # 创建棋盘对象（从局面缓存取得，只读）
         try:
-            board = ChessBoard(board_string)
+            board = position_cache.board(board_string)
         except ValueError as e:
             return jsonify({
                 'status': 'error',
@@ -173,15 +319,84 @@ def validate_move():
             'message': f'服务器错误: {str(e)}'
         }), 500
 
+@api_bp.route('/legal_moves', methods=['POST'])
+def legal_moves():
+    """
+    一次返回某方（或某个起始格子上棋子）的全部合法走法
+    moves 为 "xyxy" 走法列表；mask 为全部目标格子的90位掩码（第 x*10+y 位），以16进制字符串返回
+    """
+    try:
+        # 验证请求数据
+        data = request.get_json()
+        validation_result = validate_legal_moves_request(data)
+        if not validation_result['valid']:
+            return jsonify({
+                'status': 'error',
+                'message': validation_result['message']
+            }), 400
+
+        # 创建棋盘对象（从局面缓存取得，只读）
+        try:
+            position = position_cache.get(data['board'])
+            board = position.board
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'message': f'棋盘状态无效: {str(e)}'
+            }), 400
+
+        side = data.get('side')
+        from_sq = None
+        if data.get('from') is not None:
+            from_x = int(data['from'][0])
+            from_y = int(data['from'][1])
+            from_sq = from_x * 10 + from_y
+            piece = board.get_piece_at(from_x, from_y)
+            if piece is None:
+                return jsonify({
+                    'status': 'success',
+                    'side': side,
+                    'moves': [],
+                    'mask': format(0, '023x'),
+                    'message': '起始位置没有棋子'
+                })
+            # 未指定 side 时按起始格子上棋子的所属方生成
+            if side is None:
+                side = piece.type
+        if side is None and detect_format(data['board']) == FORMAT_FEN:
+            side = fen_side(data['board'])
+        if side is None:
+            side = 'red'
+
+        # 整方的合法走法缓存在局面上，指定起始格子时从中筛选（保持生成顺序）
+        moves = position.legal_moves(side)
+        if from_sq is not None:
+            moves = [move for move in moves if move[0] == from_sq]
+        mask = 0
+        for _, to_sq in moves:
+            mask |= 1 << to_sq
+
+        return jsonify({
+            'status': 'success',
+            'side': side,
+            'moves': [f"{f // 10}{f % 10}{t // 10}{t % 10}" for f, t in moves],
+            'mask': format(mask, '023x'),
+            'message': '合法走法生成完成'
+        })
+
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'服务器错误: {str(e)}'
+        }), 500
+
 @api_bp.route('/ai/suggest', methods=['POST'])
 def suggest_move():
     """AI走法推荐接口"""
     try:
+        ai_suggestion_engine = ai_engine_loader.get()
         if ai_suggestion_engine is None:
-            return jsonify({
-                'status': 'error',
-                'message': 'AI模块未加载'
-            }), 503
+            return _ai_engine_unavailable('AI模块未加载')
         
         # 验证请求数据
         data = request.get_json()
@@ -191,20 +406,32 @@ def suggest_move():
                 'message': '缺少必要参数: board'
             }), 400
         
-        board_string = data['board']
+        validation_result = validate_ai_request(data, 'side')
+        if not validation_result['valid']:
+            return jsonify({
+                'status': 'error',
+                'message': validation_result['message']
+            }), 400
+
         side = data.get('side', 'red')  # 默认红方
+        try:
+            board_string = _ai_board_state(data['board'])
+        except ValueError as e:
+            return _invalid_board_response(e)
         
         # 验证棋盘状态
         try:
-            board = ChessBoard(board_string)
+            position_cache.get(board_string)
         except ValueError as e:
             return jsonify({
                 'status': 'error',
                 'message': f'棋盘状态无效: {str(e)}'
             }), 400
         
-        # 获取AI建议
-        suggestions_result = ai_suggestion_engine.get_ai_suggestions(board_string, side, top_k=3)
+        # 获取AI建议（带有从开局起的走法序列时优先查开局库）
+        suggestions_result = ai_suggestion_engine.get_ai_suggestions(board_string, side, top_k=3,
+                                                                     move_history=_move_history(data),
+                                                                     workers=_search_workers(data))
         
         if suggestions_result['status'] != 'success':
             return jsonify({
@@ -241,11 +468,9 @@ def suggest_move():
 def ai_info():
     """获取AI模型信息"""
     try:
+        ai_suggestion_engine = ai_engine_loader.get()
         if ai_suggestion_engine is None:
-            return jsonify({
-                'status': 'error',
-                'message': 'AI模块未加载'
-            }), 503
+            return _ai_engine_unavailable('AI模块未加载')
         
         model_info = ai_suggestion_engine.get_engine_info()
         
@@ -265,11 +490,9 @@ def ai_info():
 def frequency_recommend():
     """基于频率的走法推荐接口"""
     try:
+        ai_suggestion_engine = ai_engine_loader.get()
         if ai_suggestion_engine is None:
-            return jsonify({
-                'status': 'error',
-                'message': '频率推荐模型未加载'
-            }), 503
+            return _ai_engine_unavailable('频率推荐模型未加载')
         
         # 验证请求数据
         data = request.get_json()
@@ -279,18 +502,28 @@ def frequency_recommend():
                 'message': '缺少必要参数: board'
             }), 400
         
-        board_state = data['board']
+        validation_result = validate_ai_request(data, 'side')
+        if not validation_result['valid']:
+            return jsonify({
+                'status': 'error',
+                'message': validation_result['message']
+            }), 400
+
         side = data.get('side', 'red')  # 默认红方
+        try:
+            board_state = _ai_board_state(data['board'])
+        except ValueError as e:
+            return _invalid_board_response(e)
         
-        # 验证棋盘状态格式（支持64字符和180字符格式）
-        if len(board_state) not in [64, 180] or not board_state.isdigit():
+        # 验证棋盘状态格式（数字串支持64字符和180字符格式；FEN/紧凑格式已在上面解析过）
+        if board_state.isdigit() and len(board_state) not in [64, 180]:
             return jsonify({
                 'status': 'error',
                 'message': '棋盘状态格式错误（应为64或180字符的数字字符串）'
             }), 400
         
         # 获取AI建议
-        result = ai_suggestion_engine.get_ai_suggestions(board_state, side, top_k=3)
+        result = ai_suggestion_engine.get_ai_suggestions(board_state, side, top_k=3, workers=_search_workers(data))
         
         return jsonify(result)
         
@@ -304,11 +537,9 @@ def frequency_recommend():
 def analyze_position():
     """分析当前局面"""
     try:
+        ai_suggestion_engine = ai_engine_loader.get()
         if ai_suggestion_engine is None:
-            return jsonify({
-                'status': 'error',
-                'message': '频率推荐模型未加载'
-            }), 503
+            return _ai_engine_unavailable('频率推荐模型未加载')
         
         # 验证请求数据
         data = request.get_json()
@@ -318,10 +549,13 @@ def analyze_position():
                 'message': '缺少必要参数: board'
             }), 400
         
-        board_state = data['board']
+        try:
+            board_state = _ai_board_state(data['board'])
+        except ValueError as e:
+            return _invalid_board_response(e)
         
-        # 验证棋盘状态格式（支持64字符和180字符格式）
-        if len(board_state) not in [64, 180] or not board_state.isdigit():
+        # 验证棋盘状态格式（数字串支持64字符和180字符格式；FEN/紧凑格式已在上面解析过）
+        if board_state.isdigit() and len(board_state) not in [64, 180]:
             return jsonify({
                 'status': 'error',
                 'message': '棋盘状态格式错误（应为64或180字符的数字字符串）'
@@ -346,11 +580,9 @@ def analyze_position():
 def black_auto_move():
     """黑棋自动移动接口"""
     try:
+        ai_suggestion_engine = ai_engine_loader.get()
         if ai_suggestion_engine is None:
-            return jsonify({
-                'status': 'error',
-                'message': 'AI建议引擎未加载'
-            }), 503
+            return _ai_engine_unavailable('AI建议引擎未加载')
         
         # 验证请求数据
         data = request.get_json()
@@ -360,17 +592,20 @@ def black_auto_move():
                 'message': '缺少必要参数: board'
             }), 400
         
-        board_state = data['board']
+        try:
+            board_state = _ai_board_state(data['board'])
+        except ValueError as e:
+            return _invalid_board_response(e)
         
-        # 验证棋盘状态格式（支持64字符和180字符格式）
-        if len(board_state) not in [64, 180] or not board_state.isdigit():
+        # 验证棋盘状态格式（数字串支持64字符和180字符格式；FEN/紧凑格式已在上面解析过）
+        if board_state.isdigit() and len(board_state) not in [64, 180]:
             return jsonify({
                 'status': 'error',
                 'message': '棋盘状态格式错误（应为64或180字符的数字字符串）'
             }), 400
         
         # 执行AI移动
-        result = ai_suggestion_engine.execute_ai_move(board_state, 'black')
+        result = ai_suggestion_engine.execute_ai_move(board_state, 'black', workers=_search_workers(data))
         
         return jsonify(result)
         
@@ -384,11 +619,9 @@ def black_auto_move():
 def get_ai_suggestions():
     """获取AI移动建议接口"""
     try:
+        ai_suggestion_engine = ai_engine_loader.get()
         if ai_suggestion_engine is None:
-            return jsonify({
-                'status': 'error',
-                'message': 'AI建议引擎未加载'
-            }), 503
+            return _ai_engine_unavailable('AI建议引擎未加载')
         
         # 验证请求数据
         data = request.get_json()
@@ -398,12 +631,24 @@ def get_ai_suggestions():
                 'message': '缺少必要参数: board'
             }), 400
         
-        board_state = data['board']
+        validation_result = validate_ai_request(data, 'player')
+        if not validation_result['valid']:
+            return jsonify({
+                'status': 'error',
+                'message': validation_result['message']
+            }), 400
+
         player = data.get('player', 'red')  # 默认红方
+        try:
+            board_state = _ai_board_state(data['board'])
+        except ValueError as e:
+            return _invalid_board_response(e)
         top_k = data.get('top_k', 3)  # 默认返回3个建议
         
         # 获取AI建议
-        result = ai_suggestion_engine.get_ai_suggestions(board_state, player, top_k)
+        result = ai_suggestion_engine.get_ai_suggestions(board_state, player, top_k,
+                                                         move_history=_move_history(data),
+                                                         workers=_search_workers(data))
         
         return jsonify(result)
         
@@ -417,11 +662,9 @@ def get_ai_suggestions():
 def execute_ai_move():
     """执行AI移动并返回新棋盘状态"""
     try:
+        ai_suggestion_engine = ai_engine_loader.get()
         if ai_suggestion_engine is None:
-            return jsonify({
-                'status': 'error',
-                'message': 'AI建议引擎未加载'
-            }), 503
+            return _ai_engine_unavailable('AI建议引擎未加载')
         
         # 验证请求数据
         data = request.get_json()
@@ -431,11 +674,21 @@ def execute_ai_move():
                 'message': '缺少必要参数: board'
             }), 400
         
-        board_state = data['board']
+        validation_result = validate_ai_request(data, 'player')
+        if not validation_result['valid']:
+            return jsonify({
+                'status': 'error',
+                'message': validation_result['message']
+            }), 400
+
         player = data.get('player', 'black')  # 默认黑方自动移动
+        try:
+            board_state = _ai_board_state(data['board'])
+        except ValueError as e:
+            return _invalid_board_response(e)
         
         # 执行AI移动
-        result = ai_suggestion_engine.execute_ai_move(board_state, player)
+        result = ai_suggestion_engine.execute_ai_move(board_state, player, workers=_search_workers(data))
         
         return jsonify(result)
         
@@ -449,11 +702,9 @@ def execute_ai_move():
 def compare_board_states():
     """对比棋盘状态接口"""
     try:
+        ai_suggestion_engine = ai_engine_loader.get()
         if ai_suggestion_engine is None:
-            return jsonify({
-                'status': 'error',
-                'message': 'AI建议引擎未加载'
-            }), 503
+            return _ai_engine_unavailable('AI建议引擎未加载')
         
         # 验证请求数据
         data = request.get_json()
@@ -463,8 +714,11 @@ def compare_board_states():
                 'message': '缺少必要参数: frontend_board, target_board'
             }), 400
         
-        frontend_board = data['frontend_board']
-        target_board = data['target_board']
+        try:
+            frontend_board = _engine_board_state(data['frontend_board'])
+            target_board = _engine_board_state(data['target_board'])
+        except ValueError as e:
+            return _invalid_board_response(e)
         
         # 对比棋盘状态
         result = ai_suggestion_engine.compare_board_states(frontend_board, target_board)
@@ -481,11 +735,9 @@ def compare_board_states():
 def analyze_board():
     """分析棋盘状态接口"""
     try:
+        ai_suggestion_engine = ai_engine_loader.get()
         if ai_suggestion_engine is None:
-            return jsonify({
-                'status': 'error',
-                'message': 'AI建议引擎未加载'
-            }), 503
+            return _ai_engine_unavailable('AI建议引擎未加载')
         
         # 验证请求数据
         data = request.get_json()
@@ -495,7 +747,10 @@ def analyze_board():
                 'message': '缺少必要参数: board'
             }), 400
         
-        board_state = data['board']
+        try:
+            board_state = _ai_board_state(data['board'])
+        except ValueError as e:
+            return _invalid_board_response(e)
         
         # 分析棋盘状态
         result = ai_suggestion_engine.get_board_analysis(board_state)
@@ -512,11 +767,9 @@ def analyze_board():
 def get_engine_info():
     """获取AI引擎信息"""
     try:
+        ai_suggestion_engine = ai_engine_loader.get()
         if ai_suggestion_engine is None:
-            return jsonify({
-                'status': 'error',
-                'message': 'AI建议引擎未加载'
-            }), 503
+            return _ai_engine_unavailable('AI建议引擎未加载')
         
         # 获取引擎信息
         result = ai_suggestion_engine.get_engine_info()
@@ -531,3 +784,118 @@ def get_engine_info():
             'status': 'error',
             'message': f'获取引擎信息失败: {str(e)}'
         }), 500
+
+@api_bp.route('/admin/reload_frequency', methods=['POST'])
+def reload_frequency():
+    """在后台重新加载频率数据，加载完成后原子替换AI引擎；进行中的请求继续使用旧引擎"""
+    forbidden = _admin_forbidden()
+    if forbidden:
+        return forbidden
+    try:
+        started = ai_engine_loader.reload()
+        return jsonify({
+            'status': 'success' if started else 'busy',
+            'message': '已开始重新加载频率数据' if started else '频率数据正在加载中',
+            'ai_engine': ai_engine_loader.status()
+        }), 202 if started else 409
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'重新加载失败: {str(e)}'
+        }), 500
+
+@api_bp.route('/admin/merge_frequency', methods=['POST'])
+def merge_frequency():
+    """
+    把增量频率数据合并进当前引擎
+    请求体为 {'path': data目录下的增量JSON文件} 或 {'entries': [...]}（结构与频率数据文件相同）
+    """
+    forbidden = _admin_forbidden()
+    if forbidden:
+        return forbidden
+    try:
+        ai_suggestion_engine = ai_engine_loader.get()
+        if ai_suggestion_engine is None:
+            return _ai_engine_unavailable('AI建议引擎未加载')
+
+        data = request.get_json()
+        if not data or ('path' not in data and 'entries' not in data):
+            return jsonify({
+                'status': 'error',
+                'message': '缺少必要参数: path 或 entries'
+            }), 400
+
+        if 'entries' in data:
+            delta = data['entries']
+        else:
+            # 只允许读取数据目录中的文件
+            data_dir = os.path.realpath(os.path.dirname(frequency_model_path))
+            delta = os.path.realpath(os.path.join(data_dir, data['path']))
+            if os.path.dirname(delta) != data_dir:
+                return jsonify({
+                    'status': 'error',
+                    'message': '增量文件必须位于数据目录中'
+                }), 400
+
+        # 通过加载句柄合并：正在重新加载时，新引擎替换前会重放这次合并
+        result = ai_engine_loader.apply(lambda engine: engine.merge_frequency_delta(delta))
+        if result is None:
+            return _ai_engine_unavailable('AI建议引擎未加载')
+        return jsonify(result), 200 if result['status'] == 'success' else 400
+
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'合并增量数据失败: {str(e)}'
+        }), 500
+
+@api_bp.route('/explorer', methods=['POST'])
+def explorer():
+    """开局浏览：从开局起的走法序列之后的全部后续走法，附对局数和占比，分页返回"""
+    try:
+        if opening_book is None:
+            return jsonify({
+                'status': 'error',
+                'message': '开局库未加载'
+            }), 503
+
+        data = request.get_json(silent=True)
+        if data is None:
+            data = {}
+        validation = validate_explorer_request(data)
+        if not validation['valid']:
+            return jsonify({
+                'status': 'error',
+                'message': validation['message']
+            }), 400
+
+        moves = data.get('moves', [])
+        offset = data.get('offset') or 0
+        limit = data.get('limit') or 20
+        result = opening_book.continuations(moves, offset, limit)
+        if result is None:
+            return jsonify({
+                'status': 'no_data',
+                'message': '该走法序列不在开局库中',
+                'moves': moves,
+                'total_games': 0,
+                'total_continuations': 0,
+                'continuations': []
+            })
+
+        for continuation in result['continuations']:
+            move = continuation['move']
+            continuation['description'] = f"从({move[0]},{move[1]})移动到({move[2]},{move[3]})"
+        return jsonify({
+            'status': 'success',
+            'moves': moves,
+            'offset': offset,
+            'limit': limit,
+            **result
+        })
+
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'开局浏览失败: {str(e)}'
+        }), 500
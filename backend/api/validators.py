@@ -1,7 +1,32 @@
+from chess_engine.codec import decode_position
+
+
+def validate_board_state(board):
+    """
+    验证棋盘状态
+    支持180字符格式（9列×10行×2字符每位置，与spark_chess_analysis.py兼容）、FEN 和紧凑格式（base64）
+    """
+    if not isinstance(board, str):
+        return {'valid': False, 'message': '棋盘状态必须是字符串'}
+
+    # 纯数字的按180字符格式校验
+    if board.isdigit():
+        if len(board) != 180:
+            return {'valid': False, 'message': '棋盘状态字符串长度必须为180字符'}
+        return {'valid': True, 'message': '验证通过'}
+
+    try:
+        decode_position(board)
+    except ValueError as e:
+        return {'valid': False, 'message': f'棋盘状态无效: {str(e)}'}
+
+    return {'valid': True, 'message': '验证通过'}
+
+
 def validate_move_request(data):
     """
     验证移动请求数据
-    支持180字符格式（9列×10行×2字符每位置）与spark_chess_analysis.py兼容
+    棋盘状态支持180字符格式、FEN 和紧凑格式
     """
     if not data:
         return {'valid': False, 'message': '请求数据为空'}
@@ -16,15 +41,9 @@ def validate_move_request(data):
     move = data['move']
 
     # 验证棋盘字符串格式
-    if not isinstance(board, str):
-        return {'valid': False, 'message': '棋盘状态必须是字符串'}
-
-    # 只支持180字符格式（与spark_chess_analysis.py兼容）
-    if len(board) != 180:
-        return {'valid': False, 'message': '棋盘状态字符串长度必须为180字符'}
-
-    if not board.isdigit():
-        return {'valid': False, 'message': '棋盘状态字符串必须全为数字'}
+    board_result = validate_board_state(board)
+    if not board_result['valid']:
+        return board_result
 
     # 验证移动字符串格式
     if not isinstance(move, str):
@@ -54,3 +73,81 @@ def validate_move_request(data):
         return {'valid': False, 'message': '坐标格式错误'}
 
     return {'valid': True, 'message': '验证通过'}
+
+
+def validate_legal_moves_request(data):
+    """
+    验证合法走法查询请求数据
+    board 为任意支持的局面格式；side 可选（'red'/'black'）；from 可选，为起始格子的2位坐标 "xy"
+    """
+    if not data:
+        return {'valid': False, 'message': '请求数据为空'}
+
+    if 'board' not in data:
+        return {'valid': False, 'message': '缺少棋盘状态参数'}
+
+    board_result = validate_board_state(data['board'])
+    if not board_result['valid']:
+        return board_result
+
+    side = data.get('side')
+    if side is not None and side not in ('red', 'black'):
+        return {'valid': False, 'message': "side 参数必须是 'red' 或 'black'"}
+
+    from_square = data.get('from')
+    if from_square is not None:
+        if not isinstance(from_square, str) or len(from_square) != 2 or not from_square.isdigit():
+            return {'valid': False, 'message': 'from 参数必须是2位数字坐标'}
+
+        if int(from_square[0]) > 8:
+            return {'valid': False, 'message': '起始坐标超出范围（列0-8，行0-9）'}
+
+    return {'valid': True, 'message': '验证通过'}
+
+
+# AI建议接口一次最多返回的建议数
+MAX_TOP_K = 20
+
+
+def validate_ai_request(data, side_key='player'):
+    """
+    验证AI接口的可选参数（两者都是结果缓存键的一部分，必须是可哈希的有效值）
+    side_key 指定的走棋方参数必须是 'red' 或 'black'；top_k 必须是1到 MAX_TOP_K 之间的整数
+    """
+    side = data.get(side_key)
+    if side is not None and side not in ('red', 'black'):
+        return {'valid': False, 'message': f"{side_key} 参数必须是 'red' 或 'black'"}
+
+    top_k = data.get('top_k')
+    if top_k is not None and (not isinstance(top_k, int) or isinstance(top_k, bool)
+                              or not 1 <= top_k <= MAX_TOP_K):
+        return {'valid': False, 'message': f'top_k 参数必须是1-{MAX_TOP_K}之间的整数'}
+
+    return {'valid': True, 'message': '验证通过'}
+
+
+def validate_explorer_request(data):
+    """
+    验证开局浏览请求数据
+    moves 为从开局起的 'xyxy' 走法列表（可为空）；offset/limit 可选，用于分页（limit 不超过100）
+    """
+    if data is None:
+        return {'valid': False, 'message': '请求数据为空'}
+
+    moves = data.get('moves', [])
+    if not isinstance(moves, list):
+        return {'valid': False, 'message': 'moves 参数必须是走法列表'}
+    for move in moves:
+        if not isinstance(move, str) or len(move) != 4 or not move.isdigit():
+            return {'valid': False, 'message': f'走法格式无效: {move}'}
+        if int(move[0]) > 8 or int(move[2]) > 8:
+            return {'valid': False, 'message': f'走法坐标超出范围（列0-8，行0-9）: {move}'}
+
+    for name in ('offset', 'limit'):
+        value = data.get(name)
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < 0):
+            return {'valid': False, 'message': f'{name} 参数必须是非负整数'}
+    if data.get('limit') is not None and not 1 <= data['limit'] <= 100:
+        return {'valid': False, 'message': 'limit 参数必须在1-100之间'}
+
+    return {'valid': True, 'message': '验证通过'}
@@ -1,15 +1,18 @@
 from flask import Flask
 from flask_cors import CORS
-from api.routes import api_bp
 from config import Config
 
 def create_app():
+    # 蓝图在这里导入：搜索进程池用 spawn 启动，子进程重新导入主模块时不需要加载路由和AI引擎
+    from api.routes import api_bp, init_services
+
     app = Flask(__name__)
     app.config.from_object(Config)
     
     CORS(app)
     
     app.register_blueprint(api_bp, url_prefix='/api')
+    init_services()
     
     return app
 
@@ -5,142 +5,296 @@ AI建议引擎 - 基于频率数据提供棋步建议
 
 import json
 import os
+import threading
 from typing import List, Dict, Optional, Tuple
 from .board import ChessBoard
+from .cache import LRUCache
 
 
 class AIChessSuggestionEngine:
-    def __init__(self, frequency_data_path: str):
+    def __init__(self, frequency_data_path: str, position_cache=None, progress_callback=None,
+                 ann_threshold: Optional[int] = None, ann_probe_radius: int = 1,
+                 result_cache_size: int = 0, result_cache_ttl: Optional[float] = None, opening_book=None,
+                 search_depth: int = 4, search_node_budget: Optional[int] = 20000, tt_size_mb: float = 16,
+                 search_workers: int = 1, search_max_workers: Optional[int] = None):
         """
         初始化AI建议引擎
         
         Args:
             frequency_data_path: 频率数据文件路径
+            position_cache: 可选的 PositionCache，与 API 路由共享已解析的局面
+            progress_callback: 可选的 progress(stage, fraction)，加载频率数据时报告进度
+            ann_threshold: 某方局面数达到该值时相似局面检索改用近似索引（None 表示始终精确扫描）
+            ann_probe_radius: 近似索引的探测半径，越大召回率越高、查询越慢
+            result_cache_size: 建议/分析结果缓存容量（0 表示不缓存）
+            result_cache_ttl: 结果缓存条目的存活秒数（None 表示不过期，重新加载频率数据时整体失效）
+            opening_book: 可选的 OpeningBook；请求带有走法序列时优先按开局库给出建议
+            search_depth: 历史数据中没有可用走法时 alpha-beta 搜索的最大深度（0 表示不搜索）
+            search_node_budget: 每次搜索的节点预算（None 表示不限制）
+            tt_size_mb: 引擎内各请求的单进程搜索共用的置换表大小（MB，0 表示不使用）；load_frequency_data 不清空，局面的搜索结果与历史数据无关
+            search_workers: 默认的搜索进程数（1 表示在请求线程中搜索，大于1时按根节点拆分到进程池）
+            search_max_workers: 请求可以指定的最大搜索进程数（None 表示CPU核数）
         """
-        self.frequency_data = []
-        self.board_move_map = {}  # board_state -> [(player, move, frequency), ...]
+        self.position_cache = position_cache
+        self.ann_threshold = ann_threshold
+        self.ann_probe_radius = ann_probe_radius
+        self._progress = progress_callback or (lambda stage, fraction=None: None)
+        self.board_move_map = {}  # FrequencyIndex 或 FrequencySnapshot：board_state -> 按走棋方拆分的合法走法
+        self.total_records = 0
+        self.data_source = os.path.basename(frequency_data_path)
+        # side -> SimilarityIndex；第一次查找相似局面时才构建（快照启动时不生成矩阵），数据变化时置为 None
+        self.similarity_indexes = None
+        self._similarity_lock = threading.Lock()
+        # 结果缓存：('suggest', 棋盘状态, 玩家, top_k) 或 ('analysis', 棋盘状态) -> 结果字典（调用方只读）
+        self.result_cache = LRUCache(result_cache_size, result_cache_ttl) if result_cache_size else None
+        self.opening_book = opening_book
+        self.search_depth = search_depth
+        self.search_node_budget = search_node_budget
+        self.tt_size_mb = tt_size_mb
+        self.search_max_workers = max(1, search_max_workers or os.cpu_count() or 1)
+        self.search_workers = min(max(1, search_workers), self.search_max_workers)
+        self.transposition_table = None
+        if search_depth > 0 and tt_size_mb > 0:
+            from .transposition import TranspositionTable
+            self.transposition_table = TranspositionTable(tt_size_mb)
+        # 每个引擎一张置换表，所有请求的单进程搜索共用；置换表本身不加锁，这些搜索由 _search_lock 串行执行
+        # （多进程搜索不使用这张表，各进程有自己的置换表）
+        self._search_lock = threading.Lock()
+        self._merge_lock = threading.Lock()
+        self.delta_merges = 0
         self.load_frequency_data(frequency_data_path)
+        if isinstance(self.board_move_map, dict):
+            from .frequency_snapshot import FrequencyIndex
+            self.board_move_map = FrequencyIndex()
     
     def load_frequency_data(self, data_path: str):
-        """加载频率数据并建立索引"""
+        """
+        加载频率数据并建立索引
+        存在比JSON更新的二进制快照（同名 .bin，由 frequency_snapshot 生成）时直接 mmap 打开快照，不再解析JSON
+        """
+        from .frequency_snapshot import FrequencyIndex, FrequencySnapshot, snapshot_path_for
+
+        self.similarity_indexes = None
+        if self.result_cache is not None:
+            self.result_cache.clear()
+
+        snapshot_path = data_path if data_path.endswith('.bin') else snapshot_path_for(data_path)
+        if os.path.exists(snapshot_path) and (
+                snapshot_path == data_path or not os.path.exists(data_path)
+                or os.path.getmtime(snapshot_path) >= os.path.getmtime(data_path)):
+            try:
+                self._progress('snapshot', 0.0)
+                snapshot = FrequencySnapshot(snapshot_path)
+                self.board_move_map = snapshot
+                self.total_records = snapshot.record_count
+                self.data_source = os.path.basename(snapshot_path)
+                print(f"AI建议引擎加载快照成功，包含 {snapshot.record_count} 条记录，{len(snapshot)} 个不同棋盘状态")
+                return
+            except (OSError, ValueError) as e:
+                print(f"加载频率快照失败，改为解析JSON: {e}")
+
         try:
             if not os.path.exists(data_path):
                 print(f"警告: 频率数据文件不存在: {data_path}")
                 return
                 
+            self._progress('reading', 0.0)
             with open(data_path, 'r', encoding='utf-8') as f:
-                self.frequency_data = json.load(f)
+                data = json.load(f)
             
-            # 建立棋盘状态到移动的映射索引
-            for entry in self.frequency_data:
-                board_state = entry.get('board', '')
-                player = entry.get('player', '')
-                move = entry.get('move', '')
-                frequency = entry.get('frequency', 0)
-                
-                if board_state not in self.board_move_map:
-                    self.board_move_map[board_state] = []
-                
-                self.board_move_map[board_state].append({
-                    'player': player,
-                    'move': move,
-                    'frequency': frequency
-                })
-            
-            # 按频率排序每个棋盘状态的移动选项
-            for board_state in self.board_move_map:
-                self.board_move_map[board_state].sort(key=lambda x: x['frequency'], reverse=True)
+            # 建立棋盘状态到移动的映射索引：按走棋方拆分、按频率排序，并一次性丢弃在该局面下不合法的走法
+            # （解析JSON约占加载时间的一半，之后按局面数报告进度；原始数据只在此处使用，不保留在引擎上）
+            self._progress('indexing', 0.5)
+            self.board_move_map = FrequencyIndex.from_entries(
+                data, lambda fraction: self._progress('indexing', 0.5 + 0.45 * fraction))
+            self.total_records = self.board_move_map.record_count
             
-            print(f"AI建议引擎加载成功，包含 {len(self.frequency_data)} 条记录，{len(self.board_move_map)} 个不同棋盘状态")
+            print(f"AI建议引擎加载成功，包含 {self.total_records} 条记录（丢弃 {self.board_move_map.dropped_count} 条不合法走法），"
+                  f"{len(self.board_move_map)} 个不同棋盘状态")
             
         except Exception as e:
             print(f"加载频率数据失败: {e}")
-            self.frequency_data = []
-            self.board_move_map = {}
+            self.board_move_map = FrequencyIndex()
+            self.total_records = 0
     
-    def get_ai_suggestions(self, board_state: str, player: str = 'red', top_k: int = 3) -> Dict:
+    def merge_frequency_delta(self, delta) -> Dict:
         """
-        获取AI移动建议
+        把增量频率数据合并进当前索引，不重新加载全部数据
+        快照索引只读，第一次合并时在其上叠加一个内存层，只保存增量涉及的局面
+
+        Args:
+            delta: 增量JSON文件路径，或与频率数据文件结构相同的列表/字典
+
+        Returns:
+            dict: 合并结果
+        """
+        from .frequency_snapshot import FrequencyIndex
+
+        try:
+            if isinstance(delta, str):
+                with open(delta, 'r', encoding='utf-8') as f:
+                    delta = json.load(f)
+        except (OSError, ValueError) as e:
+            return {'status': 'error', 'message': f'读取增量数据失败: {e}'}
+
+        with self._merge_lock:
+            if not isinstance(self.board_move_map, FrequencyIndex):
+                base = self.board_move_map if self.board_move_map else None
+                self.board_move_map = FrequencyIndex(base)
+            stats = self.board_move_map.merge(delta)
+            self.total_records = self.board_move_map.record_count
+            self.delta_merges += 1
+            if stats['new_positions']:
+                # 相似度索引在下一次查找时按新数据重新构建（等正在进行的构建结束后再作废，不会留下旧的索引）
+                with self._similarity_lock:
+                    self.similarity_indexes = None
+            if self.result_cache is not None:
+                self.result_cache.clear()
+
+        return {
+            'status': 'success',
+            'message': f"合并了{stats['positions']}个局面的增量数据，新增{stats['records']}个走法",
+            **stats
+        }
+    
+    def get_ai_suggestions(self, board_state: str, player: str = 'red', top_k: int = 3,
+                           move_history: Optional[List[str]] = None, workers: Optional[int] = None) -> Dict:
+        """
+        获取AI移动建议（配置了结果缓存时按 (棋盘状态, 玩家, top_k, 走法序列, 搜索进程数) 缓存，返回的字典不要修改）
 
         Args:
             board_state: 180字符的棋盘状态字符串（与spark_chess_analysis.py兼容）
             player: 玩家方 ('red' 或 'black')
             top_k: 返回前k个建议
+            move_history: 可选，从开局起的 'xyxy' 走法序列；配置了开局库时先在开局库中查找
+            workers: 可选，需要搜索时使用的进程数（不超过 search_max_workers；None 表示默认值）
 
         Returns:
             dict: AI建议结果
         """
-        # 验证棋盘状态格式
-        if not self._validate_board_state(board_state):
+        history = tuple(move_history) if move_history is not None and self.opening_book is not None else None
+        workers = self._search_worker_count(workers)
+        return self._cached_result(('suggest', board_state, player, top_k, history, workers),
+                                   lambda: self._compute_ai_suggestions(board_state, player, top_k, history, workers))
+
+    def _search_worker_count(self, workers: Optional[int]) -> int:
+        if workers is None:
+            return self.search_workers
+        return min(max(1, workers), self.search_max_workers)
+
+    def _book_suggestions(self, board_state: str, player: str, top_k: int,
+                          move_history: Tuple[str, ...]) -> Optional[Dict]:
+        """开局库中的后续走法；序列不在库中、轮到的不是 player 或走法在当前棋盘上无效时返回 None"""
+        expected_player = 'red' if len(move_history) % 2 == 0 else 'black'
+        if player != expected_player:
+            return None
+        try:
+            book = self.opening_book.continuations(move_history, 0, top_k)
+        except ValueError:
+            return None
+        if not book or not book['continuations']:
+            return None
+
+        # 走法序列可能与棋盘不一致，候选走法仍在当前棋盘上验证
+        board = self._get_board(board_state)
+        suggestions = []
+        for continuation in book['continuations']:
+            if self._validate_move_on_board(board, continuation['move'], player):
+                suggestion = self._suggestion({'move': continuation['move'], 'frequency': continuation['count']})
+                suggestion['percentage'] = continuation['percentage']
+                suggestions.append(suggestion)
+        if not suggestions:
+            return None
+
+        return {
+            'status': 'success',
+            'message': f'开局库中找到{len(suggestions)}个建议（{book["total_games"]}盘对局）',
+            'board_state': board_state,
+            'player': player,
+            'suggestions': suggestions,
+            'total_moves_available': book['total_continuations'],
+            'book_mode': True,
+            'book_games': book['total_games']
+        }
+
+    def _cached_result(self, key, compute) -> Dict:
+        """结果缓存查找；出错的结果不缓存"""
+        if self.result_cache is None:
+            return compute()
+        result = self.result_cache.get(key)
+        if result is None:
+            result = compute()
+            if result.get('status') != 'error':
+                self.result_cache.put(key, result)
+        return result
+
+    def _compute_ai_suggestions(self, board_state: str, player: str, top_k: int,
+                                move_history: Optional[Tuple[str, ...]] = None, workers: int = 1) -> Dict:
+        # 验证棋盘状态格式；历史数据按180字符格式索引，走棋、验证和搜索使用原始局面（保留FEN/紧凑格式中的棋子身份）
+        index_key = self._index_key(board_state)
+        if index_key is None:
             return {
                 'status': 'error',
                 'message': '棋盘状态格式无效',
                 'suggestions': []
             }
 
+        # 第一层：开局库（只沿走法序列查找，不需要局面索引）
+        if move_history is not None:
+            book_result = self._book_suggestions(board_state, player, top_k, move_history)
+            if book_result is not None:
+                return book_result
+
         # 查找匹配的棋盘状态
-        if board_state not in self.board_move_map:
+        if index_key not in self.board_move_map:
             # 尝试找到最相似的棋盘状态
-            similar_result = self._find_most_similar_board_state(board_state, player, top_k)
+            similar_result = self._find_most_similar_board_state(board_state, player, top_k, workers)
             if similar_result['status'] == 'success':
                 return similar_result
-            else:
-                return {
-                    'status': 'no_match',
-                    'message': '当前棋盘状态在历史数据中未找到，也无法找到相似状态',
-                    'suggestions': []
-                }
+            # 最后一层：在当前棋盘上搜索
+            if similar_result['status'] == 'no_similar_states':
+                search_result = self._search_suggestions(board_state, player, top_k, '历史数据中没有相似状态', workers)
+                if search_result is not None:
+                    return search_result
+            return {
+                'status': 'no_match',
+                'message': '当前棋盘状态在历史数据中未找到，也无法找到相似状态',
+                'suggestions': []
+            }
         
-        # 获取该棋盘状态下指定玩家的所有移动
-        all_moves = self.board_move_map[board_state]
-        player_moves = [move for move in all_moves if move['player'] == player]
+        # 获取该棋盘状态下指定玩家的走法（建索引时已按频率排序并校验过合法性）
+        player_moves = self.board_move_map.get_side(index_key, player)
         
-        if not player_moves:
+        if player_moves is not None and index_key != board_state:
+            # 索引中的走法按推断的棋子身份校验过，FEN/紧凑格式的局面还要在真实棋盘上验证
+            board = self._get_board(board_state)
+            player_moves = [move_data for move_data in player_moves
+                            if self._validate_move_on_board(board, move_data['move'], player)]
+
+        if player_moves is None:
+            # 历史数据中只有对方的走法，同样在当前棋盘上搜索
+            search_result = self._search_suggestions(board_state, player, top_k, '历史数据中没有该方的走法记录', workers)
+            if search_result is not None:
+                return search_result
             return {
                 'status': 'no_player_moves',
                 'message': f'该棋盘状态下没有找到{player}方的移动记录',
                 'suggestions': []
             }
         
-        # 取前k个高频移动
-        top_moves = player_moves[:top_k]
-        
-        suggestions = []
-        for move_data in top_moves:
-            move = move_data['move']
-            frequency = move_data['frequency']
-
-            # 验证移动格式
-            if self._validate_move_format(move):
-                # 验证走法在当前棋盘状态下是否有效
-                if self._validate_move_on_board(board_state, move, player):
-                    suggestions.append({
-                        'move': move,
-                        'frequency': frequency,
-                        'from_position': f"({move[0]},{move[1]})",
-                        'to_position': f"({move[2]},{move[3]})",
-                        'description': f"从({move[0]},{move[1]})移动到({move[2]},{move[3]})"
-                    })
+        # 取前k个高频移动，不需要再解析棋盘
+        suggestions = [self._suggestion(move_data) for move_data in player_moves[:top_k]]
         
-        # 如果没有有效的建议，尝试生成基于当前棋盘的合法走法
+        # 如果历史走法在该局面下全部不合法，在当前棋盘上搜索
         if not suggestions:
-            fallback_suggestions = self._generate_fallback_suggestions(board_state, player, top_k)
-            if fallback_suggestions:
-                return {
-                    'status': 'success',
-                    'message': f'基于当前棋盘生成{len(fallback_suggestions)}个建议（历史数据中无匹配走法）',
-                    'board_state': board_state,
-                    'player': player,
-                    'suggestions': fallback_suggestions,
-                    'total_moves_available': len(fallback_suggestions),
-                    'fallback_mode': True
-                }
-            else:
-                return {
-                    'status': 'no_valid_moves',
-                    'message': f'该棋盘状态下没有找到{player}方的有效移动',
-                    'suggestions': []
-                }
+            search_result = self._search_suggestions(board_state, player, top_k, '历史数据中无匹配走法', workers)
+            if search_result is not None:
+                return search_result
+            return {
+                'status': 'no_valid_moves',
+                'message': f'该棋盘状态下没有找到{player}方的有效移动',
+                'suggestions': []
+            }
 
         return {
             'status': 'success',
@@ -151,19 +305,20 @@ class AIChessSuggestionEngine:
             'total_moves_available': len(player_moves)
         }
     
-    def execute_ai_move(self, board_state: str, player: str = 'black') -> Dict:
+    def execute_ai_move(self, board_state: str, player: str = 'black', workers: Optional[int] = None) -> Dict:
         """
         执行AI推荐的最佳移动，返回新的棋盘状态
         
         Args:
             board_state: 当前棋盘状态
             player: 执行移动的玩家
+            workers: 可选，需要搜索时使用的进程数
             
         Returns:
             dict: 包含新棋盘状态和移动信息的结果
         """
         # 获取AI建议
-        suggestion_result = self.get_ai_suggestions(board_state, player, top_k=1)
+        suggestion_result = self.get_ai_suggestions(board_state, player, top_k=1, workers=workers)
         
         if suggestion_result['status'] != 'success' or not suggestion_result['suggestions']:
             return {
@@ -180,8 +335,8 @@ class AIChessSuggestionEngine:
             print(f"DEBUG execute_ai_move: 开始执行AI移动，玩家={player}, 移动={best_move}")
             print(f"DEBUG execute_ai_move: 原始棋盘状态长度={len(board_state)}, 前50字符={board_state[:50]}")
 
-            # 创建棋盘对象
-            board = ChessBoard(board_state)
+            # 创建棋盘对象（缓存中的棋盘是共享的，走棋前先复制）
+            board = self._get_board(board_state).copy()
 
             # 解析移动
             from_x = int(best_move[0])
@@ -224,8 +379,12 @@ class AIChessSuggestionEngine:
                     'move_executed': best_move
                 }
 
-            # 获取新的棋盘状态
-            new_board_state = board.to_string()
+            # 获取新的棋盘状态（与传入的局面格式相同，FEN 附带下一步的走棋方）
+            from .codec import FORMAT_FEN, detect_format
+            from .pieces import opponent
+            position_format = detect_format(board_state)
+            new_board_state = board.to_position(
+                position_format, opponent(player) if position_format == FORMAT_FEN else None)
             print(f"DEBUG execute_ai_move: 新棋盘状态长度={len(new_board_state)}, 前50字符={new_board_state[:50]}")
 
             return {
@@ -237,7 +396,9 @@ class AIChessSuggestionEngine:
                 'move_description': suggestion_result['suggestions'][0]['description'],
                 'frequency': suggestion_result['suggestions'][0]['frequency'],
                 'game_over': move_result['game_over'],
-                'winner': move_result['winner']
+                'winner': move_result['winner'],
+                'reason': move_result['reason'],
+                'in_check': move_result['in_check']
             }
             
         except Exception as e:
@@ -305,7 +466,7 @@ class AIChessSuggestionEngine:
     
     def get_board_analysis(self, board_state: str) -> Dict:
         """
-        分析棋盘状态，获取可用的移动选项
+        分析棋盘状态，获取可用的移动选项（配置了结果缓存时按棋盘状态缓存，返回的字典不要修改）
         
         Args:
             board_state: 棋盘状态
@@ -313,24 +474,31 @@ class AIChessSuggestionEngine:
         Returns:
             dict: 分析结果
         """
-        if not self._validate_board_state(board_state):
+        return self._cached_result(('analysis', board_state), lambda: self._compute_board_analysis(board_state))
+
+    def _compute_board_analysis(self, board_state: str) -> Dict:
+        index_key = self._index_key(board_state)
+        if index_key is None:
             return {
                 'status': 'error',
                 'message': '棋盘状态格式无效'
             }
         
-        if board_state not in self.board_move_map:
+        # 静态评估（红方视角的局面分）与历史数据无关，找不到历史数据时也给出
+        evaluation = self._get_board(board_state).eval_score
+
+        if index_key not in self.board_move_map:
             return {
                 'status': 'no_data',
                 'message': '该棋盘状态在历史数据中未找到',
                 'red_moves_count': 0,
                 'black_moves_count': 0,
-                'total_moves_count': 0
+                'total_moves_count': 0,
+                'evaluation': evaluation
             }
         
-        all_moves = self.board_move_map[board_state]
-        red_moves = [move for move in all_moves if move['player'] == 'red']
-        black_moves = [move for move in all_moves if move['player'] == 'black']
+        red_moves = self.board_move_map.get_side(index_key, 'red') or []
+        black_moves = self.board_move_map.get_side(index_key, 'black') or []
         
         return {
             'status': 'success',
@@ -338,11 +506,12 @@ class AIChessSuggestionEngine:
             'board_state': board_state,
             'red_moves_count': len(red_moves),
             'black_moves_count': len(black_moves),
-            'total_moves_count': len(all_moves),
+            'total_moves_count': len(red_moves) + len(black_moves),
             'has_red_options': len(red_moves) > 0,
             'has_black_options': len(black_moves) > 0,
             'top_red_moves': red_moves[:3],
-            'top_black_moves': black_moves[:3]
+            'top_black_moves': black_moves[:3],
+            'evaluation': evaluation
         }
     
     def _validate_board_state(self, board_state: str) -> bool:
@@ -356,7 +525,20 @@ class AIChessSuggestionEngine:
             return False
         return True
 
-
+    def _index_key(self, board_state: str) -> Optional[str]:
+        """
+        历史数据的索引键（180字符格式）：180字符格式原样返回，FEN/紧凑格式按占位转换
+        格式无效时返回 None
+        """
+        if not isinstance(board_state, str) or not board_state:
+            return None
+        if board_state.isdigit():
+            return board_state if self._validate_board_state(board_state) else None
+        from .codec import decode_position, encode
+        try:
+            return encode(decode_position(board_state))
+        except ValueError:
+            return None
     
     def _validate_move_format(self, move: str) -> bool:
         """验证移动格式"""
@@ -376,12 +558,27 @@ class AIChessSuggestionEngine:
         except ValueError:
             return False
 
-    def _validate_move_on_board(self, board_state: str, move: str, player: str) -> bool:
-        """验证走法在当前棋盘状态下是否有效"""
-        try:
-            # 创建棋盘对象
-            board = ChessBoard(board_state)
+    def _get_board(self, board_state: str) -> ChessBoard:
+        """解析棋盘；配置了局面缓存时返回缓存中的只读棋盘"""
+        if self.position_cache is not None:
+            return self.position_cache.board(board_state)
+        return ChessBoard(board_state)
+
+    @staticmethod
+    def _suggestion(move_data: Dict) -> Dict:
+        """把频率索引中的走法记录转换为建议"""
+        move = move_data['move']
+        return {
+            'move': move,
+            'frequency': move_data['frequency'],
+            'from_position': f"({move[0]},{move[1]})",
+            'to_position': f"({move[2]},{move[3]})",
+            'description': f"从({move[0]},{move[1]})移动到({move[2]},{move[3]})"
+        }
 
+    def _validate_move_on_board(self, board: ChessBoard, move: str, player: str) -> bool:
+        """验证走法在给定棋盘上是否有效（棋盘由调用方解析一次后复用）"""
+        try:
             # 解析移动坐标
             from_x = int(move[0])
             from_y = int(move[1])
@@ -407,51 +604,83 @@ class AIChessSuggestionEngine:
             print(f"验证走法时发生错误: {e}")
             return False
 
-    def _generate_fallback_suggestions(self, board_state: str, player: str, top_k: int) -> List[Dict]:
-        """当历史数据中没有匹配走法时，生成基于当前棋盘的合法走法建议"""
-        try:
-            # 创建棋盘对象
-            board = ChessBoard(board_state)
+    def _search_suggestions(self, board_state: str, player: str, top_k: int, reason: str,
+                            workers: int = 1) -> Optional[Dict]:
+        """历史数据给不出走法时在当前棋盘上搜索，返回建议结果；没有合法走法时返回 None"""
+        board = self._get_board(board_state)
+        suggestions, search_stats = self._generate_fallback_suggestions(board, player, top_k, workers)
+        if not suggestions:
+            return None
+        result = {
+            'status': 'success',
+            'message': f'基于当前棋盘生成{len(suggestions)}个建议（{reason}）',
+            'board_state': board_state,
+            'player': player,
+            'suggestions': suggestions,
+            'total_moves_available': len(suggestions),
+            'fallback_mode': True
+        }
+        if search_stats is not None:
+            result['search'] = search_stats
+        return result
+
+    def _generate_fallback_suggestions(self, board: ChessBoard, player: str, top_k: int,
+                                       workers: int = 1) -> Tuple[List[Dict], Optional[Dict]]:
+        """
+        当历史数据中没有匹配走法时，生成基于当前棋盘的走法建议
+        配置了搜索深度时按 alpha-beta 搜索的分数排序，否则按走后的静态评估排序（两种情况建议都带 score）
+        workers 大于1时把根节点走法分给进程池中的多个进程搜索（每个进程的节点预算相同，使用各自的置换表）
 
-            # 获取指定玩家的所有棋子
-            player_pieces = [piece for piece in board.pieces
-                           if piece['type'] == player and piece['x'] != 99 and piece['y'] != 99]
+        Returns:
+            tuple: (建议列表, 搜索统计 {'depth', 'nodes', 'nps', 'seconds', 'aborted', 'workers'}；未搜索时为 None)
+        """
+        try:
+            search_stats = None
+            if self.search_depth > 0:
+                from .search import parallel_search, search, shared_executor
+                if workers > 1:
+                    result = parallel_search(board, player, top_k, self.search_depth, self.search_node_budget,
+                                             workers=workers, executor=shared_executor(self.search_max_workers),
+                                             tt_mb=self.tt_size_mb)
+                else:
+                    with self._search_lock:
+                        result = search(board, player, top_k, self.search_depth, self.search_node_budget,
+                                        tt=self.transposition_table)
+                moves = [(item['move'], item['score']) for item in result['moves']]
+                search_stats = {key: result[key] for key in ('depth', 'nodes', 'nps', 'seconds', 'aborted')}
+                search_stats['workers'] = result.get('workers', 1)
+            else:
+                from .evaluation import rank_moves
+                from .rules import ChessRules
+                # 缓存中的棋盘是共享的，在副本上走棋评估
+                scratch = board.copy()
+                ranked = rank_moves(scratch, player, ChessRules.generate_legal_moves(scratch, player))
+                moves = [(f"{from_sq // 10}{from_sq % 10}{to_sq // 10}{to_sq % 10}", score)
+                         for score, (from_sq, to_sq) in ranked[:top_k]]
 
             valid_moves = []
+            for move, score in moves:
+                from_x, from_y, to_x, to_y = (int(c) for c in move)
+                suggestion = {
+                    'move': move,
+                    'frequency': 1,  # 默认频率
+                    'from_position': f"({from_x},{from_y})",
+                    'to_position': f"({to_x},{to_y})",
+                    'description': f"从({from_x},{from_y})移动到({to_x},{to_y})",
+                    'piece_name': board.get_piece_at(from_x, from_y).name
+                }
+                if score is not None:
+                    suggestion['score'] = score
+                valid_moves.append(suggestion)
 
-            # 为每个棋子尝试所有可能的移动
-            for piece in player_pieces:
-                from_x, from_y = piece['x'], piece['y']
-
-                # 尝试移动到棋盘上的每个位置
-                for to_x in range(9):
-                    for to_y in range(10):
-                        if from_x == to_x and from_y == to_y:
-                            continue
-
-                        # 使用规则引擎验证移动是否合法
-                        from .rules import ChessRules
-                        validation_result = ChessRules.validate_move_with_reason(board, from_x, from_y, to_x, to_y)
-
-                        if validation_result['valid']:
-                            move = f"{from_x}{from_y}{to_x}{to_y}"
-                            valid_moves.append({
-                                'move': move,
-                                'frequency': 1,  # 默认频率
-                                'from_position': f"({from_x},{from_y})",
-                                'to_position': f"({to_x},{to_y})",
-                                'description': f"从({from_x},{from_y})移动到({to_x},{to_y})",
-                                'piece_name': piece['name']
-                            })
-
-            # 返回前top_k个建议（可以根据棋子重要性或其他策略排序）
-            return valid_moves[:top_k]
+            return valid_moves, search_stats
 
         except Exception as e:
             print(f"生成备用建议时发生错误: {e}")
-            return []
+            return [], None
 
-    def _find_most_similar_board_state(self, target_board_state: str, player: str, top_k: int) -> Dict:
+    def _find_most_similar_board_state(self, target_board_state: str, player: str, top_k: int,
+                                       workers: int = 1) -> Dict:
         """
         找到最相似的棋盘状态并返回其移动建议
 
@@ -459,6 +688,7 @@ class AIChessSuggestionEngine:
             target_board_state: 目标棋盘状态
             player: 玩家方
             top_k: 返回建议数量
+            workers: 相似状态的走法都无效、改为搜索时使用的进程数
 
         Returns:
             dict: 相似状态的建议结果
@@ -466,61 +696,56 @@ class AIChessSuggestionEngine:
         try:
             print(f"正在寻找与当前棋盘状态最相似的历史状态...")
 
-            # 计算与所有历史棋盘状态的相似度
-            similarities = []
-
-            for board_state, moves in self.board_move_map.items():
-                # 计算相似度（基于字符差异数量）
-                similarity_score = self._calculate_board_similarity(target_board_state, board_state)
-
-                # 检查该状态是否有指定玩家的移动
-                player_moves = [move for move in moves if move['player'] == player]
-                if player_moves:
-                    similarities.append({
-                        'board_state': board_state,
-                        'similarity_score': similarity_score,
-                        'moves': player_moves,
-                        'total_moves': len(player_moves)
-                    })
-
-            if not similarities:
+            # 在该玩家有走法记录的局面中向量化计算相似度（基于字符差异数量），取最相似的一个
+            # 索引中只有规范化方向的局面。规范化按字典序取方向，不保持距离：相近的两个局面可能规范化到相反的方向，
+            # 因此目标局面的两个方向都要检索，取相似度高的一个（相同时取原方向），找到的局面和走法再镜像回目标的方向
+            from .codec import board_string_orientations, mirror_board_string, mirror_move
+            index = self._get_similarity_index(player)
+            best = None
+            if index is not None:
+                for query, mirrored in zip(board_string_orientations(self._index_key(target_board_state)),
+                                           (False, True)):
+                    matches = index.most_similar(query, 1)
+                    if matches and (best is None or matches[0][1] > best[1]):
+                        best = (matches[0][0], matches[0][1], mirrored)
+            if best is None:
                 return {
                     'status': 'no_similar_states',
                     'message': f'没有找到包含{player}方移动的相似棋盘状态'
                 }
 
-            # 按相似度排序（相似度越高越好）
-            similarities.sort(key=lambda x: x['similarity_score'], reverse=True)
-
-            # 选择最相似的状态
-            best_match = similarities[0]
+            best_state, similarity_score, mirrored = best
+            player_moves = self.board_move_map.get_side(best_state, player) or []
+            if mirrored:
+                best_state = mirror_board_string(best_state)
+                player_moves = [dict(move, move=mirror_move(move['move'])) for move in player_moves]
+            best_match = {
+                'board_state': best_state,
+                'similarity_score': similarity_score,
+                'moves': player_moves,
+                'total_moves': len(player_moves)
+            }
             similarity_percentage = best_match['similarity_score'] * 100
 
             print(f"找到最相似状态，相似度: {similarity_percentage:.1f}%")
 
-            # 获取该状态下的移动建议
+            # 获取该状态下的移动建议（目标棋盘只解析一次）
+            board = self._get_board(target_board_state)
             suggestions = []
             for move_data in best_match['moves'][:top_k]:
                 move = move_data['move']
-                frequency = move_data['frequency']
 
-                # 验证移动格式和在当前棋盘上的有效性
+                # 相似局面的走法在目标棋盘上不一定合法，仍需逐个验证
                 if (self._validate_move_format(move) and
-                    self._validate_move_on_board(target_board_state, move, player)):
-                    suggestions.append({
-                        'move': move,
-                        'frequency': frequency,
-                        'from_position': f"({move[0]},{move[1]})",
-                        'to_position': f"({move[2]},{move[3]})",
-                        'description': f"从({move[0]},{move[1]})移动到({move[2]},{move[3]})"
-                    })
+                    self._validate_move_on_board(board, move, player)):
+                    suggestions.append(self._suggestion(move_data))
 
             # 如果相似状态的移动在当前棋盘上无效，使用备用方案
             if not suggestions:
                 print("相似状态的移动在当前棋盘上无效，使用备用方案...")
-                fallback_suggestions = self._generate_fallback_suggestions(target_board_state, player, top_k)
+                fallback_suggestions, search_stats = self._generate_fallback_suggestions(board, player, top_k, workers)
                 if fallback_suggestions:
-                    return {
+                    result = {
                         'status': 'success',
                         'message': f'基于当前棋盘生成{len(fallback_suggestions)}个建议（相似状态移动无效）',
                         'board_state': target_board_state,
@@ -529,6 +754,9 @@ class AIChessSuggestionEngine:
                         'similarity_mode': 'fallback',
                         'similarity_percentage': similarity_percentage
                     }
+                    if search_stats is not None:
+                        result['search'] = search_stats
+                    return result
                 else:
                     return {
                         'status': 'no_valid_moves',
@@ -553,35 +781,64 @@ class AIChessSuggestionEngine:
                 'message': f'寻找相似状态时发生错误: {str(e)}'
             }
 
-    def _calculate_board_similarity(self, board1: str, board2: str) -> float:
-        """
-        计算两个棋盘状态的相似度
-
-        Args:
-            board1: 棋盘状态1
-            board2: 棋盘状态2
-
-        Returns:
-            float: 相似度分数 (0.0-1.0)
-        """
-        if len(board1) != len(board2):
-            return 0.0
+    def _get_similarity_index(self, player: str):
+        """该玩家有走法记录的全部局面的相似度检索矩阵，第一次查找时构建（双方一起构建，并发的请求等待同一次构建）"""
+        indexes = self.similarity_indexes
+        if indexes is None:
+            with self._similarity_lock:
+                indexes = self.similarity_indexes
+                if indexes is None:
+                    indexes = self.similarity_indexes = self._build_similarity_indexes()
+        return indexes.get(player)
+
+    def _build_similarity_indexes(self) -> Dict:
+        from .frequency_snapshot import FrequencySnapshot
+        from .similarity import build_index
+        indexes = {}
+        for side in ('red', 'black'):
+            if isinstance(self.board_move_map, FrequencySnapshot):
+                # 快照直接从 mmap 中的占位掩码生成矩阵，不逐个局面解码
+                states, matrix = self.board_move_map.side_matrix(side)
+                indexes[side] = build_index(states, self.ann_threshold, self.ann_probe_radius, matrix)
+            else:
+                indexes[side] = build_index(self.board_move_map.side_states(side), self.ann_threshold,
+                                            self.ann_probe_radius)
+        return indexes
 
-        # 计算相同字符的数量
-        same_chars = sum(1 for a, b in zip(board1, board2) if a == b)
+    def _index_type(self) -> str:
+        from .frequency_snapshot import FrequencyIndex, FrequencySnapshot
+        index = self.board_move_map
+        if isinstance(index, FrequencyIndex) and index.base is not None:
+            return 'mmap_snapshot+delta' if isinstance(index.base, FrequencySnapshot) else 'dict+delta'
+        return 'mmap_snapshot' if isinstance(index, FrequencySnapshot) else 'dict'
 
-        # 返回相似度百分比
-        return same_chars / len(board1)
-    
     def get_engine_info(self) -> Dict:
         """获取引擎信息"""
-        return {
+        info = {
             'engine_name': 'AI Chess Suggestion Engine',
-            'data_source': 'move_frequency_analysis.json',
-            'total_records': len(self.frequency_data),
+            'data_source': self.data_source,
+            'total_records': self.total_records,
             'unique_board_states': len(self.board_move_map),
+            'index_type': self._index_type(),
+            'delta_merges': self.delta_merges,
             'supports_red_suggestions': True,
             'supports_black_suggestions': True,
             'supports_move_execution': True,
             'supports_board_comparison': True
-        }
\ No newline at end of file
+        }
+        if self.similarity_indexes is not None:
+            info['similarity_index'] = {
+                side: {'type': type(index).__name__, 'positions': len(index)}
+                for side, index in self.similarity_indexes.items()
+            }
+        if self.position_cache is not None:
+            info['position_cache'] = self.position_cache.stats()
+        if self.result_cache is not None:
+            info['result_cache'] = self.result_cache.stats()
+        if self.opening_book is not None:
+            info['opening_book'] = self.opening_book.stats()
+        info['search'] = {'max_depth': self.search_depth, 'node_budget': self.search_node_budget,
+                          'workers': self.search_workers, 'max_workers': self.search_max_workers}
+        if self.transposition_table is not None:
+            info['transposition_table'] = self.transposition_table.stats()
+        return info
\ No newline at end of file
@@ -0,0 +1,268 @@
+"""
+位棋盘（bitboard）局面表示
+每个棋子编码对应一个90位整数，第 sq 位（sq = x * 10 + y）表示该格子上有这种棋子。
+同一列的10个格子位编号连续；另外维护一份按行排列的占位（第 y * 9 + x 位），
+这样车、炮在行和列上的攻击都能通过查表一次得到。
+"""
+
+from .pieces import (
+    KING, ADVISOR, ELEPHANT, HORSE, ROOK, CANNON, PAWN,
+    BLACK_FLAG, CODE_COUNT, SIDE_FLAGS, make_code,
+)
+from .codec import decode, encode
+from .rules import HORSE_MOVES, ELEPHANT_MOVES, ADVISOR_MOVES, KING_MOVES, PAWN_MOVES
+
+def iter_squares(bits):
+    """按从低到高的顺序遍历位棋盘中置位的格子"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def _build_line_tables(length, spread):
+    """
+    一维滑动攻击表：rook[pos][pattern] / cannon[pos][pattern] / zone[pos][pattern]
+    pattern 是这条线上的占位，车的攻击包含第一个阻挡子，炮的攻击是炮架后的第一个棋子，
+    zone 是炮架后直到下一个棋子（含）的全部格子，即放上敌子就能被炮吃到的范围
+    spread(i) 把线上第 i 格转换为位棋盘中的位
+    """
+    rook_table = []
+    cannon_table = []
+    zone_table = []
+    for pos in range(length):
+        rook_row = [0] * (1 << length)
+        cannon_row = [0] * (1 << length)
+        zone_row = [0] * (1 << length)
+        for pattern in range(1 << length):
+            rook_bits = 0
+            cannon_bits = 0
+            zone_bits = 0
+            for step in (-1, 1):
+                i = pos + step
+                screened = False
+                while 0 <= i < length:
+                    occupied = (pattern >> i) & 1
+                    if not screened:
+                        rook_bits |= spread(i)
+                        if occupied:
+                            screened = True
+                    else:
+                        zone_bits |= spread(i)
+                        if occupied:
+                            cannon_bits |= spread(i)
+                            break
+                    i += step
+            rook_row[pattern] = rook_bits
+            cannon_row[pattern] = cannon_bits
+            zone_row[pattern] = zone_bits
+        rook_table.append(rook_row)
+        cannon_table.append(cannon_row)
+        zone_table.append(zone_row)
+    return rook_table, cannon_table, zone_table
+
+
+# 列表按行号 y 索引，结果位于第0列，使用时左移 10 * x
+FILE_ROOK_ATTACKS, FILE_CANNON_ATTACKS, FILE_CANNON_ZONES = _build_line_tables(10, lambda i: 1 << i)
+# 行表按列号 x 索引，结果位于第0行，使用时左移 y
+RANK_ROOK_ATTACKS, RANK_CANNON_ATTACKS, RANK_CANNON_ZONES = _build_line_tables(9, lambda i: 1 << (10 * i))
+
+
+def _build_blockable_table(moves):
+    """
+    把 [(目标格, 阻挡格), ...] 形式的走法表转换为按阻挡格占位索引的目标位掩码表
+    返回: [(阻挡格元组, [mask, ...]), ...]，每个格子一项
+    """
+    table = []
+    for sq_moves in moves:
+        blockers = tuple(sorted({block for _, block in sq_moves}))
+        masks = []
+        for occupancy in range(1 << len(blockers)):
+            blocked = {blockers[i] for i in range(len(blockers)) if (occupancy >> i) & 1}
+            mask = 0
+            for to_sq, block in sq_moves:
+                if block not in blocked:
+                    mask |= 1 << to_sq
+            masks.append(mask)
+        table.append((blockers, masks))
+    return table
+
+
+def _reverse_moves(moves):
+    """把 [(目标格, 阻挡格), ...] 走法表反转为 目标格 -> [(出发格, 阻挡格), ...]"""
+    reverse = [[] for _ in range(90)]
+    for from_sq, sq_moves in enumerate(moves):
+        for to_sq, block in sq_moves:
+            reverse[to_sq].append((from_sq, block))
+    return reverse
+
+
+def _squares_mask(table):
+    return [sum(1 << to_sq for to_sq in targets) for targets in table]
+
+
+HORSE_TARGETS = _build_blockable_table(HORSE_MOVES)
+# 能跳到某格的马的位置，阻挡格是该格的斜向相邻格
+HORSE_ATTACKERS = _build_blockable_table(_reverse_moves(HORSE_MOVES))
+ELEPHANT_TARGETS = {side: _build_blockable_table(ELEPHANT_MOVES[side]) for side in SIDE_FLAGS}
+ELEPHANT_ATTACKERS = {side: _build_blockable_table(_reverse_moves(ELEPHANT_MOVES[side])) for side in SIDE_FLAGS}
+ADVISOR_TARGETS = {side: _squares_mask(ADVISOR_MOVES[side]) for side in SIDE_FLAGS}
+KING_TARGETS = {side: _squares_mask(KING_MOVES[side]) for side in SIDE_FLAGS}
+PAWN_TARGETS = {side: _squares_mask(PAWN_MOVES[side]) for side in SIDE_FLAGS}
+
+
+def _reverse_mask(targets):
+    reverse = [0] * 90
+    for from_sq, mask in enumerate(targets):
+        for to_sq in iter_squares(mask):
+            reverse[to_sq] |= 1 << from_sq
+    return reverse
+
+
+ADVISOR_ATTACKERS = {side: _reverse_mask(ADVISOR_TARGETS[side]) for side in SIDE_FLAGS}
+KING_ATTACKERS = {side: _reverse_mask(KING_TARGETS[side]) for side in SIDE_FLAGS}
+PAWN_ATTACKERS = {side: _reverse_mask(PAWN_TARGETS[side]) for side in SIDE_FLAGS}
+
+
+def _rotated_bit(sq):
+    """列优先格子编号 -> 行优先占位中的位"""
+    return 1 << ((sq % 10) * 9 + sq // 10)
+
+
+ROTATED_BITS = [_rotated_bit(sq) for sq in range(90)]
+
+
+class BitBoard:
+    """
+    位棋盘局面
+    pieces[code]: 该编码棋子的位棋盘；sides[0]/sides[1]: 红/黑方占位
+    occupied: 全部占位（列优先），occupied_rotated: 全部占位（行优先）
+    squares: 90格棋子编码，用于 O(1) 查询某格棋子
+    """
+    __slots__ = ('pieces', 'sides', 'occupied', 'occupied_rotated', 'squares')
+
+    def __init__(self):
+        self.pieces = [0] * CODE_COUNT
+        self.sides = [0, 0]
+        self.occupied = 0
+        self.occupied_rotated = 0
+        self.squares = bytearray(90)
+
+    @classmethod
+    def from_squares(cls, squares):
+        """从90格棋子编码（bytes/bytearray）构建位棋盘"""
+        bitboard = cls()
+        for sq, code in enumerate(squares):
+            if code:
+                bitboard.put(sq, code)
+        return bitboard
+
+    @classmethod
+    def from_board(cls, board):
+        """从 ChessBoard 构建位棋盘"""
+        return cls.from_squares(board.squares)
+
+    @classmethod
+    def from_string(cls, board_string):
+        """从180字符棋盘字符串构建位棋盘"""
+        return cls.from_squares(decode(board_string))
+
+    def copy(self):
+        bitboard = BitBoard()
+        bitboard.pieces = list(self.pieces)
+        bitboard.sides = list(self.sides)
+        bitboard.occupied = self.occupied
+        bitboard.occupied_rotated = self.occupied_rotated
+        bitboard.squares = bytearray(self.squares)
+        return bitboard
+
+    def piece_at(self, sq):
+        return self.squares[sq]
+
+    def put(self, sq, code):
+        bit = 1 << sq
+        self.pieces[code] |= bit
+        self.sides[1 if code & BLACK_FLAG else 0] |= bit
+        self.occupied |= bit
+        self.occupied_rotated |= ROTATED_BITS[sq]
+        self.squares[sq] = code
+
+    def remove(self, sq):
+        code = self.squares[sq]
+        if code:
+            bit = 1 << sq
+            self.pieces[code] ^= bit
+            self.sides[1 if code & BLACK_FLAG else 0] ^= bit
+            self.occupied ^= bit
+            self.occupied_rotated ^= ROTATED_BITS[sq]
+            self.squares[sq] = 0
+        return code
+
+    def make_move(self, from_sq, to_sq):
+        """执行走法（不做规则校验），返回被吃棋子编码（0表示未吃子）"""
+        captured = self.remove(to_sq)
+        self.put(to_sq, self.remove(from_sq))
+        return captured
+
+    def unmake_move(self, from_sq, to_sq, captured):
+        """撤销 make_move"""
+        self.put(from_sq, self.remove(to_sq))
+        if captured:
+            self.put(to_sq, captured)
+
+    def side_occupancy(self, side):
+        return self.sides[1 if SIDE_FLAGS[side] else 0]
+
+    def pieces_of(self, kind, side):
+        return self.pieces[make_code(kind, side)]
+
+    def king_square(self, side):
+        bits = self.pieces[make_code(KING, side)]
+        return bits.bit_length() - 1 if bits else -1
+
+    def rook_attacks(self, sq):
+        """车在 sq 上的攻击范围（含第一个阻挡子，不分敌我）"""
+        x, y = divmod(sq, 10)
+        file_pattern = (self.occupied >> (10 * x)) & 0x3FF
+        rank_pattern = (self.occupied_rotated >> (9 * y)) & 0x1FF
+        return (FILE_ROOK_ATTACKS[y][file_pattern] << (10 * x)) | (RANK_ROOK_ATTACKS[x][rank_pattern] << y)
+
+    def cannon_attacks(self, sq):
+        """炮在 sq 上的吃子范围（炮架后的第一个棋子，不分敌我）"""
+        x, y = divmod(sq, 10)
+        file_pattern = (self.occupied >> (10 * x)) & 0x3FF
+        rank_pattern = (self.occupied_rotated >> (9 * y)) & 0x1FF
+        return (FILE_CANNON_ATTACKS[y][file_pattern] << (10 * x)) | (RANK_CANNON_ATTACKS[x][rank_pattern] << y)
+
+    def cannon_zone(self, sq):
+        """炮在 sq 上隔子后能控制的全部格子（空格和第一个棋子）"""
+        x, y = divmod(sq, 10)
+        file_pattern = (self.occupied >> (10 * x)) & 0x3FF
+        rank_pattern = (self.occupied_rotated >> (9 * y)) & 0x1FF
+        return (FILE_CANNON_ZONES[y][file_pattern] << (10 * x)) | (RANK_CANNON_ZONES[x][rank_pattern] << y)
+
+    def _blockable(self, table, sq):
+        blockers, masks = table[sq]
+        occupied = self.occupied
+        index = 0
+        for i, block in enumerate(blockers):
+            if (occupied >> block) & 1:
+                index |= 1 << i
+        return masks[index]
+
+    def horse_attacks(self, sq):
+        return self._blockable(HORSE_TARGETS, sq)
+
+    def elephant_attacks(self, sq, side):
+        return self._blockable(ELEPHANT_TARGETS[side], sq)
+
+    def horse_attackers(self, sq):
+        """能跳到 sq 的马所在格子的掩码（已考虑蹩马腿）"""
+        return self._blockable(HORSE_ATTACKERS, sq)
+
+    def elephant_attackers(self, sq, side):
+        """side 方能飞到 sq 的相/象所在格子的掩码（已考虑塞象眼）"""
+        return self._blockable(ELEPHANT_ATTACKERS[side], sq)
+
+    def to_string(self):
+        return encode(self.squares)
@@ -1,10 +1,81 @@
+from .pieces import (
+    NAME_TO_KIND, UNKNOWN, KING, KIND_MASK, EMPTY, CODE_NAMES, INFERRED_CODES,
+    make_code, code_side, opponent,
+)
+from .zobrist import ZOBRIST_TABLE, squares_key
+from .evaluation import PIECE_SQUARE_ROWS, squares_score
+from .codec import (
+    FORMAT_STRING, FORMAT_FEN, FORMAT_PACKED,
+    decode_squares, encode, detect_format, decode_position, encode_position,
+)
+
+
+class Piece:
+    """
+    棋子记录
+    使用 __slots__ 减少内存占用；保留 piece['name'] 这类字典式访问以兼容旧代码
+    """
+    __slots__ = ('name', 'x', 'y', 'type', 'code')
+
+    def __init__(self, name, x, y, side):
+        self.name = name
+        self.x = x
+        self.y = y
+        self.type = side
+        self.code = make_code(NAME_TO_KIND.get(name, UNKNOWN), side)
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        setattr(self, key, value)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def to_dict(self):
+        return {'name': self.name, 'x': self.x, 'y': self.y, 'type': self.type}
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
+class MoveUndo:
+    """make_move 返回的撤销记录（key、score 为走棋前的局面键和局面分）"""
+    __slots__ = ('from_sq', 'to_sq', 'moved', 'captured', 'captured_index', 'key', 'score')
+
+    def __init__(self, from_sq, to_sq, moved, captured, captured_index, key, score):
+        self.from_sq = from_sq
+        self.to_sq = to_sq
+        self.moved = moved
+        self.captured = captured
+        self.captured_index = captured_index
+        self.key = key
+        self.score = score
+
+
 class ChessBoard:
     def __init__(self, board_string=None):
-        self.board = [[None for _ in range(9)] for _ in range(10)]
+        # 90格棋子编码（sq = x * 10 + y，0表示空位）
+        self.squares = bytearray(90)
+        # 90格棋子下标（self.pieces 中的下标+1，0表示空位）
+        self.piece_index = bytearray(90)
+        # 所有棋子（被吃掉的棋子坐标为99,99）
         self.pieces = []
-        
+        # 按所属方划分的棋子列表
+        self.side_pieces = {'red': [], 'black': []}
+        # 64位 Zobrist 局面键（不含走棋方），随走棋增量更新
+        self.zobrist_key = 0
+        # 红方视角的静态局面分（子力 + 位置分，见 evaluation），随走棋增量更新
+        self.eval_score = 0
+        # 双方帅/将所在格子（-1表示已被吃掉），随走棋增量更新
+        self.king_squares = {'red': -1, 'black': -1}
+
         if board_string:
-            self.load_from_string(board_string)
+            self.load_position(board_string)
         else:
             self.init_default_board()
     
@@ -58,33 +129,69 @@ class ChessBoard:
             {'name': '车', 'x': 8, 'y': 9, 'type': 'red'}
         ]
 
-        self.pieces = black_pieces + red_pieces
+        self.load_pieces(black_pieces + red_pieces)
+
+    def load_pieces(self, pieces):
+        """
+        根据棋子列表重建棋盘
+        pieces: [{'name': str, 'x': int, 'y': int, 'type': 'red'|'black'}, ...]
+        """
+        self.pieces = [Piece(p['name'], p['x'], p['y'], p['type']) for p in pieces]
         self.update_board()
-    
+
+    def load_squares(self, squares):
+        """根据90格棋子编码（按格子升序）重建棋盘"""
+        self.pieces = [Piece(CODE_NAMES[code], sq // 10, sq % 10, code_side(code))
+                       for sq, code in enumerate(squares) if code]
+        self.update_board()
+
     def update_board(self):
-        # 清空棋盘
-        self.board = [[None for _ in range(9)] for _ in range(10)]
+        # 根据棋子列表重建格子编码和下标（仅在整体加载棋子后调用，走棋时增量更新）
+        squares = bytearray(90)
+        piece_index = bytearray(90)
+        side_pieces = {'red': [], 'black': []}
+        king_squares = {'red': -1, 'black': -1}
 
-        # 放置棋子
-        for piece in self.pieces:
-            x, y = piece['x'], piece['y']
+        for index, piece in enumerate(self.pieces):
+            side_pieces[piece.type].append(piece)
+            x, y = piece.x, piece.y
             # 检查坐标是否有效（99表示被吃掉的棋子）
             if x != 99 and y != 99:
                 # 添加边界检查防止索引越界
                 if 0 <= x < 9 and 0 <= y < 10:
-                    self.board[y][x] = piece
+                    sq = x * 10 + y
+                    squares[sq] = piece.code
+                    piece_index[sq] = index + 1
+                    if piece.code & KIND_MASK == KING:
+                        king_squares[piece.type] = sq
                 else:
                     # 记录无效坐标的警告，但不中断程序
-                    print(f"警告: 棋子 {piece['name']} 坐标超出边界: ({x}, {y})")
+                    print(f"警告: 棋子 {piece.name} 坐标超出边界: ({x}, {y})")
                     # 将无效坐标的棋子标记为被吃掉
-                    piece['x'] = 99
-                    piece['y'] = 99
-    
+                    piece.x = 99
+                    piece.y = 99
+
+        self.squares = squares
+        self.piece_index = piece_index
+        self.side_pieces = side_pieces
+        self.king_squares = king_squares
+        self.zobrist_key = squares_key(squares)
+        self.eval_score = squares_score(squares)
+
+    def copy(self):
+        """复制棋盘（棋子对象各自独立），用于在共享的缓存棋盘上走棋前先得到私有副本"""
+        board = ChessBoard.__new__(ChessBoard)
+        board.pieces = [Piece(p.name, p.x, p.y, p.type) for p in self.pieces]
+        board.update_board()
+        return board
+
     def get_piece_at(self, x, y):
         if 0 <= x < 9 and 0 <= y < 10:
-            return self.board[y][x]
+            index = self.piece_index[x * 10 + y]
+            if index:
+                return self.pieces[index - 1]
         return None
-    
+
     def move_piece(self, from_x, from_y, to_x, to_y):
         # 验证起始和目标坐标是否在有效范围内
         if not (0 <= from_x < 9 and 0 <= from_y < 10):
@@ -96,150 +203,122 @@ class ChessBoard:
         if not piece:
             return {'success': False, 'game_over': False, 'winner': None}
 
-        # 检查目标位置是否有棋子
-        target_piece = self.get_piece_at(to_x, to_y)
-        if target_piece:
-            # 吃子：将被吃棋子移出棋盘
-            target_piece['x'] = 99
-            target_piece['y'] = 99
-
-        # 移动棋子
-        piece['x'] = to_x
-        piece['y'] = to_y
-
-        self.update_board()
+        # 移动棋子（吃子时被吃棋子移出棋盘）
+        self.make_move(from_x * 10 + from_y, to_x * 10 + to_y)
 
-        # 检查游戏是否结束
+        # 检查游戏是否结束（轮到对方走棋：被将死或困毙也算结束）
         from .rules import ChessRules
-        game_status = ChessRules.check_game_over(self)
+        game_status = ChessRules.check_game_over(self, opponent(piece.type))
 
         return {
             'success': True,
             'game_over': game_status['game_over'],
-            'winner': game_status['winner']
+            'winner': game_status['winner'],
+            'reason': game_status['reason'],
+            'in_check': game_status['in_check']
         }
     
+    def make_move(self, from_sq, to_sq):
+        """
+        执行一步走法（不做规则校验），只更新起止两个格子
+        from_sq/to_sq: 格子编号 x * 10 + y
+        返回: MoveUndo 撤销记录，起始格没有棋子时返回 None
+        """
+        piece_index = self.piece_index
+        moved_index = piece_index[from_sq]
+        if not moved_index or from_sq == to_sq:
+            return None
+
+        moved = self.pieces[moved_index - 1]
+        captured_index = piece_index[to_sq]
+        captured = self.pieces[captured_index - 1] if captured_index else None
+        undo = MoveUndo(from_sq, to_sq, moved, captured, captured_index, self.zobrist_key, self.eval_score)
+
+        moved_keys = ZOBRIST_TABLE[moved.code]
+        key = self.zobrist_key ^ moved_keys[from_sq] ^ moved_keys[to_sq]
+        moved_values = PIECE_SQUARE_ROWS[moved.code]
+        score = self.eval_score + moved_values[to_sq] - moved_values[from_sq]
+        if captured:
+            # 吃子：将被吃棋子移出棋盘
+            captured.x = 99
+            captured.y = 99
+            key ^= ZOBRIST_TABLE[captured.code][to_sq]
+            score -= PIECE_SQUARE_ROWS[captured.code][to_sq]
+            if captured.code & KIND_MASK == KING:
+                self.king_squares[captured.type] = -1
+        self.zobrist_key = key
+        self.eval_score = score
+        if moved.code & KIND_MASK == KING:
+            self.king_squares[moved.type] = to_sq
+
+        moved.x, moved.y = divmod(to_sq, 10)
+        squares = self.squares
+        squares[to_sq] = moved.code
+        piece_index[to_sq] = moved_index
+        squares[from_sq] = EMPTY
+        piece_index[from_sq] = 0
+
+        return undo
+
+    def unmake_move(self, undo):
+        """撤销 make_move 执行的走法"""
+        from_sq, to_sq = undo.from_sq, undo.to_sq
+        squares = self.squares
+        piece_index = self.piece_index
+
+        moved = undo.moved
+        moved.x, moved.y = divmod(from_sq, 10)
+        squares[from_sq] = moved.code
+        piece_index[from_sq] = piece_index[to_sq]
+        if moved.code & KIND_MASK == KING:
+            self.king_squares[moved.type] = from_sq
+
+        captured = undo.captured
+        if captured:
+            captured.x, captured.y = divmod(to_sq, 10)
+            squares[to_sq] = captured.code
+            piece_index[to_sq] = undo.captured_index
+            if captured.code & KIND_MASK == KING:
+                self.king_squares[captured.type] = to_sq
+        else:
+            squares[to_sq] = EMPTY
+            piece_index[to_sq] = 0
+
+        self.zobrist_key = undo.key
+        self.eval_score = undo.score
+
     def to_string(self):
         # 将棋盘状态转换为180字符的字符串格式（与spark_chess_analysis.py兼容）
         # 9列x10行 = 90个位置，每个位置2个字符，总共180个字符
-        board_positions = ["99"] * 90  # 初始化所有位置为空（99）
-
-        # 遍历所有棋子，将其放置到对应位置
-        for piece in self.pieces:
-            x, y = piece['x'], piece['y']
-            # 只处理在棋盘上的棋子（不是被吃掉的棋子）
-            if x != 99 and y != 99 and 0 <= x < 9 and 0 <= y < 10:
-                # 计算在90个位置中的索引（列行格式）
-                pos_index = x * 10 + y
-                # 在该位置标记棋子的当前坐标
-                board_positions[pos_index] = f"{x:01d}{y:01d}"
-
-        return "".join(board_positions)
-    
-    def load_from_string(self, board_string):
-        # 从180字符的棋盘状态字符串加载棋盘（与spark_chess_analysis.py兼容）
-        if len(board_string) != 180:
-            raise ValueError("棋盘字符串长度必须为180字符")
-
-        # 验证字符串只包含数字
-        if not board_string.isdigit():
-            raise ValueError("棋盘字符串必须只包含数字")
-
-        # 解析180字符的棋盘状态
-        # 将180字符的字符串转换为90个位置的列表
-        board_positions = []
-        for i in range(0, 180, 2):
-            board_positions.append(board_string[i:i+2])
-
-        # 收集所有棋盘上的棋子位置
-        pieces_on_board = []
-        for pos_index, piece_coord in enumerate(board_positions):
-            if piece_coord != "99":
-                try:
-                    x = int(piece_coord[0])
-                    y = int(piece_coord[1])
-                    if 0 <= x < 9 and 0 <= y < 10:
-                        pieces_on_board.append((x, y))
-                except (ValueError, IndexError):
-                    continue
-
-        # 重新创建棋子列表，基于实际棋盘状态
-        self.pieces = []
+        # 位置索引为列行格式（x * 10 + y），有棋子的位置记录该棋子的坐标，空位为99
+        return encode(self.squares)
 
-        # 为每个棋盘上的位置创建棋子
-        for x, y in pieces_on_board:
-            # 根据位置推断棋子类型
-            piece_info = self._identify_piece_at_position(x, y)
-            if piece_info:
-                self.pieces.append({
-                    'name': piece_info['name'],
-                    'x': x,
-                    'y': y,
-                    'type': piece_info['type']
-                })
-                print(f"DEBUG load_from_string: 创建棋子 {piece_info['type']} {piece_info['name']} 在位置 ({x},{y})")
-            else:
-                # 如果无法根据位置推断，使用通用方法
-                # 根据y坐标判断是红方还是黑方
-                piece_type = 'black' if y <= 4 else 'red'
-                # 使用通用名称
-                piece_name = '未知'
-
-                # 尝试更精确的推断
-                if y <= 4:  # 黑方区域
-                    if y == 0:
-                        piece_name = ['车', '马', '象', '士', '将', '士', '象', '马', '车'][x] if x < 9 else '未知'
-                    elif y == 2 and (x == 1 or x == 7):
-                        piece_name = '炮'
-                    elif y == 3 and x in [0, 2, 4, 6, 8]:
-                        piece_name = '卒'
-                else:  # 红方区域
-                    if y == 9:
-                        piece_name = ['车', '马', '相', '仕', '帅', '仕', '相', '马', '车'][x] if x < 9 else '未知'
-                    elif y == 7 and (x == 1 or x == 7):
-                        piece_name = '炮'
-                    elif y == 6 and x in [0, 2, 4, 6, 8]:
-                        piece_name = '兵'
-
-                self.pieces.append({
-                    'name': piece_name,
-                    'x': x,
-                    'y': y,
-                    'type': piece_type
-                })
-                print(f"DEBUG load_from_string: 创建推断棋子 {piece_type} {piece_name} 在位置 ({x},{y})")
-
-        print(f"DEBUG load_from_string: 总共创建了{len(self.pieces)}个棋子")
-        self.update_board()
+    def to_position(self, position_format=FORMAT_STRING, side=None):
+        """按指定格式（'180'/'fen'/'packed'）输出局面，FEN 可附带走棋方"""
+        return encode_position(self.squares, position_format, side)
 
+    def to_fen(self, side=None):
+        return encode_position(self.squares, FORMAT_FEN, side)
 
+    def to_packed(self):
+        return encode_position(self.squares, FORMAT_PACKED)
 
-    def _identify_piece_at_position(self, x, y):
-        # 根据位置识别应该在该位置的棋子类型
-        # 这是基于标准中国象棋初始布局的推断
-
-        # 黑方棋子（上方，y=0-4）
-        if y == 0:  # 第0行：黑方后排
-            pieces = ['车', '马', '象', '士', '将', '士', '象', '马', '车']
-            if 0 <= x < len(pieces):
-                return {'name': pieces[x], 'type': 'black'}
-        elif y == 2:  # 第2行：黑方炮
-            if x == 1 or x == 7:
-                return {'name': '炮', 'type': 'black'}
-        elif y == 3:  # 第3行：黑方兵
-            if x in [0, 2, 4, 6, 8]:
-                return {'name': '卒', 'type': 'black'}
-
-        # 红方棋子（下方，y=5-9）
-        elif y == 6:  # 第6行：红方兵
-            if x in [0, 2, 4, 6, 8]:
-                return {'name': '兵', 'type': 'red'}
-        elif y == 7:  # 第7行：红方炮
-            if x == 1 or x == 7:
-                return {'name': '炮', 'type': 'red'}
-        elif y == 9:  # 第9行：红方后排
-            pieces = ['车', '马', '相', '仕', '帅', '仕', '相', '马', '车']
-            if 0 <= x < len(pieces):
-                return {'name': pieces[x], 'type': 'red'}
+    def load_position(self, board_string):
+        """
+        加载任意支持格式的局面（自动识别）：180字符格式、FEN、紧凑格式
+        FEN 和紧凑格式记录了棋子身份，不需要按开局布局推断
+        """
+        if detect_format(board_string) == FORMAT_STRING:
+            self.load_from_string(board_string)
+        else:
+            self.load_squares(decode_position(board_string))
 
-        return None
+    def load_from_string(self, board_string):
+        # 从180字符的棋盘状态字符串加载棋盘（与spark_chess_analysis.py兼容）
+        # 字符串只记录占位，棋子身份按标准开局布局推断，其余位置为按半场划分所属方的未知棋子
+        pieces = []
+        for sq in decode_squares(board_string):
+            code = INFERRED_CODES[sq]
+            pieces.append(Piece(CODE_NAMES[code], sq // 10, sq % 10, code_side(code)))
+        self.pieces = pieces
+        self.update_board()
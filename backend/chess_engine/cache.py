@@ -0,0 +1,168 @@
+"""
+局面缓存
+同一局面会被反复校验（同一盘棋的每次点击、不同用户的开局局面），
+这里按棋盘字符串缓存解析好的棋盘，以及按需生成的双方合法走法。
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    线程安全的定长 LRU 缓存
+    超过 maxsize 时淘汰最久未使用的条目，并统计命中/未命中/淘汰次数
+    ttl 为条目的存活秒数（None 表示不过期），过期条目在下次访问时删除并计为未命中
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, clock=time.monotonic):
+        if maxsize <= 0:
+            raise ValueError("缓存容量必须为正整数")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("缓存存活时间必须为正数")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()  # key -> (过期时间或None, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                expires_at, value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            if expires_at is not None and self._clock() >= expires_at:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        expires_at = None if self.ttl is None else self._clock() + self.ttl
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_create(self, key, factory):
+        """
+        命中时返回缓存值；未命中时调用 factory(key) 创建并缓存
+        factory 抛出的异常原样向上传递，且不会缓存任何内容
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            # 在锁外创建，避免慢操作阻塞其他请求；并发未命中时以后写入者为准
+            value = factory(key)
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'ttl': self.ttl,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+class CachedPosition:
+    """
+    缓存中的一个局面：解析好的棋盘（只读共享）和按需生成的合法走法
+    需要走棋时先调用 board.copy()，不要修改缓存中的棋盘
+    owner 为所属的 PositionCache，合法走法的命中/未命中计入其统计
+    """
+    __slots__ = ('board', '_legal_moves', '_owner')
+
+    def __init__(self, board, owner=None):
+        self.board = board
+        self._legal_moves = {}
+        self._owner = owner
+
+    def legal_moves(self, side):
+        """side 方的全部合法走法 ((from_sq, to_sq), ...)，首次访问时生成"""
+        moves = self._legal_moves.get(side)
+        if moves is None:
+            from .rules import ChessRules
+            moves = tuple(ChessRules.generate_legal_moves(self.board, side))
+            self._legal_moves[side] = moves
+            if self._owner is not None:
+                self._owner._count_move_lookup(False)
+        elif self._owner is not None:
+            self._owner._count_move_lookup(True)
+        return moves
+
+
+class PositionCache:
+    """按棋盘字符串缓存解析后的局面"""
+
+    def __init__(self, maxsize=1024):
+        self._positions = LRUCache(maxsize)
+        # 合法走法的命中/未命中统计（请求线程并发更新，与 LRUCache 的统计一样加锁）
+        self._lock = threading.Lock()
+        self.move_hits = 0
+        self.move_misses = 0
+
+    def get(self, board_string):
+        """返回 CachedPosition；棋盘字符串无效时抛出 ValueError（不缓存）"""
+        return self._positions.get_or_create(board_string, lambda key: _parse_position(key, self))
+
+    def _count_move_lookup(self, hit):
+        with self._lock:
+            if hit:
+                self.move_hits += 1
+            else:
+                self.move_misses += 1
+
+    def board(self, board_string):
+        """返回缓存中的只读棋盘"""
+        return self.get(board_string).board
+
+    def legal_moves(self, board_string, side):
+        return self.get(board_string).legal_moves(side)
+
+    def clear(self):
+        self._positions.clear()
+
+    def __len__(self):
+        return len(self._positions)
+
+    def stats(self):
+        stats = self._positions.stats()
+        with self._lock:
+            stats['legal_move_hits'] = self.move_hits
+            stats['legal_move_misses'] = self.move_misses
+        return stats
+
+
+def _parse_position(board_string, owner=None):
+    from .board import ChessBoard
+    return CachedPosition(ChessBoard(board_string), owner)
@@ -0,0 +1,394 @@
+"""
+棋盘格式编解码
+
+180字符格式：90个位置（索引 sq = x * 10 + y），每个位置2个字符，有棋子的位置记录其坐标 "xy"，空位为 "99"。
+    只记录占位，棋子身份按开局布局推断。解码时把字符串按2字节一组直接视为16位整数，
+    通过预计算的 65536 项表一次查出格子编号，不切分子串、不调用 int()；编码时按格子查预先生成的坐标串。
+FEN：象棋FEN的局面部分，10行以 '/' 分隔，第一行为 y=0（黑方底线）；大写为红方、小写为黑方，
+    K/A/B/N/R/C/P 分别为帅仕相马车炮兵（输入时也接受 H/E 表示马/相），U 表示未知棋子，数字为连续空位。
+    可带走棋方字段（w/r 为红方，b 为黑方），其余字段忽略。
+紧凑格式：12字节小端序的90位占位掩码（第 sq 位），后接每个棋子一个4位编码（按格子升序，低半字节在前），
+    编码为 (兵种 - 1) | (黑方 ? 8 : 0)；整体用不带填充的 URL 安全 base64 表示。满盘32子为28字节、38个字符。
+
+用法（在 backend 目录下）:
+    python -m chess_engine.codec              # 编解码吞吐量基准
+    python -m chess_engine.codec --count 50000
+"""
+
+import argparse
+import base64
+import binascii
+import sys
+import time
+
+from .pieces import (
+    KING, ADVISOR, ELEPHANT, HORSE, ROOK, CANNON, PAWN, UNKNOWN,
+    BLACK_FLAG, KIND_MASK, INFERRED_CODES, make_code,
+)
+
+BOARD_STRING_LENGTH = 180
+EMPTY_TOKEN = "99"
+
+# 格子 -> 两位坐标串
+SQUARE_TOKENS = [f"{sq // 10}{sq % 10}" for sq in range(90)]
+# 两位坐标串 -> 格子（只包含 00-89 中的有效坐标）
+TOKEN_SQUARES = {token: sq for sq, token in enumerate(SQUARE_TOKENS)}
+
+
+def _pair_value(token):
+    # 两个 ASCII 字符按本机字节序组成的16位整数，与 memoryview.cast('H') 的结果一致
+    return int.from_bytes(token.encode('ascii'), sys.byteorder)
+
+
+# 16位整数 -> 格子，"99" 和超出范围的坐标为 -1
+_PAIR_SQUARES = [-1] * 65536
+for _sq, _token in enumerate(SQUARE_TOKENS):
+    _PAIR_SQUARES[_pair_value(_token)] = _sq
+
+
+def check_board_string(board_string):
+    """校验180字符格式，无效时抛出 ValueError（提示与 ChessBoard 一致）"""
+    if len(board_string) != BOARD_STRING_LENGTH:
+        raise ValueError("棋盘字符串长度必须为180字符")
+    if not board_string.isdigit():
+        raise ValueError("棋盘字符串必须只包含数字")
+
+
+def _pairs(data):
+    return memoryview(data).cast('H')
+
+
+def decode_squares(board_string):
+    """
+    解析出字符串中记录的全部棋子坐标（按在字符串中出现的顺序）
+
+    Returns:
+        list: [sq, ...]，sq = x * 10 + y
+    """
+    check_board_string(board_string)
+    lookup = _PAIR_SQUARES
+    return [sq for sq in map(lookup.__getitem__, _pairs(board_string.encode('ascii'))) if sq >= 0]
+
+
+def _codes_from_pairs(pairs):
+    lookup = _PAIR_SQUARES
+    inferred = INFERRED_CODES
+    squares = bytearray(90)
+    for sq in map(lookup.__getitem__, pairs):
+        if sq >= 0:
+            squares[sq] = inferred[sq]
+    return squares
+
+
+def decode(board_string):
+    """
+    解码为90格棋子编码（棋子身份按开局布局推断，与 ChessBoard 加载结果一致）
+
+    Returns:
+        bytearray: 长度90，0表示空位
+    """
+    check_board_string(board_string)
+    return _codes_from_pairs(_pairs(board_string.encode('ascii')))
+
+
+def decode_many(board_strings):
+    """
+    批量解码（离线任务用）：所有字符串拼接后只做一次编码和类型转换，再按90个16位整数切片
+
+    Returns:
+        list: [bytearray(90), ...]，与输入顺序一致
+    """
+    board_strings = list(board_strings)
+    for board_string in board_strings:
+        if len(board_string) != BOARD_STRING_LENGTH:
+            raise ValueError("棋盘字符串长度必须为180字符")
+    joined = "".join(board_strings)
+    if joined and not joined.isdigit():
+        raise ValueError("棋盘字符串必须只包含数字")
+
+    pairs = _pairs(joined.encode('ascii'))
+    return [_codes_from_pairs(pairs[start:start + 90]) for start in range(0, len(pairs), 90)]
+
+
+def encode(squares):
+    """把90格棋子编码（或任意按格子排列的占位序列）编码为180字符格式"""
+    return "".join([token if code else EMPTY_TOKEN for token, code in zip(SQUARE_TOKENS, squares)])
+
+
+# 左右镜像（x -> 8 - x）后的格子
+MIRROR_SQUARES = [(8 - sq // 10) * 10 + sq % 10 for sq in range(90)]
+
+
+def _occupancy_tokens(occupied, square_map=None):
+    tokens = [EMPTY_TOKEN] * 90
+    for sq in occupied:
+        if square_map is not None:
+            sq = square_map[sq]
+        tokens[sq] = SQUARE_TOKENS[sq]
+    return "".join(tokens)
+
+
+def mirror_board_string(board_string):
+    """180字符格式的左右镜像（x -> 8 - x），格式无效时抛出 ValueError"""
+    return _occupancy_tokens(decode_squares(board_string), MIRROR_SQUARES)
+
+
+def board_string_orientations(board_string):
+    """180字符格式按占位重新编码后的 (原方向, 左右镜像)，格式无效时抛出 ValueError"""
+    occupied = decode_squares(board_string)
+    return _occupancy_tokens(occupied), _occupancy_tokens(occupied, MIRROR_SQUARES)
+
+
+def canonical_board_string(board_string):
+    """
+    左右镜像的两个局面规范化为同一个180字符串：取两者中较小的一个
+    （按占位重新编码，因此等价的非规范写法也会得到相同结果）
+
+    Returns:
+        tuple: (规范化的棋盘字符串, 是否经过镜像)；格式无效时抛出 ValueError
+    """
+    normal, mirror = board_string_orientations(board_string)
+    return (mirror, True) if mirror < normal else (normal, False)
+
+
+def mirror_move(move):
+    """'xyxy' 走法左右镜像；不是4位数字时原样返回"""
+    if len(move) != 4 or not move.isdigit() or move[0] == '9' or move[2] == '9':
+        return move
+    return f"{8 - int(move[0])}{move[1]}{8 - int(move[2])}{move[3]}"
+
+
+FORMAT_STRING = '180'
+FORMAT_FEN = 'fen'
+FORMAT_PACKED = 'packed'
+
+# FEN 字母 -> 兵种
+FEN_KINDS = {
+    'K': KING, 'A': ADVISOR, 'B': ELEPHANT, 'N': HORSE,
+    'R': ROOK, 'C': CANNON, 'P': PAWN, 'U': UNKNOWN,
+    'H': HORSE, 'E': ELEPHANT,
+}
+# 棋子编码 -> FEN 字母
+_CODE_LETTERS = {}
+for _letter, _kind in FEN_KINDS.items():
+    if _letter not in ('H', 'E'):
+        _CODE_LETTERS[make_code(_kind, 'red')] = _letter
+        _CODE_LETTERS[make_code(_kind, 'black')] = _letter.lower()
+
+_FEN_SIDES = {'w': 'red', 'r': 'red', 'b': 'black'}
+
+
+def fen_to_squares(fen):
+    """
+    解析FEN
+
+    Returns:
+        tuple: (bytearray(90) 棋子编码, 走棋方 'red'/'black'，未给出时为 None)
+    """
+    fields = fen.split()
+    if not fields:
+        raise ValueError("FEN不能为空")
+    ranks = fields[0].split('/')
+    if len(ranks) != 10:
+        raise ValueError("FEN必须包含10行")
+
+    squares = bytearray(90)
+    for y, rank in enumerate(ranks):
+        x = 0
+        for char in rank:
+            if char.isdigit():
+                x += int(char)
+                continue
+            kind = FEN_KINDS.get(char.upper())
+            if kind is None:
+                raise ValueError(f"FEN包含无效字符: {char}")
+            if x >= 9:
+                raise ValueError(f"FEN第{y + 1}行必须正好包含9列")
+            squares[x * 10 + y] = make_code(kind, 'red' if char.isupper() else 'black')
+            x += 1
+        if x != 9:
+            raise ValueError(f"FEN第{y + 1}行必须正好包含9列")
+
+    side = None
+    if len(fields) > 1:
+        side = _FEN_SIDES.get(fields[1].lower())
+        if side is None:
+            raise ValueError(f"FEN走棋方无效: {fields[1]}")
+    return squares, side
+
+
+def squares_to_fen(squares, side=None):
+    """把90格棋子编码编码为FEN，side 给出时附加走棋方字段"""
+    ranks = []
+    for y in range(10):
+        rank = []
+        empty = 0
+        for x in range(9):
+            code = squares[x * 10 + y]
+            if code:
+                if empty:
+                    rank.append(str(empty))
+                    empty = 0
+                rank.append(_CODE_LETTERS[code])
+            else:
+                empty += 1
+        if empty:
+            rank.append(str(empty))
+        ranks.append("".join(rank))
+    fen = "/".join(ranks)
+    if side is not None:
+        fen += ' w' if side == 'red' else ' b'
+    return fen
+
+
+def fen_side(fen):
+    """FEN中的走棋方，未给出时为 None"""
+    fields = fen.split()
+    return _FEN_SIDES.get(fields[1].lower()) if len(fields) > 1 else None
+
+
+_OCCUPANCY_BYTES = 12
+
+
+def pack(squares):
+    """把90格棋子编码打包为紧凑二进制（占位掩码 + 每子4位）"""
+    occupancy = 0
+    nibbles = []
+    for sq, code in enumerate(squares):
+        if code:
+            occupancy |= 1 << sq
+            nibbles.append(((code & KIND_MASK) - 1) | (8 if code & BLACK_FLAG else 0))
+    if len(nibbles) % 2:
+        nibbles.append(0)
+    data = bytearray(occupancy.to_bytes(_OCCUPANCY_BYTES, 'little'))
+    data.extend(nibbles[i] | (nibbles[i + 1] << 4) for i in range(0, len(nibbles), 2))
+    return bytes(data)
+
+
+def unpack(data):
+    """解析 pack 生成的二进制，返回 bytearray(90) 棋子编码"""
+    if len(data) < _OCCUPANCY_BYTES:
+        raise ValueError("紧凑格式数据过短")
+    occupancy = int.from_bytes(data[:_OCCUPANCY_BYTES], 'little')
+    if occupancy >> 90:
+        raise ValueError("紧凑格式占位掩码超出90格")
+    count = bin(occupancy).count('1')
+    if len(data) != _OCCUPANCY_BYTES + (count + 1) // 2:
+        raise ValueError("紧凑格式数据长度与棋子数不符")
+
+    squares = bytearray(90)
+    body = data[_OCCUPANCY_BYTES:]
+    index = 0
+    while occupancy:
+        low = occupancy & -occupancy
+        nibble = (body[index >> 1] >> (4 * (index & 1))) & 0xF
+        squares[low.bit_length() - 1] = ((nibble & 7) + 1) | (BLACK_FLAG if nibble & 8 else 0)
+        occupancy ^= low
+        index += 1
+    if count % 2 and body[-1] >> 4:
+        raise ValueError("紧凑格式填充位必须为0")
+    return squares
+
+
+def encode_packed(squares):
+    """紧凑格式的 base64 文本（URL安全，无填充）"""
+    return base64.urlsafe_b64encode(pack(squares)).rstrip(b'=').decode('ascii')
+
+
+def decode_packed(text):
+    try:
+        data = base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+    except (binascii.Error, ValueError):
+        raise ValueError("紧凑格式不是有效的base64")
+    return unpack(data)
+
+
+def detect_format(board_string):
+    """
+    判断棋盘字符串的格式：180位数字为 '180'，含 '/' 为 'fen'，其余按紧凑格式处理
+    """
+    if len(board_string) == BOARD_STRING_LENGTH and board_string.isdigit():
+        return FORMAT_STRING
+    if '/' in board_string:
+        return FORMAT_FEN
+    return FORMAT_PACKED
+
+
+def decode_position(board_string):
+    """按自动识别的格式解码为 bytearray(90) 棋子编码，无效时抛出 ValueError"""
+    if not isinstance(board_string, str):
+        raise ValueError("棋盘状态必须是字符串")
+    position_format = detect_format(board_string)
+    if position_format == FORMAT_STRING:
+        return decode(board_string)
+    if position_format == FORMAT_FEN:
+        return fen_to_squares(board_string)[0]
+    if not board_string:
+        raise ValueError("棋盘状态不能为空")
+    return decode_packed(board_string)
+
+
+def encode_position(squares, position_format=FORMAT_STRING, side=None):
+    """按指定格式编码90格棋子编码"""
+    if position_format == FORMAT_FEN:
+        return squares_to_fen(squares, side)
+    if position_format == FORMAT_PACKED:
+        return encode_packed(squares)
+    return encode(squares)
+
+
+def _legacy_decode(board_string):
+    # 基准对照：逐格切片并调用 int() 的旧写法
+    squares = bytearray(90)
+    for i in range(0, BOARD_STRING_LENGTH, 2):
+        token = board_string[i:i + 2]
+        if token != EMPTY_TOKEN:
+            x = int(token[0])
+            y = int(token[1])
+            if 0 <= x < 9 and 0 <= y < 10:
+                squares[x * 10 + y] = INFERRED_CODES[x * 10 + y]
+    return squares
+
+
+def _legacy_encode(squares):
+    return "".join([f"{sq // 10}{sq % 10}" if code else EMPTY_TOKEN for sq, code in enumerate(squares)])
+
+
+def benchmark(count=20000):
+    """
+    编解码吞吐量基准
+
+    Returns:
+        dict: 名称 -> 每秒处理的棋盘数
+    """
+    from .board import ChessBoard
+    board_string = ChessBoard().to_string()
+    squares = decode(board_string)
+    strings = [board_string] * count
+
+    def rate(func):
+        start = time.perf_counter()
+        func()
+        return count / (time.perf_counter() - start)
+
+    return {
+        'legacy_decode': rate(lambda: [_legacy_decode(s) for s in strings]),
+        'decode': rate(lambda: [decode(s) for s in strings]),
+        'decode_many': rate(lambda: decode_many(strings)),
+        'legacy_encode': rate(lambda: [_legacy_encode(squares) for _ in strings]),
+        'encode': rate(lambda: [encode(squares) for _ in strings]),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='180字符棋盘格式编解码基准')
+    parser.add_argument('--count', type=int, default=20000, help='每项测试的棋盘数（默认20000）')
+    args = parser.parse_args(argv)
+
+    for name, boards_per_second in benchmark(args.count).items():
+        print(f"{name:<14} {boards_per_second:>12.0f} 棋盘/秒")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,262 @@
+"""
+静态局面评估（子力价值 + 位置分）
+每个棋子编码在每个格子上的分值预先算成一张 32×90 的表（红方为正、黑方为负），局面分是各棋子分值之和。
+ChessBoard 在 make_move/unmake_move 中按进出的棋子增量更新 eval_score，搜索时不需要遍历棋子；
+批量评估把棋盘转成 (N, 90) 的棋子编码数组，一次索引求和即可给成千上万个局面打分。
+
+位置分按红方视角给出（第0行是对方底线，第9行是己方底线），只写左半边（x=0..4），右半边左右镜像，
+因此左右镜像的局面分数相同（与频率索引的镜像规范化一致）；黑方使用上下翻转后的表。
+
+用法（在 backend 目录下）:
+    python -m chess_engine.evaluation                                   # 随机局面上比较逐个评估与批量评估的速度
+    python -m chess_engine.evaluation ../data/move_frequency_analysis.json   # 给频率数据中的全部局面打分
+"""
+
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+
+from .pieces import (
+    KING, ADVISOR, ELEPHANT, HORSE, ROOK, CANNON, PAWN, CODE_COUNT, INFERRED_CODES, make_code,
+)
+
+# 子力价值（兵的价值只是未过河时的，过河后的加分在位置分中）
+MATERIAL_VALUES = {
+    KING: 0, ADVISOR: 120, ELEPHANT: 120, HORSE: 270, ROOK: 600, CANNON: 285, PAWN: 30,
+}
+
+# 红方视角的位置分（10行 × 左半边5列，行号即 y）
+_HALF_TABLES = {
+    KING: [
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, -10, -8],
+        [0, 0, 0, -6, -2],
+        [0, 0, 0, -2, 0],
+    ],
+    ADVISOR: [
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 3],
+        [0, 0, 0, 0, 0],
+    ],
+    ELEPHANT: [
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+        [0, 0, -2, 0, 0],
+        [0, 0, 0, 0, 0],
+        [-1, 0, 0, 0, 3],
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+    ],
+    HORSE: [
+        [4, 8, 16, 12, 4],
+        [4, 10, 28, 16, 8],
+        [12, 14, 16, 20, 18],
+        [8, 24, 18, 24, 20],
+        [6, 16, 14, 18, 16],
+        [4, 12, 16, 14, 12],
+        [2, 6, 8, 6, 10],
+        [4, 2, 8, 8, 4],
+        [0, 2, 4, 4, -2],
+        [0, -4, 0, 0, 0],
+    ],
+    ROOK: [
+        [6, 8, 7, 13, 14],
+        [6, 12, 9, 16, 33],
+        [6, 8, 7, 14, 16],
+        [6, 13, 13, 16, 16],
+        [8, 11, 11, 14, 15],
+        [8, 12, 12, 14, 15],
+        [4, 9, 4, 12, 14],
+        [-2, 8, 4, 12, 12],
+        [5, 8, 6, 12, 0],
+        [-6, 6, 4, 12, 0],
+    ],
+    CANNON: [
+        [6, 4, 0, -10, -12],
+        [2, 2, 0, -4, -14],
+        [2, 2, 0, -10, -8],
+        [0, 0, -2, 4, 10],
+        [0, 0, 0, 2, 8],
+        [-2, 0, 4, 2, 6],
+        [0, 0, 0, 2, 4],
+        [4, 0, 8, 6, 10],
+        [0, 2, 4, 6, 6],
+        [0, 0, 2, 6, 6],
+    ],
+    PAWN: [
+        [0, 0, 0, 5, 10],
+        [20, 30, 45, 55, 60],
+        [20, 30, 40, 50, 55],
+        [15, 25, 35, 40, 45],
+        [10, 18, 22, 35, 40],
+        [0, 0, -2, 0, 7],
+        [0, 0, -2, 0, 7],
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+    ],
+}
+
+
+def _build_table():
+    """32×90 的分值表：table[code][sq]，sq = x * 10 + y，红方棋子为正、黑方棋子为负（空位和未知棋子为0）"""
+    table = np.zeros((CODE_COUNT, 90), dtype=np.int32)
+    for kind, half in _HALF_TABLES.items():
+        half = np.array(half, dtype=np.int32)                          # [y, x]，x = 0..4
+        rows = np.concatenate([half, half[:, 3::-1]], axis=1)          # [y, x]，x = 0..8，左右对称
+        red = rows + MATERIAL_VALUES[kind]
+        table[make_code(kind, 'red')] = red.T.reshape(90)              # [x, y] 展平后下标即 sq
+        table[make_code(kind, 'black')] = -red[::-1].T.reshape(90)     # 黑方从另一侧看，上下翻转
+    return table
+
+
+PIECE_SQUARE_TABLE = _build_table()
+PIECE_SQUARE_TABLE.setflags(write=False)
+# 同一张表的嵌套列表形式：走棋时逐个取值，Python 列表比 NumPy 标量索引快得多
+PIECE_SQUARE_ROWS = PIECE_SQUARE_TABLE.tolist()
+
+_INFERRED = np.array(INFERRED_CODES, dtype=np.uint8)
+_SQUARE_INDEX = np.arange(90)
+
+
+def squares_score(squares):
+    """90格棋子编码的局面分（红方视角），ChessBoard 整体加载棋子时调用"""
+    rows = PIECE_SQUARE_ROWS
+    return sum(rows[code][sq] for sq, code in enumerate(squares) if code)
+
+
+def evaluate_board(board, side='red'):
+    """side 方视角的局面分（读取 ChessBoard 增量维护的 eval_score）"""
+    return board.eval_score if side == 'red' else -board.eval_score
+
+
+def board_string_codes(board_strings):
+    """
+    把一组180字符棋盘状态向量化地解码为 (N, 90) 的棋子编码数组（棋子身份按开局布局推断，与 codec.decode 一致）
+    格式无效时抛出 ValueError
+    """
+    board_strings = list(board_strings)
+    for board_string in board_strings:
+        if len(board_string) != 180:
+            raise ValueError("棋盘字符串长度必须为180字符")
+    joined = "".join(board_strings)
+    if joined and not joined.isdigit():
+        raise ValueError("棋盘字符串必须只包含数字")
+
+    digits = (np.frombuffer(joined.encode('ascii'), dtype=np.uint8) - 48).reshape(len(board_strings), 90, 2)
+    xs = digits[:, :, 0].astype(np.intp)
+    ys = digits[:, :, 1].astype(np.intp)
+    # "99" 表示空位；超出范围的坐标同样忽略
+    rows, cols = np.nonzero((xs < 9) & (ys < 10))
+    squares = xs[rows, cols] * 10 + ys[rows, cols]
+    codes = np.zeros((len(board_strings), 90), dtype=np.uint8)
+    codes[rows, squares] = _INFERRED[squares]
+    return codes
+
+
+def evaluate_codes(codes):
+    """(N, 90) 棋子编码数组的局面分（红方视角），返回长度 N 的 int64 数组"""
+    codes = np.asarray(codes, dtype=np.intp)
+    return PIECE_SQUARE_TABLE[codes, _SQUARE_INDEX].sum(axis=1, dtype=np.int64)
+
+
+def evaluate_many(board_strings, side='red'):
+    """批量评估180字符棋盘状态，返回 side 方视角的分数数组（与逐个 ChessBoard(s).eval_score 一致）"""
+    scores = evaluate_codes(board_string_codes(board_strings))
+    return scores if side == 'red' else -scores
+
+
+def rank_moves(board, side, moves):
+    """
+    按走后的静态评估给走法排序（在传入的棋盘上 make_move/unmake_move，结束后棋盘不变）
+
+    Returns:
+        list: [(side 方视角的分数, (from_sq, to_sq)), ...]，分数降序，同分时保持原顺序
+    """
+    scored = []
+    for move in moves:
+        undo = board.make_move(*move)
+        scored.append((evaluate_board(board, side), move))
+        board.unmake_move(undo)
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return scored
+
+
+def _random_positions(count, seed=0, max_plies=60):
+    """从开局随机走若干步得到的局面（基准测试用）"""
+    from .board import ChessBoard
+    from .rules import ChessRules
+
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = ChessBoard()
+        side = 'red'
+        for _ in range(rng.randrange(max_plies)):
+            moves = ChessRules.generate_legal_moves(board, side)
+            if not moves:
+                break
+            board.make_move(*rng.choice(moves))
+            side = 'black' if side == 'red' else 'red'
+        positions.append(board.to_string())
+    return positions
+
+
+def main(argv=None):
+    from .board import ChessBoard
+
+    parser = argparse.ArgumentParser(description='局面评估基准：逐个评估与批量评估')
+    parser.add_argument('frequency_path', nargs='?', help='频率数据JSON，给出时评估其中的全部局面')
+    parser.add_argument('--count', type=int, default=2000, help='未给出频率数据时随机生成的局面数（默认2000）')
+    args = parser.parse_args(argv)
+
+    if args.frequency_path:
+        from .frequency_snapshot import iter_frequency_entries
+        with open(args.frequency_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        positions = list(dict.fromkeys(
+            board_state for board_state, _, _, _ in iter_frequency_entries(data)
+            if len(board_state) == 180 and board_state.isdigit()))
+    else:
+        positions = _random_positions(args.count)
+
+    start = time.perf_counter()
+    single = [ChessBoard(board_state).eval_score for board_state in positions]
+    single_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = evaluate_many(positions)
+    batch_seconds = time.perf_counter() - start
+
+    if batch.tolist() != single:
+        print("批量评估与逐个评估的结果不一致")
+        return 1
+    print(f"{len(positions)} 个局面")
+    print(f"逐个构建棋盘评估 {single_seconds:.3f}s（{len(positions) / single_seconds:.0f} 局面/s）")
+    print(f"批量评估         {batch_seconds:.3f}s（{len(positions) / batch_seconds:.0f} 局面/s）")
+    if len(batch):
+        print(f"红方视角分数: 平均 {batch.mean():.1f}，最低 {batch.min()}，最高 {batch.max()}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
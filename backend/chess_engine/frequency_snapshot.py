@@ -0,0 +1,561 @@
+"""
+走法频率索引
+建索引时把每个局面的走法记录按走棋方拆开，并丢弃在该局面下不合法的走法，请求时只需切片，不再构建棋盘校验。
+
+FrequencyIndex 是解析JSON得到的内存索引；FrequencySnapshot 是离线转换出的二进制快照，
+引擎启动时直接 mmap 打开，不再解析JSON，查询时对排好序的局面键做二分查找。
+多个工作进程打开同一个文件时，页面由操作系统页缓存共享。两者接口一致。
+
+左右镜像的局面只存一份：建索引时局面规范化为 codec.canonical_board_string 的结果（走法随之镜像），
+查询时先规范化，取出的走法再镜像回查询局面的方向。items()/side_states() 只产生规范化的局面。
+
+快照文件布局（全部小端序）:
+    文件头    magic(4s) version(I) 局面数(I) 记录数(I) 丢弃的记录数(I)
+    局面键    u64 * 局面数，升序（Zobrist 局面键，见 zobrist.squares_key）
+    局面表    每个局面 占位掩码(12s) 首条记录下标(I) 红方记录数(I) 黑方记录数(I) 有记录的走棋方(B，位0红位1黑)
+    记录表    每条记录 走法(4s) 走棋方(B，0红1黑) 频率(I)；同一局面内先红方后黑方，各自按频率降序
+局面和走法都是规范化方向的。
+
+用法（在 backend 目录下）:
+    python -m chess_engine.frequency_snapshot ../data/move_frequency_analysis.json
+    python -m chess_engine.frequency_snapshot input.json -o output.bin
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+from bisect import bisect_left
+
+from .codec import canonical_board_string, decode, encode, mirror_move
+from .zobrist import squares_key
+
+MAGIC = b'XQFS'
+VERSION = 3
+
+_HEADER = struct.Struct('<4sIIII')
+_KEY = struct.Struct('<Q')
+_POSITION = struct.Struct('<12sIIIB')
+_RECORD = struct.Struct('<4sBI')
+
+SIDES = ('red', 'black')
+_PLAYER_CODES = {'red': 0, 'black': 1}
+
+
+def snapshot_path_for(json_path):
+    """JSON 数据文件对应的默认快照路径（同目录、同名、扩展名 .bin）"""
+    return os.path.splitext(json_path)[0] + '.bin'
+
+
+def iter_frequency_entries(frequency_data):
+    """
+    遍历频率数据中的 (棋盘状态, 走棋方, 走法, 频率)
+    兼容两种JSON结构：[{'board', 'player', 'move', 'frequency'}, ...] 和 {棋盘状态: [{'player', 'move', 'frequency'}, ...]}
+    """
+    if isinstance(frequency_data, dict):
+        for board_state, moves in frequency_data.items():
+            for move in moves:
+                yield board_state, move.get('player', ''), move.get('move', ''), move.get('frequency', 0)
+    else:
+        for entry in frequency_data:
+            yield entry.get('board', ''), entry.get('player', ''), entry.get('move', ''), entry.get('frequency', 0)
+
+
+def legal_moves_by_side(board_state, moves):
+    """
+    把一个局面的走法记录按走棋方拆分，并丢弃在该局面下不合法的走法（与逐条 validate_move_with_reason 的结果一致）
+
+    Args:
+        board_state: 180字符棋盘状态
+        moves: [{'player', 'move', 'frequency'}, ...]
+
+    Returns:
+        dict: {走棋方: [记录, ...]}，只包含有记录的走棋方（全部不合法时列表为空），保持输入顺序
+    """
+    from .board import ChessBoard
+    from .rules import ChessRules
+
+    by_side = {}
+    for move in moves:
+        if move['player'] in _PLAYER_CODES:
+            by_side.setdefault(move['player'], []).append(move)
+    try:
+        board = ChessBoard(board_state)
+    except ValueError:
+        return {side: [] for side in by_side}
+
+    result = {}
+    for side, records in by_side.items():
+        legal = {f"{f // 10}{f % 10}{t // 10}{t % 10}" for f, t in ChessRules.generate_legal_moves(board, side)}
+        result[side] = [move for move in records if move['move'] in legal]
+    return result
+
+
+def _canonical(board_state):
+    """(规范化的局面, 是否经过镜像)；格式无效的局面原样返回"""
+    try:
+        return canonical_board_string(board_state)
+    except (AttributeError, TypeError, ValueError):
+        return board_state, False
+
+
+def _oriented(records, mirrored):
+    """把规范化方向的走法记录转换回查询局面的方向"""
+    if not mirrored or records is None:
+        return records
+    return [{'player': record['player'], 'move': mirror_move(record['move']), 'frequency': record['frequency']}
+            for record in records]
+
+
+def _merge_sides(sides):
+    # 双方记录合并为一个按频率降序的列表（频率相同时红方在前）
+    merged = sides.get('red', []) + sides.get('black', [])
+    merged.sort(key=lambda move: move['frequency'], reverse=True)
+    return merged
+
+
+class FrequencyIndex:
+    """
+    内存中的频率索引（由JSON数据构建）
+    接口与 {棋盘状态: [{'player', 'move', 'frequency'}, ...]} 字典一致（支持 in、[]、get、len、items），
+    另外提供 get_side / side_states 按走棋方取预先校验过的走法。
+
+    指定 base（另一个索引或 FrequencySnapshot）时作为叠加层：本层没有的局面从 base 中查找，
+    merge() 只把增量涉及的局面写入本层，不复制 base
+    """
+
+    def __init__(self, base=None):
+        self.base = base
+        self._positions = {}  # board_state -> {走棋方: [记录, ...]}
+        self._new_positions = 0  # 本层中 base 没有的局面数
+        self.record_count = base.record_count if base is not None else 0
+        self.dropped_count = base.dropped_count if base is not None else 0
+
+    @classmethod
+    def from_entries(cls, frequency_data, progress=None):
+        """
+        根据JSON数据构建索引
+        progress(fraction) 可选，按局面数报告进度（0-1）
+        """
+        grouped = _group_entries(frequency_data)
+        index = cls()
+        total = len(grouped)
+        for count, (board_state, moves) in enumerate(grouped.items()):
+            if progress and count % 10000 == 0:
+                progress(count / max(total, 1))
+            moves.sort(key=lambda move: move['frequency'], reverse=True)
+            sides = legal_moves_by_side(board_state, moves)
+            kept = sum(len(records) for records in sides.values())
+            index._positions[board_state] = sides
+            index._new_positions += 1
+            index.record_count += kept
+            index.dropped_count += len(moves) - kept
+        return index
+
+    def merge(self, frequency_data):
+        """
+        把增量频率数据合并进索引：已有走法累加频率，新走法校验合法性后加入
+        每个局面构建好新的列表后整体替换，并发的读取方看到的要么是旧列表，要么是新列表（调用方需串行化 merge）
+
+        Returns:
+            dict: {'positions': 涉及的局面数, 'new_positions', 'records': 新增走法数, 'dropped'}
+        """
+        stats = {'positions': 0, 'new_positions': 0, 'records': 0, 'dropped': 0}
+        for board_state, moves in _group_entries(frequency_data).items():
+            current = self._sides(board_state)
+            if current is None:
+                stats['new_positions'] += 1
+                current = {}
+
+            totals = {side: {record['move']: record['frequency'] for record in records}
+                      for side, records in current.items()}
+            fresh = []
+            for move in moves:
+                known = totals.get(move['player'])
+                if known is not None and move['move'] in known:
+                    known[move['move']] += move['frequency']
+                else:
+                    fresh.append(move)
+            legal = legal_moves_by_side(board_state, fresh) if fresh else {}
+            stats['dropped'] += len(fresh) - sum(len(records) for records in legal.values())
+            for side, records in legal.items():
+                side_totals = totals.setdefault(side, {})
+                for record in records:
+                    if record['move'] not in side_totals:
+                        stats['records'] += 1
+                    side_totals[record['move']] = side_totals.get(record['move'], 0) + record['frequency']
+
+            sides = {}
+            for side, side_totals in totals.items():
+                records = [{'player': side, 'move': move, 'frequency': frequency}
+                           for move, frequency in side_totals.items()]
+                records.sort(key=lambda record: record['frequency'], reverse=True)
+                sides[side] = records
+            if board_state not in self._positions and (self.base is None or board_state not in self.base):
+                self._new_positions += 1
+            self._positions[board_state] = sides
+            stats['positions'] += 1
+
+        self.record_count += stats['records']
+        self.dropped_count += stats['dropped']
+        return stats
+
+    def _sides(self, board_state):
+        # board_state 已规范化
+        sides = self._positions.get(board_state)
+        if sides is None and self.base is not None and board_state in self.base:
+            sides = {}
+            for side in SIDES:
+                records = self.base.get_side(board_state, side)
+                if records is not None:
+                    sides[side] = records
+        return sides
+
+    def get_side(self, board_state, player):
+        """该局面下 player 方的合法走法记录（按频率降序）；局面不存在或该方没有记录时为 None"""
+        key, mirrored = _canonical(board_state)
+        sides = self._positions.get(key)
+        if sides is None:
+            return _oriented(self.base.get_side(key, player), mirrored) if self.base is not None else None
+        return _oriented(sides.get(player), mirrored)
+
+    def side_states(self, player):
+        """player 方有合法走法记录的全部局面"""
+        states = [board_state for board_state, sides in self._positions.items() if sides.get(player)]
+        if self.base is not None:
+            states.extend(board_state for board_state in self.base.side_states(player)
+                          if board_state not in self._positions)
+        return states
+
+    def get(self, board_state, default=None):
+        key, mirrored = _canonical(board_state)
+        sides = self._sides(key)
+        return _oriented(_merge_sides(sides), mirrored) if sides is not None else default
+
+    def __getitem__(self, board_state):
+        key, mirrored = _canonical(board_state)
+        sides = self._sides(key)
+        if sides is None:
+            raise KeyError(board_state)
+        return _oriented(_merge_sides(sides), mirrored)
+
+    def __contains__(self, board_state):
+        key, _ = _canonical(board_state)
+        return key in self._positions or (self.base is not None and key in self.base)
+
+    def __len__(self):
+        if self.base is None:
+            return len(self._positions)
+        return len(self.base) + self._new_positions
+
+    def items(self):
+        for board_state, sides in self._positions.items():
+            yield board_state, _merge_sides(sides)
+        if self.base is not None:
+            for board_state, moves in self.base.items():
+                if board_state not in self._positions:
+                    yield board_state, moves
+
+
+def _group_entries(frequency_data):
+    """按规范化局面分组，镜像局面的走法随之镜像，同一走法的频率累加"""
+    grouped = {}
+    for board_state, player, move, frequency in iter_frequency_entries(frequency_data):
+        key, mirrored = _canonical(board_state)
+        if mirrored and isinstance(move, str):
+            move = mirror_move(move)
+        moves = grouped.setdefault(key, {})
+        moves[(player, move)] = moves.get((player, move), 0) + frequency
+    return {key: [{'player': player, 'move': move, 'frequency': frequency}
+                  for (player, move), frequency in moves.items()]
+            for key, moves in grouped.items()}
+
+
+def _position_of(board_state):
+    """180字符棋盘 -> (局面键, 占位掩码)，格式无效时抛出 ValueError"""
+    squares = decode(board_state)
+    occupancy = 0
+    for sq, code in enumerate(squares):
+        if code:
+            occupancy |= 1 << sq
+    return squares_key(squares), occupancy
+
+
+def _occupancy_string(occupancy):
+    return encode([(occupancy >> sq) & 1 for sq in range(90)])
+
+
+def write_snapshot(frequency_data, output_path):
+    """
+    把频率数据写成快照文件（先写临时文件再原子替换，读取方不会看到写了一半的文件）
+    棋盘状态无效、走棋方或走法格式无效的记录跳过；在局面下不合法的走法丢弃
+
+    Returns:
+        dict: {'positions', 'records', 'skipped', 'dropped'}
+    """
+    positions = {}  # 局面键 -> [占位掩码, {(走棋方, 走法): 频率}]（规范化方向）
+    skipped = 0
+    for board_state, player, move, frequency in iter_frequency_entries(frequency_data):
+        if player not in _PLAYER_CODES or not isinstance(move, str) or len(move.encode('ascii', 'replace')) != 4:
+            skipped += 1
+            continue
+        try:
+            board_state, mirrored = canonical_board_string(board_state)
+            key, occupancy = _position_of(board_state)
+        except (AttributeError, TypeError, ValueError):
+            skipped += 1
+            continue
+        if mirrored:
+            move = mirror_move(move)
+
+        entry = positions.get(key)
+        if entry is None:
+            entry = positions[key] = [occupancy, {}]
+        elif entry[0] != occupancy:
+            raise ValueError(f"局面键冲突: {key:016x}")
+        entry[1][(player, move)] = entry[1].get((player, move), 0) + int(frequency)
+
+    keys = sorted(positions)
+    tables = []
+    dropped = 0
+    for key in keys:
+        occupancy, totals = positions[key]
+        moves = [{'player': player, 'move': move, 'frequency': frequency}
+                 for (player, move), frequency in totals.items()]
+        # 与 JSON 加载方式一致：同一局面内按频率降序（频率相同保持原顺序）
+        moves.sort(key=lambda move: move['frequency'], reverse=True)
+        sides = legal_moves_by_side(_occupancy_string(occupancy), moves)
+        dropped += len(moves) - sum(len(records) for records in sides.values())
+        tables.append((occupancy, sides))
+    record_count = sum(len(records) for _, sides in tables for records in sides.values())
+
+    temp_path = output_path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(keys), record_count, dropped))
+        for key in keys:
+            f.write(_KEY.pack(key))
+        first = 0
+        for occupancy, sides in tables:
+            red = sides.get('red', [])
+            black = sides.get('black', [])
+            players = ('red' in sides) | (('black' in sides) << 1)
+            f.write(_POSITION.pack(occupancy.to_bytes(12, 'little'), first, len(red), len(black), players))
+            first += len(red) + len(black)
+        for _, sides in tables:
+            for side in SIDES:
+                for move in sides.get(side, []):
+                    f.write(_RECORD.pack(move['move'].encode('ascii', 'replace'), _PLAYER_CODES[side], move['frequency']))
+    os.replace(temp_path, output_path)
+
+    return {'positions': len(keys), 'records': record_count, 'skipped': skipped, 'dropped': dropped}
+
+
+def convert(json_path, output_path=None):
+    """把 JSON 频率数据文件转换为快照，返回 write_snapshot 的统计结果"""
+    output_path = output_path or snapshot_path_for(json_path)
+    with open(json_path, 'r', encoding='utf-8') as f:
+        frequency_data = json.load(f)
+    return write_snapshot(frequency_data, output_path)
+
+
+class _KeyView:
+    """把 mmap 中的局面键区当作只读序列，供 bisect 使用"""
+    __slots__ = ('_buffer', '_offset', '_count')
+
+    def __init__(self, buffer, offset, count):
+        self._buffer = buffer
+        self._offset = offset
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        return _KEY.unpack_from(self._buffer, self._offset + index * _KEY.size)[0]
+
+
+# 每个格子在180字符格式中的两个坐标数字（x, y），空位为 (9, 9)
+_SQUARE_DIGITS = [[sq // 10, sq % 10] for sq in range(90)]
+
+
+class _SideStates:
+    """快照中一方有走法记录的局面（只读序列，按下标从占位掩码还原180字符串，不预先生成全部字符串）"""
+    __slots__ = ('_snapshot', '_indexes')
+
+    def __init__(self, snapshot, indexes):
+        self._snapshot = snapshot
+        self._indexes = indexes
+
+    def __len__(self):
+        return len(self._indexes)
+
+    def __getitem__(self, row):
+        if not -len(self._indexes) <= row < len(self._indexes):
+            raise IndexError(row)
+        return _occupancy_string(self._snapshot._position(int(self._indexes[row]))[0])
+
+
+class FrequencySnapshot:
+    """只读的快照索引，接口与 FrequencyIndex 一致，可以直接替换引擎中的 board_move_map"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 空文件无法 mmap
+            self._file.close()
+            raise ValueError(f"快照文件为空: {path}")
+
+        if len(self._buffer) < _HEADER.size:
+            self.close()
+            raise ValueError(f"不是有效的频率快照文件: {path}")
+        magic, version, self.position_count, self.record_count, self.dropped_count = \
+            _HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"不是有效的频率快照文件（或版本不符，请重新转换）: {path}")
+
+        self._keys_offset = _HEADER.size
+        self._positions_offset = self._keys_offset + self.position_count * _KEY.size
+        self._records_offset = self._positions_offset + self.position_count * _POSITION.size
+        expected_size = self._records_offset + self.record_count * _RECORD.size
+        if len(self._buffer) != expected_size:
+            self.close()
+            raise ValueError(f"快照文件长度不符: {path}")
+
+        self._keys = _KeyView(self._buffer, self._keys_offset, self.position_count)
+
+    def close(self):
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _find(self, board_state):
+        """二分查找局面（board_state 已规范化），返回局面下标，不存在时为 -1"""
+        try:
+            key, occupancy = _position_of(board_state)
+        except (TypeError, ValueError):
+            return -1
+        index = bisect_left(self._keys, key)
+        if index == self.position_count or self._keys[index] != key:
+            return -1
+        # 校验占位，排除局面键碰撞
+        if self._position(index)[0] != occupancy:
+            return -1
+        return index
+
+    def _position(self, index):
+        occupancy, first, red_count, black_count, players = _POSITION.unpack_from(
+            self._buffer, self._positions_offset + index * _POSITION.size)
+        return int.from_bytes(occupancy, 'little'), first, red_count, black_count, players
+
+    def _records(self, first, count):
+        moves = []
+        offset = self._records_offset + first * _RECORD.size
+        for _ in range(count):
+            move, player_code, frequency = _RECORD.unpack_from(self._buffer, offset)
+            moves.append({'player': SIDES[player_code], 'move': move.decode('ascii'), 'frequency': frequency})
+            offset += _RECORD.size
+        return moves
+
+    def _sides_at(self, index):
+        _, first, red_count, black_count, players = self._position(index)
+        sides = {}
+        if players & 1:
+            sides['red'] = self._records(first, red_count)
+        if players & 2:
+            sides['black'] = self._records(first + red_count, black_count)
+        return sides
+
+    def get_side(self, board_state, player):
+        """该局面下 player 方的合法走法记录（按频率降序）；局面不存在或该方没有记录时为 None"""
+        if player not in _PLAYER_CODES:
+            return None
+        key, mirrored = _canonical(board_state)
+        index = self._find(key)
+        if index < 0:
+            return None
+        _, first, red_count, black_count, players = self._position(index)
+        if player == 'red':
+            records = self._records(first, red_count) if players & 1 else None
+        else:
+            records = self._records(first + red_count, black_count) if players & 2 else None
+        return _oriented(records, mirrored)
+
+    def side_matrix(self, player):
+        """
+        player 方有合法走法记录的局面的相似度检索矩阵（与 SimilarityIndex.from_board_states(side_states(player)) 相同）
+        直接从 mmap 中的局面表向量化生成，不逐个局面解码；局面字符串只在取用时从占位掩码还原
+
+        Returns:
+            tuple: (_SideStates 局面序列, N×90×2 的 uint8 数字矩阵)
+        """
+        import numpy as np
+
+        table = np.frombuffer(self._buffer, dtype=np.uint8, count=self.position_count * _POSITION.size,
+                              offset=self._positions_offset).reshape(self.position_count, _POSITION.size)
+        counts = np.ascontiguousarray(table[:, 16:20] if player == 'red' else table[:, 20:24]).view('<u4')[:, 0]
+        rows = np.flatnonzero(counts) if player in _PLAYER_CODES else np.zeros(0, dtype=np.intp)
+        occupied = np.unpackbits(table[rows, :12], axis=1, bitorder='little')[:, :90].astype(bool)
+        del table  # 不保留对 mmap 的引用，快照仍可关闭
+        matrix = np.where(occupied[:, :, None], _SQUARE_DIGITS, 9).astype(np.uint8)
+        return _SideStates(self, rows), matrix
+
+    def side_states(self, player):
+        """player 方有合法走法记录的全部局面"""
+        states = []
+        for index in range(self.position_count):
+            occupancy, _, red_count, black_count, _ = self._position(index)
+            if (red_count if player == 'red' else black_count if player == 'black' else 0):
+                states.append(_occupancy_string(occupancy))
+        return states
+
+    def get(self, board_state, default=None):
+        key, mirrored = _canonical(board_state)
+        index = self._find(key)
+        return _oriented(_merge_sides(self._sides_at(index)), mirrored) if index >= 0 else default
+
+    def __getitem__(self, board_state):
+        key, mirrored = _canonical(board_state)
+        index = self._find(key)
+        if index < 0:
+            raise KeyError(board_state)
+        return _oriented(_merge_sides(self._sides_at(index)), mirrored)
+
+    def __contains__(self, board_state):
+        return self._find(_canonical(board_state)[0]) >= 0
+
+    def __len__(self):
+        return self.position_count
+
+    def items(self):
+        """按局面键顺序遍历 (180字符棋盘状态, 走法列表)"""
+        for index in range(self.position_count):
+            yield _occupancy_string(self._position(index)[0]), _merge_sides(self._sides_at(index))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='把走法频率JSON转换为可 mmap 的二进制快照')
+    parser.add_argument('json_path', help='move_frequency_analysis.json 路径')
+    parser.add_argument('-o', '--output', help='快照输出路径（默认与JSON同名，扩展名 .bin）')
+    args = parser.parse_args(argv)
+
+    output_path = args.output or snapshot_path_for(args.json_path)
+    result = convert(args.json_path, output_path)
+    print(f"已写入 {output_path}: {result['positions']} 个局面，{result['records']} 条记录，"
+          f"跳过 {result['skipped']} 条无效记录，丢弃 {result['dropped']} 条不合法走法")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
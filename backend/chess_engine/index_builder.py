@@ -0,0 +1,346 @@
+"""
+走法频率索引构建
+从对局记录 moves.csv / gameinfo.csv 重建 move_frequency_analysis.json（替代外部的 spark_chess_analysis.py）。
+按对局分块流式读取 moves.csv，用 ChessBoard 复盘每盘棋，在进程池中统计 (棋盘状态, 走棋方, 走法) 的出现次数，
+各块的计数在主进程中归并。同时在途的块数有上限，内存占用只取决于结果大小，与CSV大小无关。
+
+输入格式（与公开的象棋对局数据集一致）:
+    moves.csv     gameID,turn,side,move    同一盘棋的记录需连续；move 为 WXF 记谱，如 C2.5、H8+7、+R.4、R+.4
+    gameinfo.csv  gameID,...,redELO,blackELO,...    只在按等级分过滤时使用
+
+增量追加：--append 时读入已有的JSON和已处理对局列表（与输出同名、扩展名 .games.txt），只复盘新对局并合并计数。
+
+用法（在 backend 目录下）:
+    python -m chess_engine.index_builder ../data/moves.csv --gameinfo ../data/gameinfo.csv
+    python -m chess_engine.index_builder new_moves.csv -o ../data/move_frequency_analysis.json --append --snapshot
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .codec import canonical_board_string, mirror_move
+from .pieces import KING, ADVISOR, ELEPHANT, HORSE, ROOK, CANNON, PAWN, KIND_MASK
+
+WXF_KINDS = {
+    'K': KING, 'A': ADVISOR, 'E': ELEPHANT, 'B': ELEPHANT,
+    'H': HORSE, 'N': HORSE, 'R': ROOK, 'C': CANNON, 'P': PAWN,
+}
+# 直行棋子：进/退后面的数字是步数，其余棋子是目标路数
+_STRAIGHT_KINDS = (KING, ROOK, CANNON, PAWN)
+
+
+def _file_of(x, side):
+    """各方从己方右手起数的路数（1-9）：红方在下方（y=9），黑方在上方（y=0）"""
+    return 9 - x if side == 'red' else x + 1
+
+
+def _advance(from_y, to_y, side):
+    """向对方底线前进的步数（后退为负）"""
+    return from_y - to_y if side == 'red' else to_y - from_y
+
+
+def parse_wxf(board, side, notation):
+    """
+    把 WXF 记谱解析为走法
+
+    支持 "C2.5"、"H8+7"、"R1-2" 以及同一路有两个同种棋子时的前后标记 "+C.5"/"C+.5"（前）和 "-C.5"/"C-.5"（后）。
+    在 side 方的合法走法中匹配，因此结果一定合法
+
+    Returns:
+        tuple: (from_sq, to_sq)
+
+    Raises:
+        ValueError: 记谱格式无效、没有匹配的合法走法或有歧义
+    """
+    from .rules import ChessRules
+
+    text = notation.strip().upper()
+    tandem = None
+    if len(text) == 4 and text[0] in '+-' and text[1] in WXF_KINDS:
+        tandem, letter, file_char, op, target = text[0], text[1], None, text[2], text[3]
+    elif len(text) == 4 and text[0] in WXF_KINDS and text[1] in '+-':
+        tandem, letter, file_char, op, target = text[1], text[0], None, text[2], text[3]
+    elif len(text) == 4 and text[0] in WXF_KINDS:
+        letter, file_char, op, target = text
+    else:
+        raise ValueError(f"无法解析的记谱: {notation}")
+    if op not in '+-.' or not target.isdigit() or (file_char is not None and not file_char.isdigit()):
+        raise ValueError(f"无法解析的记谱: {notation}")
+
+    kind = WXF_KINDS[letter]
+    target = int(target)
+
+    sources = [piece.x * 10 + piece.y for piece in board.side_pieces[side]
+               if piece.x != 99 and piece.code & KIND_MASK == kind]
+    if tandem is None:
+        sources = [sq for sq in sources if _file_of(sq // 10, side) == int(file_char)]
+    else:
+        # 同一路上的同种棋子按前进程度排序，取最前或最后一个
+        picked = []
+        for x in {sq // 10 for sq in sources}:
+            on_file = sorted((sq for sq in sources if sq // 10 == x),
+                             key=lambda sq: _advance(9 if side == 'red' else 0, sq % 10, side))
+            if len(on_file) >= 2:
+                picked.append(on_file[-1] if tandem == '+' else on_file[0])
+        sources = picked
+
+    matches = []
+    for from_sq in sources:
+        from_x, from_y = divmod(from_sq, 10)
+        for _, to_sq in ChessRules.generate_legal_moves(board, side, from_sq):
+            to_x, to_y = divmod(to_sq, 10)
+            advance = _advance(from_y, to_y, side)
+            if op == '.':
+                ok = advance == 0 and _file_of(to_x, side) == target
+            elif (advance > 0) != (op == '+') or advance == 0:
+                ok = False
+            elif kind in _STRAIGHT_KINDS:
+                ok = to_x == from_x and abs(advance) == target
+            else:
+                ok = _file_of(to_x, side) == target
+            if ok:
+                matches.append((from_sq, to_sq))
+
+    if not matches:
+        raise ValueError(f"记谱在当前局面下没有对应的合法走法: {notation}")
+    if len(matches) > 1:
+        raise ValueError(f"记谱有歧义: {notation}")
+    return matches[0]
+
+
+def iter_games(moves_path, skip_games=()):
+    """
+    流式读取 moves.csv，逐盘产生 (gameID, [(turn, side, move), ...])，同一回合红方在前
+    同一盘棋的记录必须连续出现（数据集按 gameID 排序）
+    """
+    with open(moves_path, 'r', encoding='utf-8', newline='') as f:
+        current_id = None
+        moves = []
+        for row in csv.DictReader(f):
+            game_id = row['gameID']
+            if game_id != current_id:
+                if current_id is not None and current_id not in skip_games:
+                    yield current_id, _ordered(moves)
+                current_id = game_id
+                moves = []
+            moves.append((int(row['turn']), row['side'].strip().lower(), row['move']))
+        if current_id is not None and current_id not in skip_games:
+            yield current_id, _ordered(moves)
+
+
+def _ordered(moves):
+    return sorted(moves, key=lambda move: (move[0], move[1] != 'red'))
+
+
+def load_game_filter(gameinfo_path, min_elo):
+    """gameinfo.csv 中红黑双方等级分都不低于 min_elo 的对局ID集合"""
+    selected = set()
+    with open(gameinfo_path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            try:
+                if min(float(row['redELO']), float(row['blackELO'])) >= min_elo:
+                    selected.add(row['gameID'])
+            except (KeyError, TypeError, ValueError):
+                continue
+    return selected
+
+
+def replay(moves):
+    """
+    从开局复盘一盘棋，逐步产生 (走棋前的棋盘, 走棋方, from_sq, to_sq)；产生后才在棋盘上走这一步
+    某一步无法解析时抛出 ValueError（之前的步已经产生）
+    """
+    from .board import ChessBoard
+
+    board = ChessBoard()
+    for _, side, notation in moves:
+        if side not in ('red', 'black'):
+            raise ValueError(f"无效的走棋方: {side}")
+        from_sq, to_sq = parse_wxf(board, side, notation)
+        yield board, side, from_sq, to_sq
+        board.make_move(from_sq, to_sq)
+
+
+def count_games(games):
+    """
+    复盘一组对局并统计 (棋盘状态, 走棋方, 走法) 的出现次数（进程池中执行）
+    局面按左右镜像规范化（codec.canonical_board_string），镜像局面的走法随之镜像后合并计数；
+    某一步无法解析时该盘棋从这一步起停止统计
+
+    Returns:
+        tuple: (Counter, {'games', 'moves', 'failed'})
+    """
+    counts = Counter()
+    stats = {'games': 0, 'moves': 0, 'failed': 0}
+    for _, moves in games:
+        stats['games'] += 1
+        try:
+            for board, side, from_sq, to_sq in replay(moves):
+                move = f"{from_sq // 10}{from_sq % 10}{to_sq // 10}{to_sq % 10}"
+                board_state, mirrored = canonical_board_string(board.to_string())
+                counts[(board_state, side, mirror_move(move) if mirrored else move)] += 1
+                stats['moves'] += 1
+        except ValueError:
+            stats['failed'] += 1
+    return counts, stats
+
+
+def chunked(games, chunk_games):
+    """把对局流按 chunk_games 盘一块切分"""
+    chunk = []
+    for game in games:
+        chunk.append(game)
+        if len(chunk) >= chunk_games:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def map_chunks(func, chunks, workers=None):
+    """
+    在进程池中对每块调用 func(chunk)，按完成顺序产生结果
+    workers 为1时在当前进程中执行；否则同时在途的块最多为 workers 的两倍，输入只会被读取到这个深度
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for chunk in chunks:
+            yield func(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for chunk in chunks:
+            pending.add(executor.submit(func, chunk))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in pending:
+            yield future.result()
+
+
+def count_all(games, workers=None, chunk_games=500):
+    """
+    分块 map-reduce 统计
+
+    Returns:
+        tuple: (Counter, {'games', 'moves', 'failed'}, [gameID, ...])
+    """
+    total = Counter()
+    stats = {'games': 0, 'moves': 0, 'failed': 0}
+    game_ids = []
+
+    def tracked(chunks):
+        for chunk in chunks:
+            game_ids.extend(game_id for game_id, _ in chunk)
+            yield chunk
+
+    for counts, chunk_stats in map_chunks(count_games, tracked(chunked(games, chunk_games)), workers):
+        total.update(counts)
+        for name, value in chunk_stats.items():
+            stats[name] += value
+    return total, stats, game_ids
+
+
+def to_frequency_json(counts):
+    """计数 -> {棋盘状态: [{'move', 'frequency', 'player', 'description'}, ...]}（与 move_frequency_analysis.json 一致）"""
+    result = {}
+    for (board_state, player, move), frequency in counts.items():
+        result.setdefault(board_state, []).append({
+            'move': move,
+            'frequency': frequency,
+            'player': player,
+            'description': f"从({move[0]},{move[1]})移动到({move[2]},{move[3]})"
+        })
+    for moves in result.values():
+        moves.sort(key=lambda move: move['frequency'], reverse=True)
+    return result
+
+
+def games_path_for(output_path):
+    """已处理对局列表的路径（与输出同名、扩展名 .games.txt）"""
+    return os.path.splitext(output_path)[0] + '.games.txt'
+
+
+def build(moves_path, output_path, gameinfo_path=None, min_elo=None, append=False, workers=None,
+          chunk_games=500, snapshot=False):
+    """
+    从 moves.csv 构建（或追加到）频率数据JSON
+
+    Returns:
+        dict: {'games', 'moves', 'failed', 'positions', 'records', 'seconds'}
+    """
+    start = time.perf_counter()
+    from .frequency_snapshot import iter_frequency_entries
+
+    counts = Counter()
+    processed = set()
+    games_path = games_path_for(output_path)
+    if append and os.path.exists(output_path):
+        with open(output_path, 'r', encoding='utf-8') as f:
+            for board_state, player, move, frequency in iter_frequency_entries(json.load(f)):
+                counts[(board_state, player, move)] += frequency
+        if os.path.exists(games_path):
+            with open(games_path, 'r', encoding='utf-8') as f:
+                processed = {line.strip() for line in f if line.strip()}
+
+    games = iter_games(moves_path, skip_games=processed)
+    if gameinfo_path and min_elo is not None:
+        selected = load_game_filter(gameinfo_path, min_elo)
+        games = (game for game in games if game[0] in selected)
+
+    new_counts, stats, game_ids = count_all(games, workers, chunk_games)
+    counts.update(new_counts)
+    frequency_data = to_frequency_json(counts)
+
+    temp_path = output_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(frequency_data, f, ensure_ascii=False)
+    os.replace(temp_path, output_path)
+    with open(games_path, 'a' if append else 'w', encoding='utf-8') as f:
+        for game_id in game_ids:
+            f.write(game_id + '\n')
+
+    if snapshot:
+        from .frequency_snapshot import snapshot_path_for, write_snapshot
+        write_snapshot(frequency_data, snapshot_path_for(output_path))
+
+    stats.update({
+        'positions': len(frequency_data),
+        'records': len(counts),
+        'seconds': time.perf_counter() - start,
+    })
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='从对局记录CSV构建走法频率数据')
+    parser.add_argument('moves_path', help='moves.csv 路径')
+    parser.add_argument('-o', '--output', default=os.path.join('..', 'data', 'move_frequency_analysis.json'),
+                        help='输出JSON路径（默认 ../data/move_frequency_analysis.json）')
+    parser.add_argument('--gameinfo', help='gameinfo.csv 路径（按等级分过滤时需要）')
+    parser.add_argument('--min-elo', type=float, help='只统计双方等级分都不低于该值的对局')
+    parser.add_argument('--append', action='store_true', help='合并到已有输出，跳过已处理过的对局')
+    parser.add_argument('--workers', type=int, help='进程数（默认CPU核数，1 表示不使用进程池）')
+    parser.add_argument('--chunk-games', type=int, default=500, help='每个任务块的对局数（默认500）')
+    parser.add_argument('--snapshot', action='store_true', help='同时生成二进制快照（.bin）')
+    args = parser.parse_args(argv)
+
+    if args.min_elo is not None and not args.gameinfo:
+        parser.error('--min-elo 需要同时指定 --gameinfo')
+
+    stats = build(args.moves_path, args.output, args.gameinfo, args.min_elo, args.append,
+                  args.workers, args.chunk_games, args.snapshot)
+    print(f"已写入 {args.output}: 复盘 {stats['games']} 盘（{stats['failed']} 盘中途无法解析），"
+          f"{stats['moves']} 步，{stats['positions']} 个局面，{stats['records']} 条记录，用时 {stats['seconds']:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
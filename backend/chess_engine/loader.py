@@ -0,0 +1,232 @@
+"""
+后台加载句柄
+AI引擎加载频率数据可能很慢，放到后台线程里进行，调用方通过句柄非阻塞地取得引擎并查询加载进度，
+不需要引擎的接口（初始化、走棋、校验）在加载期间照常服务。
+
+reload() 在后台重新创建对象，创建完成后原子地替换；替换前 get() 一直返回旧对象，
+已经取得旧对象的请求照常在旧对象上完成。需要修改对象的操作（如合并增量数据）通过 apply() 进行，
+重新加载期间的修改会在替换前重放到新对象上。FileWatcher 轮询文件修改时间，用于数据文件更新时自动重新加载。
+"""
+
+import os
+import threading
+import time
+
+STATE_IDLE = 'idle'
+STATE_LOADING = 'loading'
+STATE_READY = 'ready'
+STATE_FAILED = 'failed'
+
+
+class BackgroundLoader:
+    """
+    在后台线程中调用 factory(progress) 创建对象
+    factory 可以调用 progress(stage, fraction) 报告加载阶段和进度（0-1）
+    """
+
+    def __init__(self, factory, name='loader'):
+        self._factory = factory
+        self._name = name
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread = None
+        self._value = None
+        self.state = STATE_IDLE
+        self.stage = None
+        self.progress = 0.0
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._reload_thread = None
+        self.reloading = False
+        self.reloads = 0
+        self.reload_error = None
+        self.reloaded_at = None
+        self._pending_updates = []  # 重新加载期间对旧对象的更新，替换前在新对象上重放
+
+    def start(self):
+        """启动后台加载（重复调用无效），立即返回"""
+        with self._lock:
+            if self._thread is not None:
+                return self
+            self.state = STATE_LOADING
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+            self._thread.start()
+        return self
+
+    def reload(self):
+        """
+        在后台重新创建对象，完成后替换当前对象（失败时保留当前对象）；立即返回
+        尚未加载成功时等同于（重新）开始加载。已有重新加载在进行时返回 False
+        """
+        with self._lock:
+            if self.state == STATE_FAILED:
+                self._thread = None
+                self._done.clear()
+                self.error = None
+            if self.state in (STATE_IDLE, STATE_FAILED):
+                restart = True
+            elif self.state == STATE_LOADING or self.reloading:
+                return False
+            else:
+                restart = False
+                self.reloading = True
+                self.reload_error = None
+                self._reload_thread = threading.Thread(target=self._run_reload, name=f'{self._name}-reload',
+                                                       daemon=True)
+                self._reload_thread.start()
+        if restart:
+            self.start()
+        return True
+
+    def _run_reload(self):
+        succeeded = False
+        try:
+            value = self._factory(self._report)
+            succeeded = True
+        except Exception as e:
+            self.reload_error = str(e)
+            print(f"{self._name} 重新加载失败，继续使用当前版本: {e}")
+        finally:
+            # 重放更新、替换对象和结束重新加载在同一把锁内完成，apply() 不会落在两者之间
+            with self._lock:
+                if succeeded:
+                    for update in self._pending_updates:
+                        try:
+                            update(value)
+                        except Exception as e:
+                            print(f"{self._name} 在新版本上重放更新失败: {e}")
+                    # 单次属性赋值即为原子替换
+                    self._value = value
+                    self.reloads += 1
+                    self.reloaded_at = time.time()
+                    self.progress = 1.0
+                self._pending_updates = []
+                self.reloading = False
+
+    def _report(self, stage, fraction=None):
+        self.stage = stage
+        if fraction is not None:
+            self.progress = max(0.0, min(1.0, fraction))
+
+    def _run(self):
+        try:
+            value = self._factory(self._report)
+        except Exception as e:
+            self.error = str(e)
+            self.state = STATE_FAILED
+            print(f"{self._name} 加载失败: {e}")
+        else:
+            self._value = value
+            self.progress = 1.0
+            self.state = STATE_READY
+        finally:
+            self.finished_at = time.time()
+            self._done.set()
+
+    def get(self):
+        """
+        非阻塞地取得加载结果：已就绪时返回对象，否则返回 None
+        尚未启动时（延迟加载）顺带启动后台加载
+        """
+        if self.state == STATE_READY:
+            return self._value
+        if self.state == STATE_IDLE:
+            self.start()
+        return None
+
+    def apply(self, update):
+        """
+        在当前对象上执行 update(value)，返回其结果；未就绪时返回 None
+        重新加载进行中时同时记下 update，新对象替换旧对象之前在新对象上重放，这次更新不会随旧对象一起丢失
+        """
+        with self._lock:
+            if self.state != STATE_READY:
+                return None
+            value = self._value
+            if self.reloading:
+                self._pending_updates.append(update)
+        return update(value)
+
+    def wait(self, timeout=None):
+        """阻塞等待加载结束（成功或失败），返回对象或 None"""
+        if self.state == STATE_IDLE:
+            self.start()
+        self._done.wait(timeout)
+        return self._value if self.state == STATE_READY else None
+
+    @property
+    def ready(self):
+        return self.state == STATE_READY
+
+    def status(self):
+        if self.started_at is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            'state': self.state,
+            'ready': self.state == STATE_READY,
+            'stage': self.stage,
+            'progress': round(self.progress, 4),
+            'elapsed_seconds': round(elapsed, 3),
+            'error': self.error,
+            'reloading': self.reloading,
+            'reloads': self.reloads,
+            'reload_error': self.reload_error,
+        }
+
+
+class FileWatcher:
+    """
+    后台线程每隔 interval 秒检查一组文件的修改时间（不存在的文件视为0），有变化时调用 callback()
+    文件可能还在写入，变化后要再稳定一个周期才触发；callback() 返回 False（如已有重新加载在进行）时不记录新的修改时间，下次检查时重试
+    """
+
+    def __init__(self, paths, callback, interval=5.0, name='file-watcher'):
+        self.paths = list(paths)
+        self.callback = callback
+        self.interval = interval
+        self._name = name
+        self._stop = threading.Event()
+        self._thread = None
+        self._mtimes = self._snapshot()
+
+    def _snapshot(self):
+        mtimes = []
+        for path in self.paths:
+            try:
+                mtimes.append(os.path.getmtime(path))
+            except OSError:
+                mtimes.append(0)
+        return mtimes
+
+    def check(self):
+        """检查一次，返回 callback 是否接受了这次变化"""
+        current = self._snapshot()
+        if current == self._mtimes:
+            return False
+        # 等一个周期确认文件不再变化
+        if self._stop.wait(self.interval) or self._snapshot() != current:
+            return False
+        if self.callback() is False:
+            return False
+        self._mtimes = current
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"{self._name} 检查文件失败: {e}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,214 @@
+"""
+开局库（走法序列字典树）
+把对局记录中从开局起的走法序列建成字典树，每个节点记录经过该节点的对局数。
+查询时从根节点沿走法逐层查找子节点，代价只与序列长度有关，不需要复盘棋盘或计算局面键。
+
+文件布局（全部小端序，可直接 mmap）:
+    文件头    magic(4s) version(I) 节点数(I) 最大步数(I)
+    节点表    每个节点 from_sq(B) to_sq(B) 填充(2x) 对局数(I) 首个子节点下标(I) 子节点数(I)
+节点按广度优先顺序排列，0 号为根节点（开局局面，对局数为全部对局）；同一节点的子节点连续存放，按对局数降序。
+
+用法（在 backend 目录下）:
+    python -m chess_engine.opening_book ../data/moves.csv                  # 生成 ../data/opening_book.bin
+    python -m chess_engine.opening_book ../data/moves.csv --max-plies 40 --min-count 2
+"""
+
+import argparse
+import functools
+import mmap
+import os
+import struct
+import time
+
+MAGIC = b'XQOB'
+VERSION = 1
+
+_HEADER = struct.Struct('<4sIII')
+_NODE = struct.Struct('<BBxxIII')
+
+
+def move_squares(move):
+    """'xyxy' 走法 -> (from_sq, to_sq)，格式无效时抛出 ValueError"""
+    if not isinstance(move, str) or len(move) != 4 or not move.isdigit():
+        raise ValueError(f"走法格式无效: {move}")
+    from_sq, to_sq = int(move[0]) * 10 + int(move[1]), int(move[2]) * 10 + int(move[3])
+    if from_sq >= 90 or to_sq >= 90:
+        raise ValueError(f"走法格式无效: {move}")
+    return from_sq, to_sq
+
+
+def _move_string(from_sq, to_sq):
+    return f"{from_sq // 10}{from_sq % 10}{to_sq // 10}{to_sq % 10}"
+
+
+def game_lines(games, max_plies=None):
+    """复盘一组对局，返回每盘棋前 max_plies 步的 ((from_sq, to_sq), ...)（进程池中执行）"""
+    from .index_builder import replay
+
+    lines = []
+    for _, moves in games:
+        line = []
+        try:
+            for _, _, from_sq, to_sq in replay(moves[:max_plies] if max_plies else moves):
+                line.append((from_sq, to_sq))
+        except ValueError:
+            pass
+        lines.append(tuple(line))
+    return lines
+
+
+def build_book(moves_path, output_path, max_plies=30, min_count=1, workers=None, chunk_games=500):
+    """
+    从 moves.csv 构建开局库文件
+    只保留对局数不少于 min_count 的节点（根节点总是保留）
+
+    Returns:
+        dict: {'games', 'nodes', 'seconds'}
+    """
+    from .index_builder import chunked, iter_games, map_chunks
+
+    start = time.perf_counter()
+    root = [0, {}]  # [对局数, {(from_sq, to_sq): 子节点}]
+    worker = functools.partial(game_lines, max_plies=max_plies)
+    for lines in map_chunks(worker, chunked(iter_games(moves_path), chunk_games), workers):
+        for line in lines:
+            node = root
+            node[0] += 1
+            for move in line:
+                node = node[1].setdefault(move, [0, {}])
+                node[0] += 1
+
+    nodes = write_book(root, output_path, max_plies, min_count)
+    return {'games': root[0], 'nodes': nodes, 'seconds': time.perf_counter() - start}
+
+
+def write_book(root, output_path, max_plies=0, min_count=1):
+    """把内存中的字典树（[对局数, {走法: 子节点}]）按广度优先顺序写成文件，返回节点数"""
+    order = [((0, 0), root)]
+    records = []
+    index = 0
+    while index < len(order):
+        move, node = order[index]
+        children = sorted((item for item in node[1].items() if item[1][0] >= min_count),
+                          key=lambda item: (-item[1][0], item[0]))
+        records.append((move, node[0], len(order), len(children)))
+        order.extend(children)
+        index += 1
+
+    temp_path = output_path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(records), max_plies or 0))
+        for (from_sq, to_sq), count, first, child_count in records:
+            f.write(_NODE.pack(from_sq, to_sq, count, first, child_count))
+    os.replace(temp_path, output_path)
+    return len(records)
+
+
+class OpeningBook:
+    """只读的开局库，mmap 打开，多个工作进程共享页缓存"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"开局库文件为空: {path}")
+
+        if len(self._buffer) < _HEADER.size:
+            self.close()
+            raise ValueError(f"不是有效的开局库文件: {path}")
+        magic, version, self.node_count, self.max_plies = _HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC or version != VERSION or self.node_count == 0:
+            self.close()
+            raise ValueError(f"不是有效的开局库文件（或版本不符，请重新生成）: {path}")
+        if len(self._buffer) != _HEADER.size + self.node_count * _NODE.size:
+            self.close()
+            raise ValueError(f"开局库文件长度不符: {path}")
+
+    def close(self):
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.node_count
+
+    def _node(self, index):
+        return _NODE.unpack_from(self._buffer, _HEADER.size + index * _NODE.size)
+
+    def lookup(self, moves):
+        """
+        沿走法序列查找节点
+
+        Args:
+            moves: 从开局起的 'xyxy' 走法列表
+
+        Returns:
+            int: 节点下标，序列不在开局库中时为 -1（走法格式无效时抛出 ValueError）
+        """
+        index = 0
+        for move in moves:
+            target = move_squares(move)
+            _, _, _, first, child_count = self._node(index)
+            for child in range(first, first + child_count):
+                if self._node(child)[:2] == target:
+                    index = child
+                    break
+            else:
+                return -1
+        return index
+
+    def continuations(self, moves, offset=0, limit=20):
+        """
+        走法序列之后的全部后续走法（按对局数降序，分页）
+
+        Returns:
+            dict: {'total_games', 'total_continuations', 'continuations': [{'move', 'count', 'percentage'}, ...]}；
+                  序列不在开局库中时为 None
+        """
+        index = self.lookup(moves)
+        if index < 0:
+            return None
+        _, _, total, first, child_count = self._node(index)
+        continuations = []
+        for child in range(first + max(offset, 0), first + min(child_count, max(offset, 0) + limit)):
+            from_sq, to_sq, count, _, _ = self._node(child)
+            continuations.append({
+                'move': _move_string(from_sq, to_sq),
+                'count': count,
+                'percentage': round(count * 100 / total, 2) if total else 0.0,
+            })
+        return {'total_games': total, 'total_continuations': child_count, 'continuations': continuations}
+
+    def stats(self):
+        return {'path': os.path.basename(self.path), 'nodes': self.node_count, 'max_plies': self.max_plies,
+                'games': self._node(0)[2]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='从对局记录CSV构建开局库')
+    parser.add_argument('moves_path', help='moves.csv 路径')
+    parser.add_argument('-o', '--output', default=os.path.join('..', 'data', 'opening_book.bin'),
+                        help='输出路径（默认 ../data/opening_book.bin）')
+    parser.add_argument('--max-plies', type=int, default=30, help='每盘棋最多收录的步数（默认30）')
+    parser.add_argument('--min-count', type=int, default=1, help='节点最少对局数，少于该值的分支不收录（默认1）')
+    parser.add_argument('--workers', type=int, help='进程数（默认CPU核数，1 表示不使用进程池）')
+    parser.add_argument('--chunk-games', type=int, default=500, help='每个任务块的对局数（默认500）')
+    args = parser.parse_args(argv)
+
+    stats = build_book(args.moves_path, args.output, args.max_plies, args.min_count, args.workers, args.chunk_games)
+    print(f"已写入 {args.output}: {stats['games']} 盘对局，{stats['nodes']} 个节点，用时 {stats['seconds']:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,153 @@
+"""
+perft - 走法生成的正确性校验与性能基准
+从给定局面出发，统计走到深度 N 的全部叶子节点数，与已知结果对比，并给出每秒节点数。
+
+用法（在 backend 目录下）:
+    python -m chess_engine.perft                 # 运行全部局面，默认最大深度3
+    python -m chess_engine.perft --depth 4       # 最大深度4
+    python -m chess_engine.perft --divide 2      # 开局局面按第一步拆分计数
+"""
+
+import argparse
+import time
+
+from .board import ChessBoard
+from .pieces import opponent
+from .rules import ChessRules
+
+# 校验局面：expected 为 {深度: 叶子节点数}
+# 前两个局面的计数是公开的象棋 perft 参考结果；其余局面的计数已与逐格调用
+# ChessRules.validate_move_with_reason 的暴力生成结果逐层核对过
+PERFT_POSITIONS = [
+    {
+        'name': '开局局面',
+        'fen': None,
+        'side': 'red',
+        'expected': {1: 44, 2: 1920, 3: 79666, 4: 3290240},
+    },
+    {
+        'name': '中局混战',
+        'fen': 'r1ba1a3/4kn3/2n1b4/pNp1p1p1p/4c4/6P2/P1P2R2P/1CcC5/9/2BAKAB2',
+        'side': 'red',
+        'expected': {1: 38, 2: 1128, 3: 43929, 4: 1339047},
+    },
+    {
+        'name': '炮架与闷宫',
+        'fen': '4k4/4a4/4C4/9/4R4/9/4c4/9/4A4/3K5',
+        'side': 'black',
+        'expected': {1: 6, 2: 139, 3: 1586, 4: 42846},
+    },
+    {
+        'name': '帅将对脸与牵制',
+        'fen': '4k4/9/9/9/4n4/9/4R4/9/9/4K4',
+        'side': 'black',
+        'expected': {1: 3, 2: 43, 3: 298, 4: 5148},
+    },
+    {
+        'name': '蹩马腿与塞象眼',
+        'fen': '2b1k1b2/9/3n1n3/2pNPNp2/3n1n3/9/2PNpNP2/9/9/2B1K1B2',
+        'side': 'red',
+        'expected': {1: 18, 2: 523, 3: 9751, 4: 258684},
+    },
+    {
+        'name': '过河兵与象不过河',
+        'fen': '3ak4/9/4b4/P3P3P/2B3b2/1P5p1/3p1p3/2B6/9/4K4',
+        'side': 'red',
+        'expected': {1: 14, 2: 214, 3: 3018, 4: 45377},
+    },
+]
+
+
+def perft(board, side, depth):
+    """统计从当前局面出发走 depth 步后的叶子节点数（使用 make_move/unmake_move 复用同一个棋盘）"""
+    if depth <= 0:
+        return 1
+    moves = ChessRules.generate_legal_moves(board, side)
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    next_side = opponent(side)
+    for from_sq, to_sq in moves:
+        undo = board.make_move(from_sq, to_sq)
+        nodes += perft(board, next_side, depth - 1)
+        board.unmake_move(undo)
+    return nodes
+
+
+def divide(board, side, depth):
+    """按第一步拆分的 perft 计数，返回 {'xyxy': 节点数}，用于定位走法生成的差异"""
+    result = {}
+    next_side = opponent(side)
+    for from_sq, to_sq in ChessRules.generate_legal_moves(board, side):
+        undo = board.make_move(from_sq, to_sq)
+        move = f"{from_sq // 10}{from_sq % 10}{to_sq // 10}{to_sq % 10}"
+        result[move] = perft(board, next_side, depth - 1)
+        board.unmake_move(undo)
+    return result
+
+
+def position_board(position):
+    if position['fen'] is None:
+        return ChessBoard()
+    return ChessBoard(position['fen'])
+
+
+def run_suite(max_depth=3, positions=None):
+    """
+    对校验局面逐个深度运行 perft
+
+    Returns:
+        list: [{'name', 'depth', 'nodes', 'expected', 'ok', 'seconds', 'nps'}, ...]
+    """
+    results = []
+    for position in positions or PERFT_POSITIONS:
+        board = position_board(position)
+        for depth in range(1, max_depth + 1):
+            start = time.perf_counter()
+            nodes = perft(board, position['side'], depth)
+            seconds = time.perf_counter() - start
+            expected = position['expected'].get(depth)
+            results.append({
+                'name': position['name'],
+                'depth': depth,
+                'nodes': nodes,
+                'expected': expected,
+                'ok': expected is None or nodes == expected,
+                'seconds': seconds,
+                'nps': nodes / seconds if seconds > 0 else 0.0,
+            })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='象棋走法生成 perft 校验与基准')
+    parser.add_argument('--depth', type=int, default=3, help='最大深度（默认3）')
+    parser.add_argument('--divide', type=int, default=0, help='对开局局面按第一步拆分计数的深度')
+    args = parser.parse_args(argv)
+
+    if args.divide:
+        for move, nodes in sorted(divide(ChessBoard(), 'red', args.divide).items()):
+            print(f"{move}: {nodes}")
+        return 0
+
+    failed = 0
+    total_nodes = 0
+    total_seconds = 0.0
+    for row in run_suite(args.depth):
+        status = '通过' if row['ok'] else '失败'
+        if row['expected'] is None:
+            status = '-'
+        print(f"{row['name']:<10} 深度{row['depth']}  节点 {row['nodes']:>10}  "
+              f"期望 {row['expected'] if row['expected'] is not None else '-':>10}  "
+              f"{row['seconds']:8.3f}s  {row['nps']:>10.0f} nps  {status}")
+        failed += not row['ok']
+        total_nodes += row['nodes']
+        total_seconds += row['seconds']
+
+    print(f"合计 {total_nodes} 节点，{total_seconds:.3f}s，{total_nodes / total_seconds:.0f} nps")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,105 @@
+"""
+棋子编码定义
+棋盘格子使用 sq = x * 10 + y 编号（与180字符格式中的位置索引一致），
+每个格子保存一个小整数棋子编码：低4位为兵种，BLACK_FLAG 位表示黑方，0 表示空位
+"""
+
+# 兵种
+KING = 1       # 帅/将
+ADVISOR = 2    # 仕/士
+ELEPHANT = 3   # 相/象
+HORSE = 4      # 马
+ROOK = 5       # 车
+CANNON = 6     # 炮
+PAWN = 7       # 兵/卒
+UNKNOWN = 8    # 无法推断身份的棋子（不能走动，只占位）
+
+KIND_MASK = 0x0F
+BLACK_FLAG = 0x10
+EMPTY = 0
+
+# 编码表大小（用于按编码索引的查找表）
+CODE_COUNT = 32
+
+SIDES = ('red', 'black')
+SIDE_FLAGS = {'red': 0, 'black': BLACK_FLAG}
+
+# 棋子名称 -> 兵种
+NAME_TO_KIND = {
+    '帅': KING, '将': KING,
+    '仕': ADVISOR, '士': ADVISOR,
+    '相': ELEPHANT, '象': ELEPHANT,
+    '马': HORSE,
+    '车': ROOK,
+    '炮': CANNON,
+    '兵': PAWN, '卒': PAWN,
+    '未知': UNKNOWN,
+}
+
+# 兵种 -> 各方棋子名称
+KIND_NAMES = {
+    'red': {KING: '帅', ADVISOR: '仕', ELEPHANT: '相', HORSE: '马',
+            ROOK: '车', CANNON: '炮', PAWN: '兵', UNKNOWN: '未知'},
+    'black': {KING: '将', ADVISOR: '士', ELEPHANT: '象', HORSE: '马',
+              ROOK: '车', CANNON: '炮', PAWN: '卒', UNKNOWN: '未知'},
+}
+
+
+def make_code(kind, side):
+    """根据兵种和所属方生成棋子编码"""
+    return kind | SIDE_FLAGS[side]
+
+
+def code_kind(code):
+    return code & KIND_MASK
+
+
+def code_side(code):
+    return 'black' if code & BLACK_FLAG else 'red'
+
+
+def opponent(side):
+    return 'black' if side == 'red' else 'red'
+
+
+def square_of(x, y):
+    return x * 10 + y
+
+
+def square_xy(sq):
+    return sq // 10, sq % 10
+
+
+# 编码 -> 棋子名称（空位和无效编码为 None）
+CODE_NAMES = [None] * CODE_COUNT
+for _side in SIDES:
+    for _kind, _name in KIND_NAMES[_side].items():
+        CODE_NAMES[make_code(_kind, _side)] = _name
+
+
+# 标准开局布局：格子 -> (名称, 所属方)
+INITIAL_LAYOUT = {}
+for _x, _name in enumerate(['车', '马', '象', '士', '将', '士', '象', '马', '车']):
+    INITIAL_LAYOUT[square_of(_x, 0)] = (_name, 'black')
+for _x in (1, 7):
+    INITIAL_LAYOUT[square_of(_x, 2)] = ('炮', 'black')
+for _x in (0, 2, 4, 6, 8):
+    INITIAL_LAYOUT[square_of(_x, 3)] = ('卒', 'black')
+for _x in (0, 2, 4, 6, 8):
+    INITIAL_LAYOUT[square_of(_x, 6)] = ('兵', 'red')
+for _x in (1, 7):
+    INITIAL_LAYOUT[square_of(_x, 7)] = ('炮', 'red')
+for _x, _name in enumerate(['车', '马', '相', '仕', '帅', '仕', '相', '马', '车']):
+    INITIAL_LAYOUT[square_of(_x, 9)] = (_name, 'red')
+
+
+def _inferred_code(sq):
+    # 180字符格式只记录占位：开局位置上的棋子按开局布局推断，其余为按半场划分所属方的未知棋子
+    if sq in INITIAL_LAYOUT:
+        name, side = INITIAL_LAYOUT[sq]
+        return make_code(NAME_TO_KIND[name], side)
+    return make_code(UNKNOWN, 'black' if sq % 10 <= 4 else 'red')
+
+
+# 格子 -> 从180字符格式加载时推断出的棋子编码（与 ChessBoard.load_from_string 一致）
+INFERRED_CODES = [_inferred_code(_sq) for _sq in range(90)]
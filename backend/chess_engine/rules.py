@@ -1,30 +1,204 @@
+from .pieces import (
+    KING, ADVISOR, ELEPHANT, HORSE, ROOK, CANNON, PAWN,
+    EMPTY, KIND_MASK, BLACK_FLAG, SIDE_FLAGS, make_code, opponent,
+)
+
+RED_KING = make_code(KING, 'red')
+BLACK_KING = make_code(KING, 'black')
+
+
+class _MovedSquares:
+    """
+    走一步之后的格子视图：to_sq 上是走动的棋子，from_sq 为空，其余格子读原棋盘
+    单步校验在视图上反查攻击者，既不复制棋盘也不修改棋盘（缓存中的棋盘被多个请求线程共享，不能临时走棋）
+    """
+    __slots__ = ('squares', 'from_sq', 'to_sq', 'moving')
+
+    def __init__(self, squares, from_sq, to_sq):
+        self.squares = squares
+        self.from_sq = from_sq
+        self.to_sq = to_sq
+        self.moving = squares[from_sq]
+
+    def __getitem__(self, sq):
+        if sq == self.to_sq:
+            return self.moving
+        if sq == self.from_sq:
+            return EMPTY
+        return self.squares[sq]
+
+
+def _on_board(x, y):
+    return 0 <= x < 9 and 0 <= y < 10
+
+
+def _in_palace(x, y, side):
+    if side == 'red':
+        return 3 <= x <= 5 and 7 <= y <= 9
+    return 3 <= x <= 5 and 0 <= y <= 2
+
+
+def _build_move_tables():
+    """
+    预计算每个格子（sq = x * 10 + y）上各兵种的走法表
+    规则与 ChessRules._validate_*_move 完全一致
+    """
+    horse_moves = []
+    rays = []
+    elephant_moves = {'red': [], 'black': []}
+    advisor_moves = {'red': [], 'black': []}
+    king_moves = {'red': [], 'black': []}
+    pawn_moves = {'red': [], 'black': []}
+
+    for sq in range(90):
+        x, y = divmod(sq, 10)
+
+        # 马：(目标格, 马腿格)
+        horse = []
+        for dx, dy in ((2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (-1, 2), (1, -2), (-1, -2)):
+            tx, ty = x + dx, y + dy
+            if not _on_board(tx, ty):
+                continue
+            if abs(dx) == 2:
+                leg = (x + dx // 2) * 10 + y
+            else:
+                leg = x * 10 + (y + dy // 2)
+            horse.append((tx * 10 + ty, leg))
+        horse_moves.append(tuple(horse))
+
+        # 车/炮：上下左右四条射线，由近及远
+        sq_rays = []
+        for dx, dy in ((0, -1), (0, 1), (-1, 0), (1, 0)):
+            ray = []
+            tx, ty = x + dx, y + dy
+            while _on_board(tx, ty):
+                ray.append(tx * 10 + ty)
+                tx, ty = tx + dx, ty + dy
+            if ray:
+                sq_rays.append(tuple(ray))
+        rays.append(tuple(sq_rays))
+
+        for side in ('red', 'black'):
+            # 相/象：(目标格, 象眼格)，不能过河
+            elephant = []
+            for dx, dy in ((2, 2), (2, -2), (-2, 2), (-2, -2)):
+                tx, ty = x + dx, y + dy
+                if not _on_board(tx, ty):
+                    continue
+                if (side == 'red' and ty < 5) or (side == 'black' and ty > 4):
+                    continue
+                elephant.append((tx * 10 + ty, (x + dx // 2) * 10 + (y + dy // 2)))
+            elephant_moves[side].append(tuple(elephant))
+
+            # 仕/士：斜走一格，目标在九宫内
+            advisor_moves[side].append(tuple(
+                (x + dx) * 10 + (y + dy)
+                for dx, dy in ((1, 1), (1, -1), (-1, 1), (-1, -1))
+                if _in_palace(x + dx, y + dy, side)
+            ))
+
+            # 帅/将：直走一格，目标在九宫内
+            king_moves[side].append(tuple(
+                (x + dx) * 10 + (y + dy)
+                for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                if _in_palace(x + dx, y + dy, side)
+            ))
+
+            # 兵/卒：未过河只能前进，过河后可左右移动
+            forward = -1 if side == 'red' else 1
+            crossed = y <= 4 if side == 'red' else y >= 5
+            steps = [(0, forward)]
+            if crossed:
+                steps += [(-1, 0), (1, 0)]
+            pawn_moves[side].append(tuple(
+                (x + dx) * 10 + (y + dy) for dx, dy in steps if _on_board(x + dx, y + dy)
+            ))
+
+    return horse_moves, rays, elephant_moves, advisor_moves, king_moves, pawn_moves
+
+
+HORSE_MOVES, RAYS, ELEPHANT_MOVES, ADVISOR_MOVES, KING_MOVES, PAWN_MOVES = _build_move_tables()
+
+
+def _build_source_tables():
+    """
+    反向走法表：目标格 -> 能一步走到该格的出发格
+    马、相/象附带阻挡格（马腿/象眼），用于从某个格子反查攻击者
+    """
+    horse_sources = [[] for _ in range(90)]
+    for from_sq, sq_moves in enumerate(HORSE_MOVES):
+        for to_sq, leg in sq_moves:
+            horse_sources[to_sq].append((from_sq, leg))
+
+    elephant_sources = {}
+    advisor_sources = {}
+    king_sources = {}
+    pawn_sources = {}
+    for side in ('red', 'black'):
+        elephant_sources[side] = [[] for _ in range(90)]
+        for from_sq, sq_moves in enumerate(ELEPHANT_MOVES[side]):
+            for to_sq, eye in sq_moves:
+                elephant_sources[side][to_sq].append((from_sq, eye))
+        for table, sources in ((ADVISOR_MOVES, advisor_sources), (KING_MOVES, king_sources),
+                               (PAWN_MOVES, pawn_sources)):
+            sources[side] = [[] for _ in range(90)]
+            for from_sq, targets in enumerate(table[side]):
+                for to_sq in targets:
+                    sources[side][to_sq].append(from_sq)
+
+    return horse_sources, elephant_sources, advisor_sources, king_sources, pawn_sources
+
+
+HORSE_SOURCES, ELEPHANT_SOURCES, ADVISOR_SOURCES, KING_SOURCES, PAWN_SOURCES = _build_source_tables()
+
+
 class ChessRules:
     @staticmethod
-    def check_game_over(board):
+    def check_game_over(board, side_to_move=None):
         """
         检查游戏是否结束
-        返回: {'game_over': bool, 'winner': str or None}
+        side_to_move: 轮到走棋的一方；给出时还会判断该方是否被将死或困毙（无棋可走判负）
+        返回: {'game_over': bool, 'winner': str or None,
+               'reason': 'king_captured' | 'checkmate' | 'stalemate' | None, 'in_check': bool}
         """
-        # 检查红方的帅是否还在棋盘上
-        red_king_exists = False
-        # 检查黑方的将是否还在棋盘上
-        black_general_exists = False
-
-        for piece in board.pieces:
-            # 只检查未被吃掉的棋子（坐标不是99,99）
-            if piece['x'] != 99 and piece['y'] != 99:
-                if piece['name'] == '帅' and piece['type'] == 'red':
-                    red_king_exists = True
-                elif piece['name'] == '将' and piece['type'] == 'black':
-                    black_general_exists = True
-
-        # 判断胜利条件
-        if not red_king_exists:
-            return {'game_over': True, 'winner': 'black'}
-        elif not black_general_exists:
-            return {'game_over': True, 'winner': 'red'}
-        else:
-            return {'game_over': False, 'winner': None}
+        # 帅/将的位置随走棋增量维护，不需要扫描棋子
+        if board.king_squares['red'] < 0:
+            return {'game_over': True, 'winner': 'black', 'reason': 'king_captured', 'in_check': False}
+        if board.king_squares['black'] < 0:
+            return {'game_over': True, 'winner': 'red', 'reason': 'king_captured', 'in_check': False}
+        if side_to_move is None:
+            return {'game_over': False, 'winner': None, 'reason': None, 'in_check': False}
+
+        in_check = ChessRules.in_check(board, side_to_move)
+        if not ChessRules.has_legal_move(board, side_to_move):
+            return {
+                'game_over': True,
+                'winner': opponent(side_to_move),
+                'reason': 'checkmate' if in_check else 'stalemate',
+                'in_check': in_check
+            }
+        return {'game_over': False, 'winner': None, 'reason': None, 'in_check': in_check}
+
+    @staticmethod
+    def in_check(board, side):
+        """side 方的帅/将是否正被将军（含帅将对脸）"""
+        king_sq = board.king_squares[side]
+        if king_sq < 0:
+            return False
+        enemy = opponent(side)
+        return ChessRules._king_exposed(board.squares, king_sq, board.king_squares[enemy], enemy)
+
+    @staticmethod
+    def is_square_attacked(board, sq, by_side):
+        """sq 是否受到 by_side 方棋子的攻击（从该格反查攻击者，不扫描整个棋盘）"""
+        return ChessRules._is_attacked(board.squares, sq, by_side)
+
+    @staticmethod
+    def has_legal_move(board, side):
+        """side 方是否至少有一步合法走法（找到第一步即返回）"""
+        for _ in ChessRules._iter_legal_moves(board, side):
+            return True
+        return False
 
     @staticmethod
     def is_valid_move(board, from_x, from_y, to_x, to_y):
@@ -51,24 +225,24 @@ class ChessRules:
 
         # 检查目标位置是否有己方棋子
         target_piece = board.get_piece_at(to_x, to_y)
-        if target_piece and target_piece['type'] == piece['type']:
+        if target_piece and target_piece.type == piece.type:
             return {'valid': False, 'reason': '不能吃掉己方棋子'}
 
         # 根据棋子类型验证移动规则
-        piece_name = piece['name']
+        piece_name = piece.name
 
         if piece_name in ['车']:
             valid = ChessRules._validate_rook_move(board, from_x, from_y, to_x, to_y)
         elif piece_name in ['马']:
             valid = ChessRules._validate_horse_move(board, from_x, from_y, to_x, to_y)
         elif piece_name in ['相', '象']:
-            valid = ChessRules._validate_elephant_move(board, from_x, from_y, to_x, to_y, piece['type'])
+            valid = ChessRules._validate_elephant_move(board, from_x, from_y, to_x, to_y, piece.type)
         elif piece_name in ['仕', '士']:
-            valid = ChessRules._validate_advisor_move(board, from_x, from_y, to_x, to_y, piece['type'])
+            valid = ChessRules._validate_advisor_move(board, from_x, from_y, to_x, to_y, piece.type)
         elif piece_name in ['帅', '将']:
-            valid = ChessRules._validate_king_move(board, from_x, from_y, to_x, to_y, piece['type'])
+            valid = ChessRules._validate_king_move(board, from_x, from_y, to_x, to_y, piece.type)
         elif piece_name in ['兵', '卒']:
-            valid = ChessRules._validate_pawn_move(board, from_x, from_y, to_x, to_y, piece['type'])
+            valid = ChessRules._validate_pawn_move(board, from_x, from_y, to_x, to_y, piece.type)
         elif piece_name in ['炮']:
             valid = ChessRules._validate_cannon_move(board, from_x, from_y, to_x, to_y)
         else:
@@ -81,8 +255,318 @@ class ChessRules:
         if not ChessRules._check_kings_facing(board, from_x, from_y, to_x, to_y):
             return {'valid': False, 'reason': '帅将不能在同一列上直接相对'}
 
+        # 走棋后己方帅/将不能处于被将军状态（吃掉对方帅/将即结束对局，不再检查）
+        from_sq = from_x * 10 + from_y
+        to_sq = to_x * 10 + to_y
+        own_king = board.king_squares[piece.type]
+        enemy = opponent(piece.type)
+        enemy_king = board.king_squares[enemy]
+        if own_king >= 0 and to_sq != enemy_king:
+            king_sq = to_sq if from_sq == own_king else own_king
+            if ChessRules._king_exposed(_MovedSquares(board.squares, from_sq, to_sq), king_sq, enemy_king, enemy):
+                return {'valid': False, 'reason': '走棋后己方帅将会被将军'}
+
         return {'valid': True, 'reason': '移动合法'}
     
+    @staticmethod
+    def generate_legal_moves(board, side, from_sq=None):
+        """
+        生成指定方的全部合法走法（结果与逐个调用 validate_move_with_reason 一致）
+        使用预计算走法表，车/炮沿射线直接扫描
+
+        Args:
+            board: ChessBoard
+            side: 'red' 或 'black'
+            from_sq: 只生成该格子（x * 10 + y）上棋子的走法，None 表示全部棋子
+
+        Returns:
+            list: [(from_sq, to_sq), ...]，按棋子顺序、目标格升序排列
+        """
+        return list(ChessRules._iter_legal_moves(board, side, from_sq))
+
+    @staticmethod
+    def _iter_legal_moves(board, side, from_sq=None):
+        side_flag = SIDE_FLAGS[side]
+        enemy = opponent(side)
+        own_king = board.king_squares[side]
+        enemy_king = board.king_squares[enemy]
+        # 在格子编码的副本上模拟走法，不修改棋盘本身（棋盘可能被多个请求共享）
+        scratch = bytearray(board.squares)
+
+        for piece in board.side_pieces[side]:
+            if piece.x == 99:
+                continue
+            sq = piece.x * 10 + piece.y
+            if from_sq is not None and sq != from_sq:
+                continue
+            targets = ChessRules._piece_targets(scratch, sq, piece.code, side, side_flag)
+            targets.sort()
+            for to_sq in targets:
+                if ChessRules._is_legal_on(scratch, sq, to_sq, own_king, enemy_king, enemy):
+                    yield sq, to_sq
+
+    @staticmethod
+    def _is_legal_on(squares, from_sq, to_sq, own_king, enemy_king, enemy):
+        """
+        在 squares 上模拟走法，判断走后己方帅/将是否安全（不被将军、不与对方帅将对脸）
+        squares 会被临时修改并在返回前恢复
+        """
+        # 吃掉对方帅/将即结束对局；己方帅/将已不在棋盘上时无需检查
+        if to_sq == enemy_king or own_king < 0:
+            return True
+
+        moving = squares[from_sq]
+        captured = squares[to_sq]
+        squares[to_sq] = moving
+        squares[from_sq] = EMPTY
+        king_sq = to_sq if from_sq == own_king else own_king
+        exposed = ChessRules._king_exposed(squares, king_sq, enemy_king, enemy)
+        squares[from_sq] = moving
+        squares[to_sq] = captured
+        return not exposed
+
+    @staticmethod
+    def _king_exposed(squares, king_sq, enemy_king, enemy):
+        """位于 king_sq 的帅/将是否被 enemy 方攻击或与对方帅/将对脸"""
+        if enemy_king >= 0 and king_sq // 10 == enemy_king // 10:
+            for sq in range(min(king_sq, enemy_king) + 1, max(king_sq, enemy_king)):
+                if squares[sq]:
+                    break
+            else:
+                return True
+        return ChessRules._is_attacked(squares, king_sq, enemy)
+
+    @staticmethod
+    def _is_attacked(squares, sq, by_side):
+        """从 sq 出发沿射线和反向走法表查找 by_side 方的攻击者"""
+        flag = SIDE_FLAGS[by_side]
+
+        # 车：射线上的第一个棋子；炮：射线上炮架后的第一个棋子
+        rook = ROOK | flag
+        cannon = CANNON | flag
+        for ray in RAYS[sq]:
+            screened = False
+            for target_sq in ray:
+                target = squares[target_sq]
+                if target:
+                    if screened:
+                        if target == cannon:
+                            return True
+                        break
+                    if target == rook:
+                        return True
+                    screened = True
+
+        horse = HORSE | flag
+        for from_sq, leg in HORSE_SOURCES[sq]:
+            if squares[from_sq] == horse and not squares[leg]:
+                return True
+
+        pawn = PAWN | flag
+        for from_sq in PAWN_SOURCES[by_side][sq]:
+            if squares[from_sq] == pawn:
+                return True
+
+        king = KING | flag
+        for from_sq in KING_SOURCES[by_side][sq]:
+            if squares[from_sq] == king:
+                return True
+
+        advisor = ADVISOR | flag
+        for from_sq in ADVISOR_SOURCES[by_side][sq]:
+            if squares[from_sq] == advisor:
+                return True
+
+        elephant = ELEPHANT | flag
+        for from_sq, eye in ELEPHANT_SOURCES[by_side][sq]:
+            if squares[from_sq] == elephant and not squares[eye]:
+                return True
+
+        return False
+
+    @staticmethod
+    def generate_bitboard_moves(bitboard, side):
+        """
+        位棋盘版本的合法走法生成，规则与 generate_legal_moves 一致
+        （检查走后帅/将安全时会临时修改位棋盘，返回前恢复）
+
+        Args:
+            bitboard: BitBoard
+            side: 'red' 或 'black'
+
+        Returns:
+            list: [(from_sq, to_sq), ...]
+        """
+        from .bitboard import ADVISOR_TARGETS, KING_TARGETS, PAWN_TARGETS, iter_squares
+
+        pieces = bitboard.pieces
+        side_flag = SIDE_FLAGS[side]
+        own = bitboard.side_occupancy(side)
+        enemy = bitboard.occupied ^ own
+        enemy_side = opponent(side)
+        own_king = bitboard.king_square(side)
+        enemy_king = bitboard.king_square(enemy_side)
+
+        moves = []
+        for kind in (ROOK, CANNON, HORSE, ELEPHANT, ADVISOR, KING, PAWN):
+            for sq in iter_squares(pieces[kind | side_flag]):
+                if kind == ROOK:
+                    targets = bitboard.rook_attacks(sq)
+                elif kind == CANNON:
+                    targets = (bitboard.rook_attacks(sq) & ~bitboard.occupied) | (bitboard.cannon_attacks(sq) & enemy)
+                elif kind == HORSE:
+                    targets = bitboard.horse_attacks(sq)
+                elif kind == ELEPHANT:
+                    targets = bitboard.elephant_attacks(sq, side)
+                elif kind == ADVISOR:
+                    targets = ADVISOR_TARGETS[side][sq]
+                elif kind == KING:
+                    targets = KING_TARGETS[side][sq]
+                else:
+                    targets = PAWN_TARGETS[side][sq]
+
+                for to_sq in iter_squares(targets & ~own):
+                    # 吃掉对方帅/将即结束对局；否则在位棋盘上试走，检查己方帅/将是否安全
+                    if to_sq == enemy_king or own_king < 0:
+                        moves.append((sq, to_sq))
+                        continue
+                    captured = bitboard.make_move(sq, to_sq)
+                    king_sq = to_sq if sq == own_king else own_king
+                    exposed = ChessRules._bitboard_king_exposed(bitboard, king_sq, enemy_side)
+                    bitboard.unmake_move(sq, to_sq, captured)
+                    if not exposed:
+                        moves.append((sq, to_sq))
+        return moves
+
+    @staticmethod
+    def _bitboard_king_exposed(bitboard, king_sq, enemy):
+        """位于 king_sq 的帅/将是否被攻击；车的攻击线上首先碰到对方帅/将即为对脸"""
+        enemy_king = bitboard.pieces[KING | SIDE_FLAGS[enemy]]
+        return bool(bitboard.rook_attacks(king_sq) & enemy_king) or \
+            ChessRules.is_square_attacked_bitboard(bitboard, king_sq, enemy)
+
+    @staticmethod
+    def is_square_attacked_bitboard(bitboard, sq, by_side):
+        """
+        判断 sq 是否受到 by_side 方棋子的攻击（位棋盘查表，不含帅将对脸）
+        """
+        from .bitboard import ADVISOR_ATTACKERS, KING_ATTACKERS, PAWN_ATTACKERS
+
+        pieces = bitboard.pieces
+        flag = SIDE_FLAGS[by_side]
+        return bool(
+            (bitboard.rook_attacks(sq) & pieces[ROOK | flag])
+            or (bitboard.cannon_attacks(sq) & pieces[CANNON | flag])
+            or (bitboard.horse_attackers(sq) & pieces[HORSE | flag])
+            or (PAWN_ATTACKERS[by_side][sq] & pieces[PAWN | flag])
+            or (KING_ATTACKERS[by_side][sq] & pieces[KING | flag])
+            or (ADVISOR_ATTACKERS[by_side][sq] & pieces[ADVISOR | flag])
+            or (bitboard.elephant_attackers(sq, by_side) & pieces[ELEPHANT | flag])
+        )
+
+    @staticmethod
+    def bitboard_attack_map(bitboard, side):
+        """
+        side 方所有棋子攻击到的格子掩码，即在该格放上敌子就能被吃掉的格子
+        （包括己方棋子所在的格子，不含帅将对脸）
+        """
+        from .bitboard import ADVISOR_TARGETS, KING_TARGETS, PAWN_TARGETS, iter_squares
+
+        pieces = bitboard.pieces
+        flag = SIDE_FLAGS[side]
+        attacks = 0
+        for sq in iter_squares(pieces[ROOK | flag]):
+            attacks |= bitboard.rook_attacks(sq)
+        for sq in iter_squares(pieces[CANNON | flag]):
+            attacks |= bitboard.cannon_zone(sq)
+        for sq in iter_squares(pieces[HORSE | flag]):
+            attacks |= bitboard.horse_attacks(sq)
+        for sq in iter_squares(pieces[ELEPHANT | flag]):
+            attacks |= bitboard.elephant_attacks(sq, side)
+        for sq in iter_squares(pieces[ADVISOR | flag]):
+            attacks |= ADVISOR_TARGETS[side][sq]
+        for sq in iter_squares(pieces[KING | flag]):
+            attacks |= KING_TARGETS[side][sq]
+        for sq in iter_squares(pieces[PAWN | flag]):
+            attacks |= PAWN_TARGETS[side][sq]
+        return attacks
+
+    @staticmethod
+    def _piece_targets(squares, sq, code, side, side_flag):
+        """按走法规则生成一个棋子的目标格（未检查帅将相对）"""
+        kind = code & KIND_MASK
+        targets = []
+
+        if kind == ROOK:
+            for ray in RAYS[sq]:
+                for to_sq in ray:
+                    target = squares[to_sq]
+                    if not target:
+                        targets.append(to_sq)
+                    else:
+                        if (target & BLACK_FLAG) != side_flag:
+                            targets.append(to_sq)
+                        break
+        elif kind == CANNON:
+            for ray in RAYS[sq]:
+                screened = False
+                for to_sq in ray:
+                    target = squares[to_sq]
+                    if not screened:
+                        if not target:
+                            targets.append(to_sq)
+                        else:
+                            screened = True  # 炮架
+                    elif target:
+                        if (target & BLACK_FLAG) != side_flag:
+                            targets.append(to_sq)
+                        break
+        elif kind == HORSE or kind == ELEPHANT:
+            table = HORSE_MOVES[sq] if kind == HORSE else ELEPHANT_MOVES[side][sq]
+            for to_sq, block_sq in table:
+                if squares[block_sq]:
+                    continue
+                target = squares[to_sq]
+                if not target or (target & BLACK_FLAG) != side_flag:
+                    targets.append(to_sq)
+        elif kind == ADVISOR or kind == KING or kind == PAWN:
+            if kind == ADVISOR:
+                table = ADVISOR_MOVES[side][sq]
+            elif kind == KING:
+                table = KING_MOVES[side][sq]
+            else:
+                table = PAWN_MOVES[side][sq]
+            for to_sq in table:
+                target = squares[to_sq]
+                if not target or (target & BLACK_FLAG) != side_flag:
+                    targets.append(to_sq)
+
+        return targets
+
+    @staticmethod
+    def _kings_face_after(squares, from_sq, to_sq, red_king, black_king):
+        """
+        判断走棋后帅将是否在同一列直接相对（不修改棋盘，只扫描帅将之间的格子）
+        red_king/black_king: 走棋前帅、将所在格子，-1 表示不在棋盘上
+        """
+        if red_king < 0 or black_king < 0 or to_sq == red_king or to_sq == black_king:
+            return False
+
+        moving = squares[from_sq]
+        if moving == RED_KING:
+            red_king = to_sq
+        elif moving == BLACK_KING:
+            black_king = to_sq
+
+        # 同一列的格子编号连续
+        if red_king // 10 != black_king // 10:
+            return False
+
+        for sq in range(min(red_king, black_king) + 1, max(red_king, black_king)):
+            if sq == to_sq or (sq != from_sq and squares[sq]):
+                return False
+        return True
+
     @staticmethod
     def _validate_rook_move(board, from_x, from_y, to_x, to_y):
         # 车：直线移动，不能越子
@@ -247,51 +731,8 @@ class ChessRules:
     def _check_kings_facing(board, from_x, from_y, to_x, to_y):
         """
         检查帅将相对规则：帅和将不能在同一列上直接相对（中间没有其他棋子阻挡）
+        帅将位置由棋盘增量维护，只需扫描两者之间的同一列格子
         """
-        # 创建临时棋盘状态来模拟移动后的情况
-        temp_board = [[None for _ in range(9)] for _ in range(10)]
-
-        # 复制当前棋盘状态
-        for y in range(10):
-            for x in range(9):
-                temp_board[y][x] = board.board[y][x]
-
-        # 执行移动
-        moving_piece = temp_board[from_y][from_x]
-        temp_board[from_y][from_x] = None
-        temp_board[to_y][to_x] = moving_piece
-
-        # 找到红方帅和黑方将的位置
-        red_king_pos = None
-        black_general_pos = None
-
-        for y in range(10):
-            for x in range(9):
-                piece = temp_board[y][x]
-                if piece:
-                    if piece['name'] == '帅' and piece['type'] == 'red':
-                        red_king_pos = (x, y)
-                    elif piece['name'] == '将' and piece['type'] == 'black':
-                        black_general_pos = (x, y)
-
-        # 如果找不到帅或将，说明已经被吃掉，不需要检查相对规则
-        if not red_king_pos or not black_general_pos:
-            return True
-
-        # 检查是否在同一列
-        if red_king_pos[0] == black_general_pos[0]:
-            # 在同一列，检查中间是否有棋子阻挡
-            col = red_king_pos[0]
-            start_y = min(red_king_pos[1], black_general_pos[1])
-            end_y = max(red_king_pos[1], black_general_pos[1])
-
-            # 检查中间是否有棋子
-            for y in range(start_y + 1, end_y):
-                if temp_board[y][col] is not None:
-                    return True  # 有棋子阻挡，允许移动
-
-            # 没有棋子阻挡，帅将相对，不允许移动
-            return False
-
-        # 不在同一列，允许移动
-        return True
+        return not ChessRules._kings_face_after(
+            board.squares, from_x * 10 + from_y, to_x * 10 + to_y,
+            board.king_squares['red'], board.king_squares['black'])
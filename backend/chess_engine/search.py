@@ -0,0 +1,461 @@
+"""
+alpha-beta 搜索
+历史数据和开局库都没有答案时，用搜索给出走法建议：负极大值 alpha-beta，逐层加深，
+走法排序：根节点按上一轮的分数，其余节点依次为置换表中的最佳走法、吃子（MVV-LVA）、杀手走法、历史启发分数；
+叶子节点做只吃子的静态搜索。传入置换表（transposition.TranspositionTable）时，内部节点的结果按局面键保存，
+同一次搜索的后续迭代和之后的搜索都可以复用。
+内部节点先用 ChessRules 的走法表生成伪合法走法，轮到某个走法时才检查是否送将，被剪掉的走法不必检查。
+搜索节点数达到预算（或超过时间限制）时停止，使用最后一轮完整搜索的结果。
+
+根节点按 top_k 个走法求精确分数（alpha 取当前第 k 好的分数），便于一次返回多个排好序的建议。
+
+parallel_search 把根节点走法轮流分给进程池中的多个进程（根节点拆分），各进程独立逐层加深，
+最后取所有进程都完成的最大深度合并结果。搜索是纯Python计算，同一进程内的线程受GIL限制不能并行；
+置换表也无法在进程间廉价共享，因此不采用共享置换表的 Lazy SMP，每个进程使用自己的置换表。
+
+用法（在 backend 目录下）:
+    python -m chess_engine.search                         # 对 perft 校验局面逐个搜索，输出深度、节点数、nps
+    python -m chess_engine.search --depth 5 --nodes 200000
+    python -m chess_engine.search --tt-mb 0                # 不使用置换表
+    python -m chess_engine.search --workers 1,2,4,8 --nodes 0   # 固定深度（不限节点）下 1-8 个进程的加速比
+    python -m chess_engine.search --fen "4k4/9/9/9/9/9/9/9/4R4/4K4 w"
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from .evaluation import MATERIAL_VALUES, evaluate_board
+from .pieces import KIND_MASK, SIDE_FLAGS, opponent
+from .rules import ChessRules
+from .transposition import EXACT, LOWER_BOUND, UPPER_BOUND, TranspositionTable
+from .zobrist import SIDE_KEY
+
+MATE_SCORE = 100000
+INFINITY = 10 * MATE_SCORE
+# 绝对值超过该值的分数表示将死，存入置换表时换算为相对当前节点的步数
+MATE_BOUND = MATE_SCORE - 1000
+
+# 吃子排序（MVV-LVA）用的子力价值，按棋子编码索引
+_VALUES = [MATERIAL_VALUES.get(_code & KIND_MASK, 0) for _code in range(32)]
+
+# side 方视角的静态评估（子力 + 位置分，ChessBoard 走棋时增量更新）
+evaluate = evaluate_board
+
+
+def pseudo_moves(board, side, captures_only=False):
+    """按走法规则生成 side 方的走法（未检查走后是否被将军/帅将对脸）"""
+    squares = board.squares
+    side_flag = SIDE_FLAGS[side]
+    moves = []
+    for piece in board.side_pieces[side]:
+        if piece.x == 99:
+            continue
+        sq = piece.x * 10 + piece.y
+        for to_sq in ChessRules._piece_targets(squares, sq, piece.code, side, side_flag):
+            if not captures_only or squares[to_sq]:
+                moves.append((sq, to_sq))
+    return moves
+
+
+def is_legal(board, side, move):
+    """伪合法走法走后己方帅/将是否安全（与 generate_legal_moves 的判断一致）"""
+    enemy = opponent(side)
+    return ChessRules._is_legal_on(board.squares, move[0], move[1], board.king_squares[side],
+                                   board.king_squares[enemy], enemy)
+
+
+def position_key(board, side):
+    """置换表使用的局面键（区分走棋方）"""
+    return board.zobrist_key ^ SIDE_KEY if side == 'black' else board.zobrist_key
+
+
+def _score_to_tt(score, ply):
+    # 将死分数以"从根节点起的步数"计，存入置换表时改为"从当前节点起的步数"，换个路径遇到时仍然正确
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def _score_from_tt(score, ply):
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+def move_string(from_sq, to_sq):
+    return f"{from_sq // 10}{from_sq % 10}{to_sq // 10}{to_sq % 10}"
+
+
+class SearchAborted(Exception):
+    """节点预算或时间用尽"""
+
+
+class Searcher:
+    """
+    一次搜索的状态（杀手走法、历史表、节点计数）
+    搜索会在传入的棋盘上 make_move/unmake_move，结束（包括中止）后棋盘恢复原状；不要传入缓存中共享的棋盘
+    """
+
+    def __init__(self, max_depth=4, node_budget=20000, time_limit=None, tt=None):
+        self.max_depth = max_depth
+        self.node_budget = node_budget
+        self.time_limit = time_limit
+        self.tt = tt
+        self.nodes = 0
+        self.iterations = []  # 每一轮完整搜索的 (深度, [(分数, 走法), ...])
+        self._deadline = None
+        self._killers = []
+        self._history = [0] * 8100
+
+    def _visit(self):
+        self.nodes += 1
+        if self.node_budget is not None and self.nodes > self.node_budget:
+            raise SearchAborted()
+        if self._deadline is not None and self.nodes & 1023 == 0 and time.perf_counter() > self._deadline:
+            raise SearchAborted()
+
+    def _order(self, board, moves, ply, first=None):
+        """走法排序：置换表中的最佳走法、吃子（被吃子价值高、吃子方价值低优先）、杀手走法、历史分数"""
+        squares = board.squares
+        killers = self._killers[ply] if ply < len(self._killers) else ()
+        history = self._history
+
+        def key(move):
+            if move == first:
+                return 1 << 30
+            from_sq, to_sq = move
+            victim = squares[to_sq]
+            if victim:
+                return (1 << 28) + _VALUES[victim] * 64 - _VALUES[squares[from_sq]]
+            if move in killers:
+                return 1 << 27
+            return history[from_sq * 90 + to_sq]
+
+        return sorted(moves, key=key, reverse=True)
+
+    def _remember(self, move, ply, depth):
+        """不吃子的走法造成剪枝：记为杀手走法并增加历史分数"""
+        while len(self._killers) <= ply:
+            self._killers.append([])
+        killers = self._killers[ply]
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        self._history[move[0] * 90 + move[1]] += depth * depth
+
+    def _negamax(self, board, side, depth, alpha, beta, ply):
+        if depth <= 0:
+            return self._quiesce(board, side, alpha, beta, ply)
+        self._visit()
+
+        tt = self.tt
+        tt_move = None
+        if tt is not None:
+            key = position_key(board, side)
+            entry = tt.probe(key)
+            if entry is not None:
+                entry_depth, entry_score, bound, tt_move = entry
+                if entry_depth >= depth:
+                    score = _score_from_tt(entry_score, ply)
+                    if (bound == EXACT or (bound == LOWER_BOUND and score >= beta)
+                            or (bound == UPPER_BOUND and score <= alpha)):
+                        return score
+
+        enemy = opponent(side)
+        squares = board.squares
+        original_alpha = alpha
+        best = -INFINITY
+        best_move = None
+        # 置换表中的走法只用于排序，只有出现在本局面生成的走法中才会被搜索
+        for move in self._order(board, pseudo_moves(board, side), ply, tt_move):
+            if not is_legal(board, side, move):
+                continue
+            capture = squares[move[1]]
+            undo = board.make_move(*move)
+            try:
+                score = -self._negamax(board, enemy, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                board.unmake_move(undo)
+            if score > best:
+                best = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    if not capture:
+                        self._remember(move, ply, depth)
+                    break
+        if best == -INFINITY:
+            # 没有合法走法：被将死或困毙都判负，越早越差
+            best = -MATE_SCORE + ply
+        if tt is not None:
+            if best >= beta:
+                bound = LOWER_BOUND
+            elif best > original_alpha:
+                bound = EXACT
+            else:
+                bound = UPPER_BOUND
+            tt.store(key, depth, _score_to_tt(best, ply), bound, best_move)
+        return best
+
+    def _quiesce(self, board, side, alpha, beta, ply):
+        self._visit()
+        stand_pat = evaluate(board, side)
+        if stand_pat >= beta:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        enemy = opponent(side)
+        for move in self._order(board, pseudo_moves(board, side, captures_only=True), ply):
+            if not is_legal(board, side, move):
+                continue
+            undo = board.make_move(*move)
+            try:
+                score = -self._quiesce(board, enemy, -beta, -alpha, ply + 1)
+            finally:
+                board.unmake_move(undo)
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+        return alpha
+
+    def _search_root(self, board, side, depth, root_moves, top_k):
+        """对根节点走法逐个搜索，返回 [(分数, 走法), ...]（按分数降序）；中止时抛出 SearchAborted"""
+        enemy = opponent(side)
+        scored = []
+        for move in root_moves:
+            # alpha 取当前第 top_k 好的分数，保证前 top_k 个走法的分数是精确的
+            alpha = -INFINITY
+            if len(scored) >= top_k:
+                alpha = sorted((score for score, _ in scored), reverse=True)[top_k - 1]
+            undo = board.make_move(*move)
+            try:
+                score = -self._negamax(board, enemy, depth - 1, -INFINITY, -alpha, 1)
+            finally:
+                board.unmake_move(undo)
+            scored.append((score, move))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return scored
+
+    def search(self, board, side, top_k=1, root_moves=None):
+        """
+        逐层加深搜索（root_moves 给出时只搜索这些根节点走法，供根节点拆分使用）
+
+        Returns:
+            dict: {'best_move', 'score', 'depth'（完整搜索的深度）, 'nodes', 'seconds', 'nps',
+                   'moves': [{'move', 'score'}, ...]（前 top_k 个，按分数降序）, 'aborted'}
+                  没有合法走法时 best_move 为 None
+        """
+        start = time.perf_counter()
+        self.nodes = 0
+        if self.tt is not None:
+            self.tt.new_search()
+        self._deadline = start + self.time_limit if self.time_limit else None
+        top_k = max(1, top_k)
+
+        if root_moves is None:
+            root_moves = ChessRules.generate_legal_moves(board, side)
+        root_moves = self._order(board, root_moves, 0)
+        self.iterations = []
+        scored = []
+        completed_depth = 0
+        aborted = False
+        for depth in range(1, self.max_depth + 1):
+            try:
+                scored = self._search_root(board, side, depth, root_moves, top_k)
+            except SearchAborted:
+                aborted = True
+                break
+            completed_depth = depth
+            self.iterations.append((depth, scored))
+            # 下一轮先搜本轮分数高的走法
+            root_moves = [move for _, move in scored]
+            if scored and abs(scored[0][0]) >= MATE_SCORE - 100:
+                break
+
+        if not scored:
+            # 第一轮都没有完成：按排序给出走法，不带分数
+            scored = [(None, move) for move in root_moves]
+
+        seconds = time.perf_counter() - start
+        moves = [{'move': move_string(*move), 'score': score} for score, move in scored[:top_k]]
+        return {
+            'best_move': moves[0]['move'] if moves else None,
+            'score': moves[0]['score'] if moves else None,
+            'depth': completed_depth,
+            'nodes': self.nodes,
+            'seconds': seconds,
+            'nps': self.nodes / seconds if seconds > 0 else 0.0,
+            'moves': moves,
+            'aborted': aborted,
+        }
+
+
+def search(board, side, top_k=1, max_depth=4, node_budget=20000, time_limit=None, tt=None):
+    """在棋盘副本上搜索 side 方的最佳走法，参数和返回值见 Searcher.search"""
+    return Searcher(max_depth, node_budget, time_limit, tt).search(board.copy(), side, top_k)
+
+
+_worker_tt = None
+_shared_executor = None
+_shared_workers = 0
+_executor_lock = threading.Lock()
+
+
+def _search_root_subset(fen, side, root_moves, top_k, max_depth, node_budget, time_limit, tt_mb):
+    """进程池任务：只搜索部分根节点走法，返回每一轮完整搜索的结果（置换表在同一进程的任务间复用）"""
+    global _worker_tt
+    from .board import ChessBoard
+
+    tt = None
+    if tt_mb:
+        if _worker_tt is None or _worker_tt.size_mb != tt_mb:
+            _worker_tt = TranspositionTable(tt_mb)
+        tt = _worker_tt
+    searcher = Searcher(max_depth, node_budget, time_limit, tt)
+    result = searcher.search(ChessBoard(fen), side, top_k, root_moves)
+    return {'iterations': searcher.iterations, 'nodes': result['nodes'], 'aborted': result['aborted']}
+
+
+def shared_executor(workers):
+    """
+    进程内共享的搜索进程池，需要更多进程时重建
+    使用 spawn 启动进程：Web 服务是多线程的，fork 出的子进程可能继承其他线程持有的锁
+    """
+    global _shared_executor, _shared_workers
+    with _executor_lock:
+        if _shared_executor is None or _shared_workers < workers:
+            if _shared_executor is not None:
+                _shared_executor.shutdown(wait=False)
+            _shared_executor = ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'))
+            _shared_workers = workers
+        return _shared_executor
+
+
+def parallel_search(board, side, top_k=1, max_depth=4, node_budget=20000, time_limit=None, workers=2,
+                    executor=None, tt_mb=16):
+    """
+    根节点拆分的多进程搜索
+    根节点走法排序后轮流分给 workers 个进程，node_budget 和 time_limit 按每个进程计算；
+    结果取所有进程都完成的最大深度（不同深度的分数不能比较）。executor 为 None 时临时创建进程池（同样用 spawn 启动）
+
+    Returns:
+        dict: 与 Searcher.search 相同，另有 'workers'（实际使用的进程数）
+    """
+    start = time.perf_counter()
+    root_moves = Searcher()._order(board, ChessRules.generate_legal_moves(board, side), 0)
+    workers = max(1, min(workers, len(root_moves)))
+    if workers == 1:
+        tt = TranspositionTable(tt_mb) if tt_mb else None
+        return dict(search(board, side, top_k, max_depth, node_budget, time_limit, tt), workers=1)
+
+    top_k = max(1, top_k)
+    fen = board.to_fen()
+    pool = executor or ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'))
+    try:
+        futures = [pool.submit(_search_root_subset, fen, side, root_moves[i::workers], top_k,
+                               max_depth, node_budget, time_limit, tt_mb)
+                   for i in range(workers)]
+        results = [future.result() for future in futures]
+    finally:
+        if executor is None:
+            pool.shutdown()
+
+    completed_depth = min(len(result['iterations']) for result in results)
+    if completed_depth:
+        scored = [item for result in results for item in result['iterations'][completed_depth - 1][1]]
+        scored.sort(key=lambda item: item[0], reverse=True)
+    else:
+        scored = [(None, move) for move in root_moves]
+
+    nodes = sum(result['nodes'] for result in results)
+    seconds = time.perf_counter() - start
+    moves = [{'move': move_string(*move), 'score': score} for score, move in scored[:top_k]]
+    return {
+        'best_move': moves[0]['move'] if moves else None,
+        'score': moves[0]['score'] if moves else None,
+        'depth': completed_depth,
+        'nodes': nodes,
+        'seconds': seconds,
+        'nps': nodes / seconds if seconds > 0 else 0.0,
+        'moves': moves,
+        'aborted': any(result['aborted'] for result in results),
+        'workers': workers,
+    }
+
+
+def _run_benchmark(positions, args, workers, tt):
+    from .board import ChessBoard
+    from .perft import position_board
+
+    total_nodes = 0
+    started = time.perf_counter()
+    for position in positions:
+        board = ChessBoard(position['fen']) if args.fen else position_board(position)
+        if workers > 1:
+            result = parallel_search(board, position['side'], 1, args.depth, args.nodes or None,
+                                     workers=workers, executor=shared_executor(workers), tt_mb=args.tt_mb)
+        else:
+            if tt is not None:
+                tt.clear()
+            result = search(board, position['side'], 1, args.depth, args.nodes or None, tt=tt)
+        total_nodes += result['nodes']
+        print(f"{position['name']:<10} 最佳 {result['best_move']}  分数 {result['score']}  深度 {result['depth']}"
+              f"{'（预算用尽）' if result['aborted'] else ''}  节点 {result['nodes']:>8}  "
+              f"{result['seconds']:7.3f}s  {result['nps']:>8.0f} nps")
+    return total_nodes, time.perf_counter() - started
+
+
+def main(argv=None):
+    from .codec import fen_side
+    from .perft import PERFT_POSITIONS
+
+    parser = argparse.ArgumentParser(description='alpha-beta 搜索基准')
+    parser.add_argument('--depth', type=int, default=4, help='最大深度（默认4）')
+    parser.add_argument('--nodes', type=int, default=100000, help='每个进程的节点预算（默认100000，0 表示不限制）')
+    parser.add_argument('--tt-mb', type=float, default=16, help='置换表大小MB（默认16，0 表示不使用）')
+    parser.add_argument('--workers', default='1', help='进程数，逗号分隔多个值时依次运行并输出加速比（默认1）')
+    parser.add_argument('--fen', help='只搜索该局面（FEN，走棋方字段缺省为红方）')
+    args = parser.parse_args(argv)
+
+    if args.fen:
+        positions = [{'name': 'FEN', 'fen': args.fen, 'side': fen_side(args.fen) or 'red'}]
+    else:
+        positions = PERFT_POSITIONS
+
+    tt = TranspositionTable(args.tt_mb) if args.tt_mb > 0 else None
+    worker_counts = [int(count) for count in args.workers.split(',')]
+    timings = []
+    for workers in worker_counts:
+        if len(worker_counts) > 1:
+            print(f"== {workers} 个进程 ==")
+        if workers > 1:
+            # 先把全部进程启动起来，进程启动不计入时间
+            list(shared_executor(workers).map(time.sleep, [0.1] * workers))
+        total_nodes, total_seconds = _run_benchmark(positions, args, workers, tt)
+        timings.append((workers, total_nodes, total_seconds))
+        print(f"合计 {total_nodes} 节点，{total_seconds:.3f}s，{total_nodes / total_seconds:.0f} nps")
+        if workers == 1 and tt is not None:
+            stats = tt.stats()
+            print(f"置换表 {stats['size_mb']}MB，{stats['entries']} 个槽位，最后一个局面命中率 {stats['hit_rate']:.1%}，"
+                  f"填充率 {stats['fill']:.1%}")
+
+    if len(timings) > 1:
+        base_seconds = timings[0][2]
+        print("进程数    节点数      用时    加速比")
+        for workers, total_nodes, total_seconds in timings:
+            print(f"{workers:>6} {total_nodes:>9} {total_seconds:8.3f}s {base_seconds / total_seconds:8.2f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,245 @@
+"""
+相似局面检索
+把索引中的所有180字符棋盘状态存为 N×90×2 的 uint8 矩阵（每格两个坐标数字），
+一次向量化比较算出目标局面与全部局面的相似度。
+
+相似度定义为两个180字符棋盘状态逐位比较时相同字符所占的比例（0.0-1.0），即相同数字数 / 180。
+
+局面很多时使用 ApproximateSimilarityIndex：把90位占位掩码切成若干段做多索引哈希，
+只对至少有一段（在 probe_radius 位翻转以内）与目标相同的局面精确计算相似度，查询代价随数据量亚线性增长。
+
+用法（在 backend 目录下）:
+    python -m chess_engine.similarity                     # 近似检索与精确扫描的召回率/延迟对比
+    python -m chess_engine.similarity --positions 200000 --radius 0 1 2
+"""
+
+import argparse
+import itertools
+import random
+import time
+
+import numpy as np
+
+BOARD_STRING_LENGTH = 180
+
+
+def _digits(data, count):
+    """把 count 个拼接在一起的180字符棋盘（bytes）转换为 count×90×2 的数字矩阵"""
+    return np.frombuffer(data, dtype=np.uint8).reshape(count, 90, 2) - 48
+
+
+class SimilarityIndex:
+    """一组棋盘状态的相似度检索矩阵（行顺序与 board_states 一致）"""
+
+    def __init__(self, board_states, matrix):
+        self.board_states = board_states
+        self.matrix = matrix
+
+    @classmethod
+    def from_board_states(cls, board_states):
+        """
+        根据棋盘状态列表构建索引
+        不是180位数字的状态与任何局面的相似度都为0，直接跳过
+        """
+        valid = [state for state in board_states
+                 if len(state) == BOARD_STRING_LENGTH and state.isdigit()]
+        if not valid:
+            return cls([], np.zeros((0, 90, 2), dtype=np.uint8))
+        return cls(valid, _digits("".join(valid).encode('ascii'), len(valid)))
+
+    def __len__(self):
+        return len(self.board_states)
+
+    def scores(self, board_state):
+        """
+        目标局面与每个已索引局面的相同字符数（0-180）
+
+        Returns:
+            numpy.ndarray: 长度 N 的整数数组
+        """
+        target = _digits(board_state.encode('ascii'), 1).reshape(BOARD_STRING_LENGTH)
+        flat = self.matrix.reshape(len(self.board_states), BOARD_STRING_LENGTH)
+        return (flat == target).sum(axis=1, dtype=np.int32)
+
+    def most_similar(self, board_state, count=1):
+        """
+        相似度最高的 count 个局面（结果中相似度相同的按索引中的顺序排列；count 为1时与逐个比较取第一个最大值一致）
+
+        Returns:
+            list: [(棋盘状态, 相似度0.0-1.0), ...]，按相似度降序
+        """
+        if not self.board_states or len(board_state) != BOARD_STRING_LENGTH or not board_state.isdigit():
+            return []
+        scores = self.scores(board_state)
+        if count == 1:
+            best = [int(np.argmax(scores))]
+        else:
+            count = min(count, len(scores))
+            candidates = np.argpartition(-scores, count - 1)[:count]
+            best = candidates[np.lexsort((candidates, -scores[candidates]))]
+        return [(self.board_states[i], float(scores[i]) / BOARD_STRING_LENGTH) for i in best]
+
+
+class ApproximateSimilarityIndex(SimilarityIndex):
+    """
+    多索引哈希（multi-index hashing）近似检索
+    占位掩码切成 chunks 段，每段按段值排序建表。两个局面占位的汉明距离小于 chunks * (probe_radius + 1) 时，
+    至少有一段的汉明距离不超过 probe_radius，因此一定会成为候选。
+    probe_radius 越大召回率越高、候选越多；没有候选时 exact_fallback 为真则退回精确扫描
+    """
+
+    def __init__(self, board_states, matrix, chunks=6, probe_radius=1, exact_fallback=True):
+        super().__init__(board_states, matrix)
+        self.chunks = chunks
+        self.probe_radius = probe_radius
+        self.exact_fallback = exact_fallback
+        self.last_candidates = 0
+
+        self._bounds = [(90 * c // chunks, 90 * (c + 1) // chunks) for c in range(chunks)]
+        occupancy = self._occupancy(matrix)
+        self._orders = []
+        self._sorted_keys = []
+        for low, high in self._bounds:
+            keys = self._chunk_keys(occupancy, low, high)
+            order = np.argsort(keys, kind='stable')
+            self._orders.append(order)
+            self._sorted_keys.append(keys[order])
+
+    @classmethod
+    def from_board_states(cls, board_states, chunks=6, probe_radius=1, exact_fallback=True):
+        exact = SimilarityIndex.from_board_states(board_states)
+        return cls(exact.board_states, exact.matrix, chunks, probe_radius, exact_fallback)
+
+    @staticmethod
+    def _occupancy(matrix):
+        # 坐标串首位为9（即 "99"）的位置为空位
+        return matrix[:, :, 0] != 9
+
+    @staticmethod
+    def _chunk_keys(occupancy, low, high):
+        weights = np.left_shift(np.int64(1), np.arange(high - low, dtype=np.int64))
+        return occupancy[:, low:high].astype(np.int64) @ weights
+
+    def _probes(self, key, width):
+        probes = [key]
+        for radius in range(1, self.probe_radius + 1):
+            for bits in itertools.combinations(range(width), radius):
+                flipped = key
+                for bit in bits:
+                    flipped ^= 1 << bit
+                probes.append(flipped)
+        return np.array(probes, dtype=np.int64)
+
+    def candidates(self, board_state):
+        """与目标至少有一段占位在 probe_radius 以内的局面下标（升序）"""
+        occupancy = self._occupancy(_digits(board_state.encode('ascii'), 1))
+        found = []
+        for (low, high), order, sorted_keys in zip(self._bounds, self._orders, self._sorted_keys):
+            probes = self._probes(int(self._chunk_keys(occupancy, low, high)[0]), high - low)
+            lefts = np.searchsorted(sorted_keys, probes, side='left')
+            rights = np.searchsorted(sorted_keys, probes, side='right')
+            for left, right in zip(lefts, rights):
+                if right > left:
+                    found.append(order[left:right])
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+    def most_similar(self, board_state, count=1):
+        if not self.board_states or len(board_state) != BOARD_STRING_LENGTH or not board_state.isdigit():
+            return []
+        rows = self.candidates(board_state)
+        self.last_candidates = len(rows)
+        if not len(rows):
+            return super().most_similar(board_state, count) if self.exact_fallback else []
+
+        target = _digits(board_state.encode('ascii'), 1).reshape(BOARD_STRING_LENGTH)
+        scores = (self.matrix[rows].reshape(len(rows), BOARD_STRING_LENGTH) == target).sum(axis=1, dtype=np.int32)
+        # 候选下标已升序，按相似度降序稳定排序后相同相似度保持索引顺序
+        best = np.argsort(-scores, kind='stable')[:count]
+        return [(self.board_states[rows[i]], float(scores[i]) / BOARD_STRING_LENGTH) for i in best]
+
+
+def build_index(board_states, approximate_threshold=None, probe_radius=1, matrix=None):
+    """
+    局面数达到 approximate_threshold 时构建近似索引，否则构建精确索引（None 表示始终精确）
+    matrix: 可选，已有的 N×90×2 数字矩阵（行与 board_states 对应，如 FrequencySnapshot.side_matrix），给出时不再解析 board_states
+    """
+    if matrix is None:
+        exact = SimilarityIndex.from_board_states(board_states)
+    else:
+        exact = SimilarityIndex(board_states, matrix)
+    if approximate_threshold is not None and len(exact) >= approximate_threshold:
+        return ApproximateSimilarityIndex(exact.board_states, exact.matrix, probe_radius=probe_radius)
+    return exact
+
+
+def _sample_positions(count, seed):
+    """随机对局采样局面（基准用）"""
+    from .board import ChessBoard
+    from .rules import ChessRules
+
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = ChessBoard()
+        side = 'red'
+        for _ in range(rng.randint(20, 120)):
+            moves = ChessRules.generate_legal_moves(board, side)
+            if not moves:
+                break
+            board.make_move(*rng.choice(moves))
+            side = 'black' if side == 'red' else 'red'
+            positions.append(board.to_string())
+            if len(positions) >= count:
+                break
+    return positions
+
+
+def benchmark(positions=50000, queries=200, radii=(0, 1, 2), seed=1):
+    """
+    近似检索与精确扫描对比
+
+    Returns:
+        list: [{'name', 'recall', 'ms_per_query', 'candidates'}, ...]，recall 为找到与精确扫描相同最高相似度的比例
+    """
+    states = _sample_positions(positions, seed)
+    targets = _sample_positions(queries, seed + 1)
+
+    exact = SimilarityIndex.from_board_states(states)
+    start = time.perf_counter()
+    truth = [exact.most_similar(target)[0][1] for target in targets]
+    results = [{'name': 'exact', 'recall': 1.0,
+                'ms_per_query': (time.perf_counter() - start) * 1000 / len(targets),
+                'candidates': len(states)}]
+
+    for radius in radii:
+        index = ApproximateSimilarityIndex.from_board_states(states, probe_radius=radius, exact_fallback=False)
+        hits = 0
+        candidates = 0
+        start = time.perf_counter()
+        for target, best in zip(targets, truth):
+            found = index.most_similar(target)
+            candidates += index.last_candidates
+            hits += bool(found) and found[0][1] == best
+        results.append({'name': f'approx r={radius}', 'recall': hits / len(targets),
+                         'ms_per_query': (time.perf_counter() - start) * 1000 / len(targets),
+                         'candidates': candidates / len(targets)})
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='相似局面近似检索基准')
+    parser.add_argument('--positions', type=int, default=50000, help='索引局面数（默认50000）')
+    parser.add_argument('--queries', type=int, default=200, help='查询局面数（默认200）')
+    parser.add_argument('--radius', type=int, nargs='+', default=[0, 1, 2], help='要测试的 probe_radius')
+    args = parser.parse_args(argv)
+
+    for row in benchmark(args.positions, args.queries, args.radius):
+        print(f"{row['name']:<12} 召回率 {row['recall']:6.1%}  {row['ms_per_query']:8.3f} ms/次  "
+              f"平均候选 {row['candidates']:10.0f}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
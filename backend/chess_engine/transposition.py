@@ -0,0 +1,128 @@
+"""
+置换表
+不同走法顺序会到达同一局面，置换表按 Zobrist 局面键保存已搜索局面的结果（深度、分数、边界类型、最佳走法），
+再次遇到时直接截断或先搜上次的最佳走法。
+
+表按给定的 MB 数一次性分配，之后不再增长：每个字段一个定长 array，按下标存取，没有逐条目的 Python 对象。
+每个桶两个槽位：
+    槽位0  深度优先：只被深度不低于它的结果（或上一次搜索留下的旧条目）替换，保留代价高的结果
+    槽位1  总是替换：保存最近的结果
+"""
+
+from array import array
+
+# 边界类型
+EXACT = 0
+LOWER_BOUND = 1  # 分数 >= 保存值（发生了 beta 截断）
+UPPER_BOUND = 2  # 分数 <= 保存值（没有走法超过 alpha）
+
+NO_MOVE = 0xFFFF
+
+# 每个槽位的字节数：键(Q) 深度(b) 分数(i) 边界(B) 走法(H) 搜索代数(B)
+ENTRY_BYTES = 8 + 1 + 4 + 1 + 2 + 1
+
+
+class TranspositionTable:
+    """
+    定长置换表（不加锁，同一时间只供一个搜索使用）
+    走法以 from_sq * 90 + to_sq 保存；深度为 -1 表示空槽位
+    """
+
+    def __init__(self, size_mb=16):
+        if size_mb <= 0:
+            raise ValueError("置换表大小必须为正数")
+        # 桶数取不超过容量的2的幂，用位与代替取模
+        buckets = max(1, int(size_mb * 1024 * 1024) // (2 * ENTRY_BYTES))
+        self.buckets = 1 << (buckets.bit_length() - 1)
+        self.size_mb = size_mb
+        self._mask = self.buckets - 1
+        slots = 2 * self.buckets
+        self._keys = array('Q', bytes(8 * slots))
+        self._depths = array('b', b'\xff' * slots)
+        self._scores = array('i', bytes(4 * slots))
+        self._bounds = array('B', bytes(slots))
+        self._moves = array('H', b'\xff\xff' * slots)
+        self._ages = array('B', bytes(slots))
+        self._age = 0
+        self.used = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def __len__(self):
+        return 2 * self.buckets
+
+    def new_search(self):
+        """开始新的一次搜索：之前的条目变为旧条目，深度优先槽位可以被替换"""
+        self._age = (self._age + 1) & 0xFF
+
+    def clear(self):
+        slots = 2 * self.buckets
+        self._keys = array('Q', bytes(8 * slots))
+        self._depths = array('b', b'\xff' * slots)
+        self._moves = array('H', b'\xff\xff' * slots)
+        self.used = 0
+        self.probes = self.hits = self.stores = self.overwrites = 0
+
+    def probe(self, key):
+        """
+        查找局面键
+
+        Returns:
+            tuple: (深度, 分数, 边界类型, 走法 (from_sq, to_sq) 或 None)；未命中时为 None
+        """
+        self.probes += 1
+        slot = (key & self._mask) << 1
+        keys = self._keys
+        if keys[slot] != key or self._depths[slot] < 0:
+            slot += 1
+            if keys[slot] != key or self._depths[slot] < 0:
+                return None
+        self.hits += 1
+        move = self._moves[slot]
+        return (self._depths[slot], self._scores[slot], self._bounds[slot],
+                divmod(move, 90) if move != NO_MOVE else None)
+
+    def store(self, key, depth, score, bound, move=None):
+        """保存搜索结果；move 为 (from_sq, to_sq) 或 None"""
+        self.stores += 1
+        slot = (key & self._mask) << 1
+        depths = self._depths
+        # 同一局面已在桶中时原地更新；否则深度不低于槽位0（或槽位0是旧条目/空槽位）时写入槽位0，再否则写入槽位1
+        if self._keys[slot] == key or depths[slot] <= depth or self._ages[slot] != self._age:
+            if self._keys[slot + 1] == key and depths[slot + 1] >= 0:
+                depths[slot + 1] = -1
+                self.used -= 1
+        else:
+            slot += 1
+
+        if depths[slot] < 0:
+            self.used += 1
+        elif self._keys[slot] != key:
+            self.overwrites += 1
+        if move is None and self._keys[slot] == key:
+            # 没有最佳走法时保留同一局面之前的走法，仍可用于排序
+            move_code = self._moves[slot]
+        else:
+            move_code = move[0] * 90 + move[1] if move is not None else NO_MOVE
+        self._keys[slot] = key
+        depths[slot] = min(depth, 127)
+        self._scores[slot] = score
+        self._bounds[slot] = bound
+        self._moves[slot] = move_code
+        self._ages[slot] = self._age
+
+    def stats(self):
+        slots = 2 * self.buckets
+        return {
+            'size_mb': self.size_mb,
+            'entries': slots,
+            'used': self.used,
+            'fill': round(self.used / slots, 4),
+            'probes': self.probes,
+            'hits': self.hits,
+            'hit_rate': round(self.hits / self.probes, 4) if self.probes else 0.0,
+            'stores': self.stores,
+            'overwrites': self.overwrites,
+        }
@@ -0,0 +1,50 @@
+"""
+Zobrist 局面哈希
+每个(棋子编码, 格子)对应一个固定的64位随机数，局面键是所有棋子对应随机数的异或。
+走一步棋只需异或进出的几个随机数，ChessBoard.make_move 据此增量更新 zobrist_key。
+局面键不包含轮到哪方走棋，需要区分时再异或 SIDE_KEY。
+"""
+
+import random
+
+from .pieces import CODE_COUNT, CODE_NAMES, INFERRED_CODES
+
+# 固定种子，保证不同进程、不同版本之间的键一致（可以持久化）
+_rng = random.Random(0x58514B45)
+
+ZOBRIST_TABLE = [
+    [_rng.getrandbits(64) if CODE_NAMES[code] else 0 for _ in range(90)]
+    for code in range(CODE_COUNT)
+]
+SIDE_KEY = _rng.getrandbits(64)
+
+
+def squares_key(squares):
+    """根据90格棋子编码计算局面键"""
+    key = 0
+    for sq, code in enumerate(squares):
+        if code:
+            key ^= ZOBRIST_TABLE[code][sq]
+    return key
+
+
+def position_key(board_string):
+    """
+    把180字符棋盘字符串直接映射为局面键，不需要构建 ChessBoard
+    结果与 ChessBoard(board_string).zobrist_key 相同
+    """
+    if len(board_string) != 180 or not board_string.isdigit():
+        raise ValueError("棋盘字符串必须为180个数字字符")
+
+    key = 0
+    seen = 0
+    for i in range(0, 180, 2):
+        x = ord(board_string[i]) - 48
+        y = ord(board_string[i + 1]) - 48
+        if 0 <= x < 9 and 0 <= y < 10:
+            sq = x * 10 + y
+            bit = 1 << sq
+            if not seen & bit:
+                seen |= bit
+                key ^= ZOBRIST_TABLE[INFERRED_CODES[sq]][sq]
+    return key
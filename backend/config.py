@@ -3,3 +3,28 @@ import os
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key'
     DEBUG = True
+    # 解析后局面的 LRU 缓存容量（按棋盘字符串缓存）
+    POSITION_CACHE_SIZE = int(os.environ.get('POSITION_CACHE_SIZE') or 1024)
+    # 是否在导入路由时就在后台线程中开始加载AI引擎（否则在第一次AI请求时才加载）
+    AI_ENGINE_PRELOAD = (os.environ.get('AI_ENGINE_PRELOAD') or '1') != '0'
+    # 某方历史局面数达到该值时，相似局面检索改用近似索引（多索引哈希）；探测半径越大召回率越高、查询越慢
+    SIMILARITY_ANN_THRESHOLD = int(os.environ.get('SIMILARITY_ANN_THRESHOLD') or 200000)
+    SIMILARITY_PROBE_RADIUS = int(os.environ.get('SIMILARITY_PROBE_RADIUS') or 1)
+    # AI建议/局面分析结果缓存容量（0 关闭）和条目存活秒数（0 表示不过期；重新加载频率数据时整体失效）
+    AI_RESULT_CACHE_SIZE = int(os.environ.get('AI_RESULT_CACHE_SIZE') or 4096)
+    AI_RESULT_CACHE_TTL = float(os.environ.get('AI_RESULT_CACHE_TTL') or 0) or None
+    # 管理接口（重新加载/合并增量频率数据）的令牌，请求头 X-Admin-Token 需与之一致；未配置时管理接口不可用
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN') or ''
+    # 每隔多少秒检查频率数据文件（JSON/快照）是否更新，更新后在后台重新加载AI引擎（0 关闭）
+    FREQUENCY_WATCH_INTERVAL = float(os.environ.get('FREQUENCY_WATCH_INTERVAL') or 0)
+    # 历史数据和开局库都没有可用走法时的 alpha-beta 搜索：最大深度（0 表示不搜索，按扫描顺序给出合法走法）和节点预算
+    SEARCH_MAX_DEPTH = int(os.environ.get('SEARCH_MAX_DEPTH') or 4)
+    SEARCH_NODE_BUDGET = int(os.environ.get('SEARCH_NODE_BUDGET') or 20000)
+    # 搜索共用的置换表大小（MB，启动时一次性分配；0 关闭）
+    SEARCH_TT_MB = float(os.environ.get('SEARCH_TT_MB') or 16)
+    # 搜索进程数：请求未指定 workers 时的默认值（1 表示在请求线程中搜索），以及请求可以指定的上限（默认CPU核数）
+    SEARCH_WORKERS = int(os.environ.get('SEARCH_WORKERS') or 1)
+    SEARCH_MAX_WORKERS = int(os.environ.get('SEARCH_MAX_WORKERS') or os.cpu_count() or 1)
+    # 开局库文件（由 python -m chess_engine.opening_book 生成），不存在时开局浏览接口不可用
+    OPENING_BOOK_PATH = os.environ.get('OPENING_BOOK_PATH') or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'opening_book.bin')
@@ -0,0 +1,75 @@
+import pytest
+
+import api.routes as routes
+from app import create_app
+from chess_engine.ai_suggestion import AIChessSuggestionEngine
+from chess_engine.board import ChessBoard
+
+# 红车不在开局位置：180字符格式会把它推断为未知棋子，FEN 保留了棋子身份
+MIDGAME_FEN = 'r3k4/9/9/9/9/R8/4P4/9/9/4K4 w'
+
+
+class _ReadyLoader:
+    def __init__(self, engine):
+        self.engine = engine
+
+    def start(self):
+        return self
+
+    def get(self):
+        return self.engine
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    engine = AIChessSuggestionEngine(str(tmp_path / 'missing.json'), search_depth=2)
+    monkeypatch.setattr(routes, 'ai_engine_loader', _ReadyLoader(engine))
+    return create_app().test_client()
+
+
+def test_suggestions_keep_fen_piece_identity(client):
+    data = client.post('/api/ai/get_suggestions', json={'board': MIDGAME_FEN, 'player': 'red'}).get_json()
+    assert data['status'] == 'success'
+    assert data['suggestions'][0]['move'] == '0500'
+    assert data['suggestions'][0]['piece_name'] == '车'
+
+
+def test_execute_move_returns_callers_format(client):
+    data = client.post('/api/ai/execute_move', json={'board': MIDGAME_FEN, 'player': 'red'}).get_json()
+    assert data['status'] == 'success' and data['move_executed'] == '0500'
+    assert data['new_board'] == 'R3k4/9/9/9/9/9/4P4/9/9/4K4 b'
+
+    packed = ChessBoard(MIDGAME_FEN).to_packed()
+    data = client.post('/api/ai/execute_move', json={'board': packed, 'player': 'red'}).get_json()
+    assert ChessBoard(data['new_board']).to_fen('black') == 'R3k4/9/9/9/9/9/4P4/9/9/4K4 b'
+
+
+def test_analysis_and_bad_fen(client):
+    data = client.post('/api/ai/analyze_board', json={'board': MIDGAME_FEN}).get_json()
+    assert data['evaluation'] == ChessBoard(MIDGAME_FEN).eval_score
+    assert client.post('/api/ai/get_suggestions', json={'board': 'rnbak/9 w'}).status_code == 400
+
+
+def test_frequency_recommend_passes_workers(tmp_path, monkeypatch):
+    engine = AIChessSuggestionEngine(str(tmp_path / 'missing.json'), search_depth=2, search_max_workers=2)
+    monkeypatch.setattr(routes, 'ai_engine_loader', _ReadyLoader(engine))
+    client = create_app().test_client()
+    data = client.post('/api/ai/frequency_recommend',
+                       json={'board': MIDGAME_FEN, 'side': 'red', 'workers': 2}).get_json()
+    assert data['status'] == 'success' and data['search']['workers'] == 2
+
+
+@pytest.mark.parametrize('body', [
+    {'top_k': [1]}, {'top_k': {'n': 1}}, {'top_k': 0}, {'top_k': 1000}, {'top_k': True}, {'top_k': '3'},
+    {'player': 'green'}, {'player': ['red']},
+])
+def test_suggestions_reject_bad_parameters(client, body):
+    response = client.post('/api/ai/get_suggestions', json=dict(body, board=MIDGAME_FEN))
+    assert response.status_code == 400 and response.get_json()['status'] == 'error'
+
+
+def test_ai_routes_reject_bad_side(client):
+    assert client.post('/api/ai/execute_move', json={'board': MIDGAME_FEN, 'player': 'blue'}).status_code == 400
+    assert client.post('/api/ai/frequency_recommend', json={'board': MIDGAME_FEN, 'side': 1}).status_code == 400
+    data = client.post('/api/ai/get_suggestions', json={'board': MIDGAME_FEN, 'player': 'red', 'top_k': 2}).get_json()
+    assert data['status'] == 'success' and len(data['suggestions']) == 2
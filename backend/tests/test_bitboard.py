@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from chess_engine.bitboard import BitBoard
+from chess_engine.board import ChessBoard
+from chess_engine.perft import PERFT_POSITIONS, position_board
+from chess_engine.pieces import opponent
+from chess_engine.rules import ChessRules
+
+
+def _playout_boards(seed, plies=60):
+    """随机对局过程中的每个局面 (棋盘副本, 走棋方)"""
+    rng = random.Random(seed)
+    board = ChessBoard()
+    side = 'red'
+    boards = []
+    for _ in range(plies):
+        boards.append((board.copy(), side))
+        moves = ChessRules.generate_legal_moves(board, side)
+        if not moves:
+            break
+        board.make_move(*rng.choice(moves))
+        side = opponent(side)
+    return boards
+
+
+def _assert_bitboard_agrees(board, side):
+    bitboard = BitBoard.from_board(board)
+    before = (bitboard.occupied, bitboard.occupied_rotated, list(bitboard.pieces), bytes(bitboard.squares))
+    for moving_side in (side, opponent(side)):
+        assert sorted(ChessRules.generate_bitboard_moves(bitboard, moving_side)) == \
+            sorted(ChessRules.generate_legal_moves(board, moving_side))
+        attack_map = ChessRules.bitboard_attack_map(bitboard, moving_side)
+        for sq in range(90):
+            attacked = ChessRules._is_attacked(board.squares, sq, moving_side)
+            assert ChessRules.is_square_attacked_bitboard(bitboard, sq, moving_side) == attacked
+            assert bool(attack_map >> sq & 1) == attacked
+    # 试走后位棋盘恢复原状
+    assert (bitboard.occupied, bitboard.occupied_rotated, list(bitboard.pieces), bytes(bitboard.squares)) == before
+
+
+@pytest.mark.parametrize('position', PERFT_POSITIONS, ids=lambda p: p['name'])
+def test_bitboard_matches_table_generator_on_perft_positions(position):
+    _assert_bitboard_agrees(position_board(position), position['side'])
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_bitboard_matches_table_generator_on_playouts(seed):
+    for board, side in _playout_boards(seed):
+        _assert_bitboard_agrees(board, side)
+
+
+def test_bitboard_round_trip():
+    board = ChessBoard()
+    assert BitBoard.from_string(board.to_string()).to_string() == board.to_string()
@@ -0,0 +1,120 @@
+import pytest
+
+from chess_engine.board import ChessBoard
+from chess_engine.cache import LRUCache, PositionCache
+from chess_engine.rules import ChessRules
+
+
+def test_lru_eviction_and_stats():
+    cache = LRUCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # a 变为最近使用
+    cache.put('c', 3)           # 淘汰 b
+    assert 'b' not in cache
+    assert cache.get('b') is None
+    stats = cache.stats()
+    assert (stats['size'], stats['hits'], stats['misses'], stats['evictions']) == (2, 1, 1, 1)
+
+
+def test_position_cache_reuses_board_and_moves():
+    cache = PositionCache(maxsize=4)
+    board_string = ChessBoard().to_string()
+    assert cache.board(board_string) is cache.board(board_string)
+
+    moves = cache.legal_moves(board_string, 'red')
+    assert cache.legal_moves(board_string, 'red') is moves
+    assert list(moves) == ChessRules.generate_legal_moves(ChessBoard(board_string), 'red')
+    stats = cache.stats()
+    assert stats['misses'] == 1
+    assert (stats['legal_move_hits'], stats['legal_move_misses']) == (1, 1)
+
+
+def test_legal_move_stats_are_counted_across_threads():
+    import sys
+    import threading
+
+    cache = PositionCache(8)
+    opening = ChessBoard().to_string()
+    cache.legal_moves(opening, 'red')
+
+    def lookups():
+        for _ in range(2000):
+            cache.legal_moves(opening, 'red')
+
+    # 频繁切换线程，未加锁的 += 会丢失计数
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=lookups) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    stats = cache.stats()
+    assert (stats['legal_move_hits'], stats['legal_move_misses']) == (16000, 1)
+
+
+def test_invalid_board_is_not_cached():
+    cache = PositionCache()
+    with pytest.raises(ValueError):
+        cache.get('12')
+    assert len(cache) == 0
+
+
+def test_copy_is_independent():
+    board = ChessBoard()
+    before = board.to_string()
+    clone = board.copy()
+    clone.move_piece(1, 7, 1, 0)
+    assert board.to_string() == before
+    assert clone.zobrist_key != board.zobrist_key
+    assert clone.get_piece_at(1, 0).name == '炮'
+
+
+def test_move_route_does_not_mutate_cached_board():
+    from app import create_app
+    from api.routes import position_cache
+
+    client = create_app().test_client()
+    board_string = ChessBoard().to_string()
+    data = client.post('/api/move', json={'board': board_string, 'move': '1714'}).get_json()
+    assert data['status'] == 'success'
+    assert position_cache.board(board_string).to_string() == board_string
+
+
+def test_lru_ttl_expires_entries():
+    now = [0.0]
+    cache = LRUCache(maxsize=4, ttl=10, clock=lambda: now[0])
+    cache.put('a', 1)
+    now[0] = 9.5
+    assert cache.get('a') == 1
+    now[0] = 10.0
+    assert cache.get('a') is None
+    stats = cache.stats()
+    assert (stats['size'], stats['hits'], stats['misses'], stats['expirations']) == (0, 1, 1, 1)
+
+
+def test_engine_result_cache_hits_and_reload_invalidates(tmp_path):
+    import json
+    from chess_engine.ai_suggestion import AIChessSuggestionEngine
+
+    opening = ChessBoard().to_string()
+    path = tmp_path / 'move_frequency_analysis.json'
+    path.write_text(json.dumps([{'board': opening, 'player': 'red', 'move': '1747', 'frequency': 3}]),
+                    encoding='utf-8')
+    engine = AIChessSuggestionEngine(str(path), result_cache_size=8)
+
+    first = engine.get_ai_suggestions(opening, 'red', 3)
+    assert engine.get_ai_suggestions(opening, 'red', 3) is first
+    assert engine.get_ai_suggestions(opening, 'red', 1) is not first  # top_k 属于缓存键
+    engine.get_board_analysis(opening)
+    engine.get_board_analysis(opening)
+    stats = engine.get_engine_info()['result_cache']
+    assert (stats['hits'], stats['misses']) == (2, 3)
+
+    engine.load_frequency_data(str(path))
+    assert engine.get_engine_info()['result_cache']['size'] == 0
+    assert engine.get_ai_suggestions(opening, 'red', 3) == first
@@ -0,0 +1,95 @@
+import pytest
+
+from chess_engine.board import ChessBoard
+from chess_engine.codec import (
+    decode, decode_many, decode_squares, decode_position, encode, fen_to_squares, squares_to_fen,
+)
+from chess_engine.pieces import INFERRED_CODES
+
+
+def test_round_trip_opening():
+    board = ChessBoard()
+    board_string = board.to_string()
+    assert decode(board_string) == board.squares
+    assert encode(decode(board_string)) == board_string
+
+
+def test_decode_squares_skips_empty_and_out_of_range_tokens():
+    tokens = ["99"] * 90
+    tokens[0] = "00"
+    tokens[1] = "95"   # 列号9超出范围，忽略
+    tokens[44] = "44"
+    assert decode_squares("".join(tokens)) == [0, 44]
+    squares = decode("".join(tokens))
+    assert squares[0] == INFERRED_CODES[0] and squares[44] == INFERRED_CODES[44]
+    assert sum(1 for code in squares if code) == 2
+
+
+def test_decode_many_matches_decode():
+    boards = [ChessBoard()]
+    board = ChessBoard()
+    board.move_piece(1, 7, 4, 7)
+    boards.append(board)
+    strings = [b.to_string() for b in boards]
+    assert decode_many(strings) == [decode(s) for s in strings]
+    assert decode_many([]) == []
+
+
+@pytest.mark.parametrize('board_string', ['99' * 89, 'ab' * 90])
+def test_invalid_strings_raise(board_string):
+    with pytest.raises(ValueError):
+        decode(board_string)
+    with pytest.raises(ValueError):
+        decode_many([board_string])
+
+
+MIDGAME_FEN = 'r1ba1a3/4kn3/2n1b4/pNp1p1p1p/4c4/6P2/P1P2R2P/1CcC5/9/2BAKAB2'
+
+
+def test_fen_and_packed_preserve_identity():
+    board = ChessBoard(MIDGAME_FEN + ' w')
+    # 马在 (1,3)：180字符格式会把它推断为未知棋子，FEN 保留了身份
+    assert board.get_piece_at(1, 3).name == '马'
+    assert board.to_fen() == MIDGAME_FEN
+    assert board.to_fen('black') == MIDGAME_FEN + ' b'
+
+    packed = board.to_packed()
+    assert len(packed) * 5 <= 180
+    assert ChessBoard(packed).squares == board.squares
+    assert ChessBoard(board.to_position('fen')).squares == board.squares
+
+
+def test_fen_side_and_unknown_pieces():
+    assert fen_to_squares(MIDGAME_FEN + ' b')[1] == 'black'
+    assert fen_to_squares(MIDGAME_FEN)[1] is None
+    squares = ChessBoard().squares
+    squares[44] = INFERRED_CODES[44]   # 未知棋子
+    assert 'u' in squares_to_fen(squares)
+    assert fen_to_squares(squares_to_fen(squares))[0] == squares
+
+
+@pytest.mark.parametrize('position', [
+    '9/9/9',                       # 行数不对
+    'rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNRR',
+    'rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAXABNR',
+    'AAAA',                        # 紧凑格式过短
+])
+def test_invalid_positions_raise(position):
+    with pytest.raises(ValueError):
+        decode_position(position)
+
+
+def test_mirror_canonicalization():
+    from chess_engine.codec import canonical_board_string, mirror_board_string, mirror_move
+
+    opening = ChessBoard().to_string()
+    assert canonical_board_string(opening) == (opening, False)
+
+    left = ChessBoard()
+    left.move_piece(1, 7, 4, 7)
+    right = ChessBoard()
+    right.move_piece(7, 7, 4, 7)
+    assert mirror_board_string(left.to_string()) == right.to_string()
+    canonical = {canonical_board_string(left.to_string()), canonical_board_string(right.to_string())}
+    assert {state for state, _ in canonical} == {min(left.to_string(), right.to_string())}
+    assert mirror_move('1747') == '7747' and mirror_move('abcd') == 'abcd'
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from chess_engine.ai_suggestion import AIChessSuggestionEngine
+from chess_engine.board import ChessBoard
+from chess_engine.codec import decode, mirror_board_string
+from chess_engine.evaluation import board_string_codes, evaluate_many, rank_moves, squares_score
+from chess_engine.rules import ChessRules
+
+
+def _random_game(seed, plies=80):
+    rng = random.Random(seed)
+    board = ChessBoard()
+    side = 'red'
+    history = []
+    for _ in range(plies):
+        moves = ChessRules.generate_legal_moves(board, side)
+        if not moves:
+            break
+        history.append(board.make_move(*rng.choice(moves)))
+        side = 'black' if side == 'red' else 'red'
+    return board, history
+
+
+def test_opening_is_balanced():
+    assert ChessBoard().eval_score == 0
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_incremental_score_matches_full_evaluation(seed):
+    board, history = _random_game(seed)
+    assert board.eval_score == squares_score(board.squares)
+    assert board.copy().eval_score == board.eval_score
+    for undo in reversed(history):
+        board.unmake_move(undo)
+        assert board.eval_score == squares_score(board.squares)
+    assert board.eval_score == 0
+
+
+def test_batch_evaluation_matches_boards():
+    states = [_random_game(seed, plies=seed * 7)[0].to_string() for seed in range(12)]
+    assert [codes.tobytes() for codes in board_string_codes(states)] == [bytes(decode(s)) for s in states]
+    assert evaluate_many(states).tolist() == [ChessBoard(s).eval_score for s in states]
+    assert evaluate_many(states, 'black').tolist() == [-ChessBoard(s).eval_score for s in states]
+    # 左右镜像的局面分数相同
+    assert evaluate_many([mirror_board_string(s) for s in states]).tolist() == evaluate_many(states).tolist()
+    assert len(evaluate_many([])) == 0
+    with pytest.raises(ValueError):
+        evaluate_many(['12' * 89 + 'ab'])
+
+
+def test_fallback_without_search_ranks_by_evaluation(tmp_path):
+    board = ChessBoard('r3k4/9/9/9/9/9/4P4/9/9/R3K4 w')
+    ranked = rank_moves(board, 'red', ChessRules.generate_legal_moves(board, 'red'))
+    assert ranked[0][1] == (9, 0)
+    assert board.eval_score == squares_score(board.squares)
+
+    engine = AIChessSuggestionEngine(str(tmp_path / 'missing.json'), search_depth=0)
+    result = engine.get_ai_suggestions(board.to_string(), 'red', top_k=3)
+    assert 'search' not in result
+    assert [s['move'] for s in result['suggestions']][0] == '0900'
+    assert [s['score'] for s in result['suggestions']] == sorted((s['score'] for s in result['suggestions']), reverse=True)
+    assert engine.get_board_analysis(board.to_string())['evaluation'] == board.eval_score
@@ -0,0 +1,160 @@
+import json
+
+import pytest
+
+from chess_engine.ai_suggestion import AIChessSuggestionEngine
+from chess_engine.board import ChessBoard
+from chess_engine.codec import canonical_board_string
+from chess_engine.frequency_snapshot import FrequencyIndex, FrequencySnapshot, convert, snapshot_path_for
+from chess_engine.similarity import SimilarityIndex
+
+
+def _frequency_entries():
+    opening = ChessBoard().to_string()
+    board = ChessBoard()
+    board.move_piece(1, 7, 4, 7)
+    after_cannon = board.to_string()
+    return [
+        {'board': opening, 'player': 'red', 'move': '1747', 'frequency': 120},
+        {'board': opening, 'player': 'red', 'move': '7967', 'frequency': 300},
+        {'board': opening, 'player': 'black', 'move': '1022', 'frequency': 5},
+        {'board': after_cannon, 'player': 'black', 'move': '7062', 'frequency': 80},
+        # 车不能隔子走，在该局面下不合法，建索引时丢弃
+        {'board': after_cannon, 'player': 'black', 'move': '0004', 'frequency': 900},
+        {'board': 'bad', 'player': 'red', 'move': '0000', 'frequency': 1},
+    ], opening, after_cannon
+
+
+@pytest.fixture
+def json_path(tmp_path):
+    entries, _, _ = _frequency_entries()
+    path = tmp_path / 'move_frequency_analysis.json'
+    path.write_text(json.dumps(entries), encoding='utf-8')
+    return str(path)
+
+
+def test_snapshot_lookup(json_path):
+    _, opening, after_cannon = _frequency_entries()
+    result = convert(json_path)
+    assert result == {'positions': 2, 'records': 4, 'skipped': 1, 'dropped': 1}
+
+    with FrequencySnapshot(snapshot_path_for(json_path)) as snapshot:
+        assert len(snapshot) == 2 and snapshot.record_count == 4
+        assert opening in snapshot and 'bad' not in snapshot
+        assert [m['move'] for m in snapshot[opening]] == ['7967', '1747', '1022']
+        assert snapshot.get(after_cannon) == [{'player': 'black', 'move': '7062', 'frequency': 80}]
+        assert snapshot.get('99' * 90) is None
+        assert [m['move'] for m in snapshot.get_side(opening, 'red')] == ['7967', '1747']
+        assert snapshot.get_side(after_cannon, 'red') is None
+        # 只产生规范化（左右镜像中较小）的局面
+        canonical = canonical_board_string(after_cannon)[0]
+        assert sorted(snapshot.side_states('black')) == sorted([opening, canonical])
+        assert dict(snapshot.items()) == {opening: snapshot[opening], canonical: snapshot[canonical]}
+        for side in ('red', 'black'):
+            states, matrix = snapshot.side_matrix(side)
+            expected = SimilarityIndex.from_board_states(snapshot.side_states(side))
+            assert list(states) == expected.board_states
+            assert matrix.dtype == expected.matrix.dtype and (matrix == expected.matrix).all()
+
+
+def test_engine_uses_snapshot_with_same_results(json_path):
+    _, opening, _ = _frequency_entries()
+    from_json = AIChessSuggestionEngine(json_path)
+    convert(json_path)
+    from_snapshot = AIChessSuggestionEngine(json_path)
+
+    assert isinstance(from_snapshot.board_move_map, FrequencySnapshot)
+    # 快照转换时跳过了无效棋盘的记录
+    assert from_snapshot.get_engine_info()['total_records'] == 4
+    assert from_snapshot.get_engine_info()['index_type'] == 'mmap_snapshot'
+    for player in ('red', 'black'):
+        assert from_snapshot.get_ai_suggestions(opening, player) == from_json.get_ai_suggestions(opening, player)
+
+    # 相似度索引在第一次查找相似局面时才构建
+    assert from_snapshot.similarity_indexes is None and 'similarity_index' not in from_snapshot.get_engine_info()
+    board = ChessBoard()
+    board.move_piece(0, 9, 0, 8)
+    target = board.to_string()
+    assert from_snapshot._find_most_similar_board_state(target, 'red', 3) == \
+        from_json._find_most_similar_board_state(target, 'red', 3)
+    assert from_snapshot.get_engine_info()['similarity_index']['red']['positions'] == 1
+
+
+def test_rejects_non_snapshot(tmp_path):
+    path = tmp_path / 'bogus.bin'
+    path.write_bytes(b'not a snapshot')
+    with pytest.raises(ValueError):
+        FrequencySnapshot(str(path))
+
+
+def test_index_drops_illegal_moves_per_side():
+    entries, opening, after_cannon = _frequency_entries()
+    index = FrequencyIndex.from_entries(entries)
+
+    assert index.record_count == 4 and index.dropped_count == 2
+    assert index.get_side(after_cannon, 'black') == [{'player': 'black', 'move': '7062', 'frequency': 80}]
+    assert index.get_side(after_cannon, 'red') is None
+    # 有记录但全部不合法时为空列表（引擎会走备用方案）
+    assert index.get_side('bad', 'red') == []
+    assert sorted(index.side_states('red')) == [opening]
+
+
+def test_engine_suggestions_skip_illegal_history(json_path):
+    _, _, after_cannon = _frequency_entries()
+    engine = AIChessSuggestionEngine(json_path)
+    result = engine.get_ai_suggestions(after_cannon, 'black')
+    assert result['status'] == 'success'
+    assert [s['move'] for s in result['suggestions']] == ['7062']
+    assert result['total_moves_available'] == 1
+
+
+def test_delta_merge_on_snapshot_engine(json_path):
+    _, opening, after_cannon = _frequency_entries()
+    convert(json_path)
+    engine = AIChessSuggestionEngine(json_path, result_cache_size=8)
+    engine.get_ai_suggestions(opening, 'red')
+
+    board = ChessBoard()
+    board.move_piece(1, 7, 4, 7)
+    board.move_piece(7, 0, 6, 2)
+    new_state = board.to_string()
+    result = engine.merge_frequency_delta([
+        {'board': opening, 'player': 'red', 'move': '1747', 'frequency': 500},
+        {'board': opening, 'player': 'red', 'move': '7717', 'frequency': 1},  # 不能吃己方棋子
+        {'board': new_state, 'player': 'red', 'move': '7062', 'frequency': 2},  # 不是红方棋子
+        {'board': new_state, 'player': 'red', 'move': '0908', 'frequency': 2},
+    ])
+    assert result['status'] == 'success'
+    assert (result['positions'], result['new_positions'], result['records'], result['dropped']) == (2, 1, 1, 2)
+
+    info = engine.get_engine_info()
+    assert info['index_type'] == 'mmap_snapshot+delta' and info['unique_board_states'] == 3
+    assert [s['move'] for s in engine.get_ai_suggestions(opening, 'red')['suggestions']] == ['1747', '7967']
+    assert engine.get_ai_suggestions(opening, 'red')['suggestions'][0]['frequency'] == 620
+    assert engine.get_ai_suggestions(new_state, 'red')['suggestions'][0]['move'] == '0908'
+    assert engine.board_move_map.get_side(after_cannon, 'black')[0]['move'] == '7062'
+    # 新局面使相似度索引作废，下一次查找时重新构建
+    assert engine.similarity_indexes is None
+    assert new_state in engine._get_similarity_index('red').board_states
+
+
+def test_mirrored_positions_share_one_entry(tmp_path):
+    left = ChessBoard()
+    left.move_piece(1, 7, 4, 7)
+    right = ChessBoard()
+    right.move_piece(7, 7, 4, 7)
+    entries = [
+        {'board': left.to_string(), 'player': 'black', 'move': '7062', 'frequency': 10},
+        {'board': right.to_string(), 'player': 'black', 'move': '1022', 'frequency': 5},
+    ]
+    index = FrequencyIndex.from_entries(entries)
+    assert len(index) == 1 and index.record_count == 1
+    assert index.get_side(left.to_string(), 'black') == [{'player': 'black', 'move': '7062', 'frequency': 15}]
+    assert index.get_side(right.to_string(), 'black') == [{'player': 'black', 'move': '1022', 'frequency': 15}]
+
+    path = str(tmp_path / 'mirror.bin')
+    from chess_engine.frequency_snapshot import write_snapshot
+    assert write_snapshot(entries, path)['positions'] == 1
+    with FrequencySnapshot(path) as snapshot:
+        assert snapshot.get_side(right.to_string(), 'black') == index.get_side(right.to_string(), 'black')
+        assert snapshot.get(left.to_string()) == index.get(left.to_string())
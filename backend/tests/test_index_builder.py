@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from chess_engine.board import ChessBoard
+from chess_engine.frequency_snapshot import FrequencyIndex
+from chess_engine.index_builder import build, parse_wxf
+
+MOVES_HEADER = 'gameID,turn,side,move\n'
+GAME_1 = '1,1,red,C2.5\n1,1,black,H8+7\n1,2,red,H2+3\n1,2,black,R9.8\n'
+GAME_2 = '2,1,black,H8+7\n2,1,red,C2.5\n2,2,red,X9.9\n'
+GAME_3 = '3,1,red,P7+1\n3,1,black,C8.5\n'
+
+
+def test_parse_wxf_opening_moves():
+    board = ChessBoard()
+    assert parse_wxf(board, 'red', 'C2.5') == (77, 47)
+    assert parse_wxf(board, 'black', 'H8+7') == (70, 62)
+    assert parse_wxf(board, 'red', 'A4+5') == (59, 48)
+    with pytest.raises(ValueError):
+        parse_wxf(board, 'red', 'R1.2')  # 车被马挡住
+
+
+def test_parse_wxf_tandem_pieces():
+    board = ChessBoard('4k4/9/9/9/9/9/4R4/4R4/9/3K5 w')
+    assert parse_wxf(board, 'red', '+R.1') == (46, 86)
+    assert parse_wxf(board, 'red', 'R-.1') == (47, 87)
+
+
+def test_build_and_append(tmp_path):
+    moves = tmp_path / 'moves.csv'
+    moves.write_text(MOVES_HEADER + GAME_1 + GAME_2, encoding='utf-8')
+    output = str(tmp_path / 'frequency.json')
+
+    stats = build(str(moves), output, workers=1)
+    assert (stats['games'], stats['moves'], stats['failed']) == (2, 6, 1)
+    with open(output, encoding='utf-8') as f:
+        data = json.load(f)
+    opening = ChessBoard().to_string()
+    assert data[opening] == [{'move': '7747', 'frequency': 2, 'player': 'red',
+                              'description': '从(7,7)移动到(4,7)'}]
+    # 复盘得到的走法都能通过建索引时的合法性校验
+    assert FrequencyIndex.from_entries(data).dropped_count == 0
+
+    # 追加时跳过已处理的对局，只统计新对局
+    moves.write_text(MOVES_HEADER + GAME_1 + GAME_3, encoding='utf-8')
+    stats = build(str(moves), output, append=True, workers=2, chunk_games=1)
+    assert stats['games'] == 1
+    with open(output, encoding='utf-8') as f:
+        data = json.load(f)
+    assert {m['move']: m['frequency'] for m in data[opening]} == {'7747': 2, '2625': 1}
@@ -0,0 +1,65 @@
+import pytest
+
+from app import create_app
+from chess_engine.board import ChessBoard
+from chess_engine.rules import ChessRules
+
+
+@pytest.fixture
+def client():
+    return create_app().test_client()
+
+
+def test_all_legal_moves_for_side(client):
+    board = ChessBoard()
+    response = client.post('/api/legal_moves', json={'board': board.to_string(), 'side': 'red'})
+    data = response.get_json()
+    assert data['status'] == 'success'
+    assert len(data['moves']) == 44
+    for move in data['moves']:
+        x1, y1, x2, y2 = (int(c) for c in move)
+        assert ChessRules.is_valid_move(board, x1, y1, x2, y2)
+
+
+def test_moves_from_one_square(client):
+    board_string = ChessBoard().to_string()
+    # 红方左马（1,9）只能跳到 (0,7) 和 (2,7)
+    data = client.post('/api/legal_moves', json={'board': board_string, 'from': '19'}).get_json()
+    assert data['side'] == 'red'
+    assert data['moves'] == ['1907', '1927']
+    assert int(data['mask'], 16) == (1 << 7) | (1 << 27)
+
+
+def test_empty_square_and_bad_request(client):
+    board_string = ChessBoard().to_string()
+    data = client.post('/api/legal_moves', json={'board': board_string, 'from': '44'}).get_json()
+    assert data['moves'] == []
+    assert client.post('/api/legal_moves', json={'board': '00'}).status_code == 400
+    assert client.post('/api/legal_moves', json={'board': board_string, 'side': 'blue'}).status_code == 400
+
+
+def test_fen_board_round_trips_through_move(client):
+    fen = client.get('/api/init?format=fen').get_json()['board']
+    assert fen.endswith(' w')
+    data = client.post('/api/move', json={'board': fen, 'move': '1747'}).get_json()
+    assert data['status'] == 'success'
+    assert data['board'] == 'rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/4C2C1/9/RNBAKABNR b'
+
+    # FEN 带走棋方时，不指定 side 就按 FEN 中的走棋方生成
+    moves = client.post('/api/legal_moves', json={'board': data['board']}).get_json()
+    assert moves['side'] == 'black'
+    assert len(moves['moves']) == len(ChessRules.generate_legal_moves(ChessBoard(data['board']), 'black'))
+
+
+def test_legal_moves_counted_in_position_cache_stats(client):
+    from api.routes import position_cache
+
+    board = ChessBoard()
+    board.make_move(17, 47)
+    board_string = board.to_string()
+    before = position_cache.stats()
+    client.post('/api/legal_moves', json={'board': board_string, 'side': 'black'})
+    client.post('/api/legal_moves', json={'board': board_string, 'side': 'black', 'from': '10'})
+    after = position_cache.stats()
+    assert after['legal_move_misses'] - before['legal_move_misses'] == 1
+    assert after['legal_move_hits'] - before['legal_move_hits'] == 1
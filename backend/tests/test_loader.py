@@ -0,0 +1,140 @@
+import threading
+
+from chess_engine.loader import BackgroundLoader
+
+
+def test_loader_reports_progress_until_ready():
+    release = threading.Event()
+
+    def factory(progress):
+        progress('indexing', 0.5)
+        release.wait(5)
+        return 'engine'
+
+    loader = BackgroundLoader(factory)
+    assert loader.status()['state'] == 'idle'
+    assert loader.get() is None          # 第一次取用时开始后台加载，不阻塞
+    assert loader.status()['state'] == 'loading'
+
+    release.set()
+    assert loader.wait(5) == 'engine'
+    status = loader.status()
+    assert status['ready'] and status['progress'] == 1.0 and status['stage'] == 'indexing'
+    assert loader.get() == 'engine'
+
+
+def test_loader_failure_is_reported():
+    def factory(progress):
+        raise FileNotFoundError('missing')
+
+    loader = BackgroundLoader(factory).start()
+    assert loader.wait(5) is None
+    status = loader.status()
+    assert status['state'] == 'failed' and status['error'] == 'missing'
+
+
+def test_ready_endpoint():
+    from app import create_app
+    from api.routes import ai_engine_loader
+
+    client = create_app().test_client()
+    ai_engine_loader.wait(10)
+    response = client.get('/api/health/ready')
+    data = response.get_json()
+    assert response.status_code == (200 if data['ai_engine']['ready'] else 503)
+    assert data['ai_engine']['state'] in ('ready', 'failed')
+    # 走棋相关接口不依赖AI引擎
+    assert client.get('/api/init').get_json()['status'] == 'success'
+
+
+def test_reload_swaps_after_new_value_is_ready():
+    versions = iter(['v1', 'v2'])
+    release = threading.Event()
+
+    def factory(progress):
+        value = next(versions)
+        if value == 'v2':
+            release.wait(5)
+        return value
+
+    loader = BackgroundLoader(factory).start()
+    assert loader.wait(5) == 'v1'
+    assert loader.reload()
+    assert not loader.reload()        # 同一时间只进行一次重新加载
+    assert loader.get() == 'v1'       # 新版本就绪前继续使用旧版本
+    release.set()
+    loader._reload_thread.join(5)
+    status = loader.status()
+    assert loader.get() == 'v2' and status['reloads'] == 1 and not status['reloading']
+
+
+def test_updates_during_reload_are_replayed_on_new_value():
+    release = threading.Event()
+    loads = []
+
+    def factory(progress):
+        loads.append(1)
+        if len(loads) == 2:
+            release.wait(5)
+        return ['base']
+
+    loader = BackgroundLoader(factory)
+    assert loader.apply(lambda value: value.append('early')) is None  # 未就绪
+    old = loader.start().wait(5)
+    assert loader.apply(lambda value: value.append('before')) is None and old == ['base', 'before']
+
+    assert loader.reload()
+    assert loader.apply(lambda value: value.append('during') or len(value)) == 3
+    release.set()
+    loader._reload_thread.join(5)
+    # 重新加载开始前的修改不重放（新对象按数据文件重新创建），期间的修改重放到新对象上
+    assert loader.get() == ['base', 'during'] and loader._pending_updates == []
+    loader.apply(lambda value: value.append('after'))
+    assert loader.get() == ['base', 'during', 'after']
+
+
+def test_file_watcher_triggers_on_change(tmp_path):
+    from chess_engine.loader import FileWatcher
+
+    path = tmp_path / 'data.json'
+    path.write_text('{}')
+    calls = []
+    watcher = FileWatcher([str(path)], lambda: calls.append(1), interval=0.01)
+    assert not watcher.check()
+    path.write_text('{"a": []}')
+    import os
+    os.utime(path, (1, 1))
+    assert watcher.check() and calls == [1]
+
+
+def test_file_watcher_retries_while_callback_is_busy(tmp_path):
+    import os
+    from chess_engine.loader import FileWatcher
+
+    path = tmp_path / 'data.json'
+    path.write_text('{}')
+    results = [False, True]
+    calls = []
+
+    def callback():
+        calls.append(1)
+        return results.pop(0)
+
+    watcher = FileWatcher([str(path)], callback, interval=0.01)
+    os.utime(path, (1, 1))
+    # 第一次回调返回 False（已有重新加载在进行），变化保留到下次检查
+    assert not watcher.check() and len(calls) == 1
+    assert watcher.check() and len(calls) == 2
+    assert not watcher.check() and len(calls) == 2
+
+
+def test_admin_reload_requires_token(monkeypatch):
+    from app import create_app
+    from config import Config
+
+    client = create_app().test_client()
+    monkeypatch.setattr(Config, 'ADMIN_TOKEN', 'secret')
+    assert client.post('/api/admin/reload_frequency').status_code == 403
+    response = client.post('/api/admin/merge_frequency', json={'path': '../../etc/passwd'},
+                           headers={'X-Admin-Token': 'secret'})
+    assert response.status_code in (400, 503)
@@ -0,0 +1,62 @@
+import pytest
+
+from chess_engine.ai_suggestion import AIChessSuggestionEngine
+from chess_engine.board import ChessBoard
+from chess_engine.opening_book import OpeningBook, build_book
+
+MOVES_CSV = (
+    'gameID,turn,side,move\n'
+    '1,1,red,C2.5\n1,1,black,H8+7\n1,2,red,H2+3\n'
+    '2,1,red,C2.5\n2,1,black,H2+3\n'
+    '3,1,red,C2.5\n3,1,black,H8+7\n'
+    '4,1,red,P7+1\n4,1,black,C8.5\n'
+)
+
+
+@pytest.fixture
+def book(tmp_path):
+    moves = tmp_path / 'moves.csv'
+    moves.write_text(MOVES_CSV, encoding='utf-8')
+    path = str(tmp_path / 'opening_book.bin')
+    stats = build_book(str(moves), path, max_plies=2, workers=1)
+    assert stats['games'] == 4
+    with OpeningBook(path) as opened:
+        yield opened
+
+
+def test_continuations_with_counts_and_paging(book):
+    root = book.continuations([])
+    assert root['total_games'] == 4 and root['total_continuations'] == 2
+    assert [(c['move'], c['count'], c['percentage']) for c in root['continuations']] == \
+        [('7747', 3, 75.0), ('2625', 1, 25.0)]
+
+    reply = book.continuations(['7747'], offset=1, limit=1)
+    assert reply['total_continuations'] == 2
+    assert [c['move'] for c in reply['continuations']] == ['1022']
+    # max_plies=2：第三步不收录
+    assert book.continuations(['7747', '7062'])['total_continuations'] == 0
+    assert book.continuations(['0919']) is None
+
+
+def test_engine_uses_book_first(book, tmp_path):
+    engine = AIChessSuggestionEngine(str(tmp_path / 'missing.json'), opening_book=book)
+    board = ChessBoard()
+    board.move_piece(7, 7, 4, 7)
+    result = engine.get_ai_suggestions(board.to_string(), 'black', 3, move_history=['7747'])
+    assert result['book_mode'] and result['book_games'] == 3
+    assert [s['move'] for s in result['suggestions']] == ['7062', '1022']
+    # 轮到的一方与走法序列不符时不使用开局库
+    assert 'book_mode' not in engine.get_ai_suggestions(board.to_string(), 'red', 3, move_history=['7747'])
+
+
+def test_explorer_endpoint(book, monkeypatch):
+    from app import create_app
+    import api.routes as routes
+
+    monkeypatch.setattr(routes, 'opening_book', book)
+    client = create_app().test_client()
+    data = client.post('/api/explorer', json={'moves': ['7747'], 'limit': 1}).get_json()
+    assert data['status'] == 'success' and data['total_games'] == 3
+    assert data['continuations'][0]['move'] == '7062'
+    assert client.post('/api/explorer', json={'moves': ['77a7']}).status_code == 400
+    assert client.post('/api/explorer', json={'moves': ['0919']}).get_json()['status'] == 'no_data'
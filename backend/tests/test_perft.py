@@ -0,0 +1,52 @@
+import pytest
+
+from chess_engine.board import ChessBoard
+from chess_engine.perft import PERFT_POSITIONS, divide, perft, position_board
+from chess_engine.pieces import opponent
+from chess_engine.rules import ChessRules
+
+
+def _brute_force_moves(board, side):
+    # 逐格调用 validate_move_with_reason，作为走法表生成器的独立参照
+    moves = []
+    for piece in list(board.side_pieces[side]):
+        if piece.x == 99:
+            continue
+        for to_x in range(9):
+            for to_y in range(10):
+                if ChessRules.is_valid_move(board, piece.x, piece.y, to_x, to_y):
+                    moves.append((piece.x * 10 + piece.y, to_x * 10 + to_y))
+    return moves
+
+
+@pytest.mark.parametrize('depth', [1, 2, 3])
+def test_opening_perft(depth):
+    expected = PERFT_POSITIONS[0]['expected'][depth]
+    assert perft(ChessBoard(), 'red', depth) == expected
+
+
+@pytest.mark.parametrize('position', PERFT_POSITIONS[1:], ids=lambda p: p['name'])
+def test_tricky_positions_perft(position):
+    board = position_board(position)
+    for depth in (1, 2, 3):
+        assert perft(board, position['side'], depth) == position['expected'][depth]
+
+
+@pytest.mark.parametrize('position', PERFT_POSITIONS, ids=lambda p: p['name'])
+def test_generator_matches_validator(position):
+    board = position_board(position)
+    side = position['side']
+    assert ChessRules.generate_legal_moves(board, side) == _brute_force_moves(board, side)
+    for from_sq, to_sq in ChessRules.generate_legal_moves(board, side):
+        undo = board.make_move(from_sq, to_sq)
+        reply_side = opponent(side)
+        assert ChessRules.generate_legal_moves(board, reply_side) == _brute_force_moves(board, reply_side)
+        board.unmake_move(undo)
+
+
+def test_perft_restores_board():
+    board = ChessBoard()
+    before = (board.to_string(), board.zobrist_key, dict(board.king_squares))
+    counts = divide(board, 'red', 2)
+    assert sum(counts.values()) == 1920
+    assert (board.to_string(), board.zobrist_key, dict(board.king_squares)) == before
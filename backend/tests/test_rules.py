@@ -0,0 +1,68 @@
+from chess_engine.board import ChessBoard
+from chess_engine.rules import ChessRules
+
+# 红车在d线将军，黑将不能横移到e线与红帅对脸
+CHECKMATE = '3k5/9/9/9/9/9/9/9/9/3RK4 b'
+# 黑将没有被将军，但所有走法都会被车吃掉或与红帅对脸
+STALEMATE = '3k5/R8/9/9/9/9/9/9/9/4K4 b'
+# 帅将同在e线，只隔一个红车
+FACING_SCREEN = '4k4/9/9/9/4R4/9/9/9/9/4K4 w'
+# 黑车牵制红炮，红炮离开e线后红帅被将军
+PINNED_CANNON = '3k5/9/9/9/4r4/9/9/9/4C4/4K4 w'
+
+
+def test_checkmate():
+    board = ChessBoard(CHECKMATE)
+    assert ChessRules.in_check(board, 'black')
+    assert ChessRules.generate_legal_moves(board, 'black') == []
+    assert ChessRules.check_game_over(board, 'black') == {
+        'game_over': True, 'winner': 'red', 'reason': 'checkmate', 'in_check': True}
+    # 不给出走棋方时只判断帅/将是否被吃
+    assert not ChessRules.check_game_over(board)['game_over']
+
+
+def test_stalemate_loses():
+    board = ChessBoard(STALEMATE)
+    assert not ChessRules.in_check(board, 'black')
+    assert ChessRules.check_game_over(board, 'black') == {
+        'game_over': True, 'winner': 'red', 'reason': 'stalemate', 'in_check': False}
+
+
+def test_move_piece_reports_mate_and_check():
+    board = ChessBoard('3k5/9/9/9/9/9/9/9/9/R3K4 w')
+    result = board.move_piece(0, 9, 3, 9)
+    assert result['success'] and result['game_over']
+    assert (result['winner'], result['reason'], result['in_check']) == ('red', 'checkmate', True)
+
+    board = ChessBoard('3k5/9/9/9/9/9/9/9/9/R3K4 w')
+    result = board.move_piece(0, 9, 0, 0)
+    assert not result['game_over'] and result['in_check'] and result['reason'] is None
+
+
+def test_flying_general():
+    board = ChessBoard(FACING_SCREEN)
+    assert not ChessRules.in_check(board, 'red')
+    result = ChessRules.validate_move_with_reason(board, 4, 4, 0, 4)
+    assert result == {'valid': False, 'reason': '帅将不能在同一列上直接相对'}
+    assert all(to_sq // 10 == 4 for from_sq, to_sq in ChessRules.generate_legal_moves(board, 'red')
+               if from_sq == 44)
+    # 中间没有棋子时帅将对脸即被将军
+    assert ChessRules.in_check(ChessBoard('4k4/9/9/9/9/9/9/9/9/4K4 w'), 'red')
+
+
+def test_moves_leaving_king_in_check_are_rejected():
+    board = ChessBoard(PINNED_CANNON)
+    result = ChessRules.validate_move_with_reason(board, 4, 8, 0, 8)
+    assert result == {'valid': False, 'reason': '走棋后己方帅将会被将军'}
+    assert ChessRules.validate_move_with_reason(board, 4, 8, 4, 7)['valid']
+    assert {to_sq // 10 for from_sq, to_sq in ChessRules.generate_legal_moves(board, 'red')
+            if from_sq == 48} == {4}
+
+
+def test_validation_does_not_write_to_the_board():
+    # 缓存中的棋盘被多个请求共享：格子换成只读的 bytes 后校验照常进行
+    board = ChessBoard(PINNED_CANNON)
+    board.squares = bytes(board.squares)
+    assert not ChessRules.validate_move_with_reason(board, 4, 8, 0, 8)['valid']
+    assert ChessRules.validate_move_with_reason(board, 4, 8, 4, 7)['valid']
+    assert ChessRules.validate_move_with_reason(board, 4, 9, 5, 9)['valid']
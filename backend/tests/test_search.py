@@ -0,0 +1,104 @@
+from chess_engine.ai_suggestion import AIChessSuggestionEngine
+from chess_engine.board import ChessBoard
+from chess_engine.rules import ChessRules
+from chess_engine.search import MATE_SCORE, parallel_search, search
+
+# 红车沿d线将军，黑将不能上前与红帅对脸，一步杀
+MATE_IN_ONE = '3k5/9/9/9/9/9/9/9/9/R3K4 w'
+# 棋子都在初始位置（180字符格式按初始位置推断棋子），红车可以白吃黑车
+HANGING_ROOK = 'r3k4/9/9/9/9/9/4P4/9/9/R3K4 w'
+
+
+def test_finds_mate_in_one():
+    result = search(ChessBoard(MATE_IN_ONE), 'red', top_k=3, max_depth=3)
+    assert result['score'] == MATE_SCORE - 1
+    assert result['best_move'] in ('0939', '0901')
+    assert [m['score'] for m in result['moves']] == sorted((m['score'] for m in result['moves']), reverse=True)
+
+
+def test_node_budget_and_board_restored():
+    board = ChessBoard()
+    before = board.to_string()
+    result = search(board, 'red', top_k=3, max_depth=8, node_budget=500)
+    assert result['aborted'] and result['nodes'] <= 501
+    assert len(result['moves']) == 3
+    legal = {f"{f // 10}{f % 10}{t // 10}{t % 10}" for f, t in ChessRules.generate_legal_moves(board, 'red')}
+    assert all(m['move'] in legal for m in result['moves'])
+    assert board.to_string() == before
+
+
+def test_engine_searches_unknown_positions(tmp_path):
+    engine = AIChessSuggestionEngine(str(tmp_path / 'missing.json'), search_depth=3)
+    board_state = ChessBoard(HANGING_ROOK).to_string()
+
+    result = engine.get_ai_suggestions(board_state, 'red', top_k=2)
+    assert result['status'] == 'success' and result['fallback_mode']
+    assert [s['move'] for s in result['suggestions']][0] == '0900'
+    assert result['suggestions'][0]['score'] > result['suggestions'][1]['score']
+    assert result['search']['depth'] >= 1 and result['search']['nodes'] > 0
+
+    executed = engine.execute_ai_move(board_state, 'red')
+    assert executed['status'] == 'success'
+    assert executed['move_executed'] == '0900'
+
+
+def test_parallel_search_matches_single_process():
+    board = ChessBoard(HANGING_ROOK)
+    single = search(board, 'red', top_k=2, max_depth=3, node_budget=None)
+    parallel = parallel_search(board, 'red', top_k=2, max_depth=3, node_budget=None, workers=2, tt_mb=1)
+    assert parallel['workers'] == 2 and parallel['depth'] == 3 and not parallel['aborted']
+    assert [m['score'] for m in parallel['moves']] == [m['score'] for m in single['moves']]
+    assert parallel['best_move'] == '0900'
+
+
+def test_engine_passes_workers_to_search(tmp_path):
+    engine = AIChessSuggestionEngine(str(tmp_path / 'missing.json'), search_depth=2, search_max_workers=2)
+    board_state = ChessBoard(HANGING_ROOK).to_string()
+    assert engine.get_ai_suggestions(board_state, 'red')['search']['workers'] == 1
+    # 超过上限的进程数按上限处理
+    result = engine.get_ai_suggestions(board_state, 'red', workers=8)
+    assert result['search']['workers'] == 2 and result['suggestions'][0]['move'] == '0900'
+
+
+def test_engine_searches_when_only_opponent_has_moves(tmp_path):
+    import json
+
+    board_state = ChessBoard(HANGING_ROOK).to_string()
+    path = tmp_path / 'move_frequency_analysis.json'
+    path.write_text(json.dumps([{'board': board_state, 'player': 'black', 'move': '0001', 'frequency': 2}]),
+                    encoding='utf-8')
+    engine = AIChessSuggestionEngine(str(path), search_depth=3)
+    assert engine.get_ai_suggestions(board_state, 'black')['suggestions'][0]['move'] == '0001'
+
+    result = engine.get_ai_suggestions(board_state, 'red', top_k=1)
+    assert result['status'] == 'success' and result['fallback_mode']
+    assert result['suggestions'][0]['move'] == '0900'
+
+
+def test_search_workers_do_not_import_routes(tmp_path):
+    import os
+    import subprocess
+    import sys
+
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # 模拟 python app.py：spawn 启动的子进程会重新执行主脚本的模块级代码
+    script = tmp_path / 'serve.py'
+    script.write_text(f"""import sys
+sys.path.insert(0, {backend!r})
+from app import create_app
+from chess_engine.search import shared_executor
+
+
+def routes_imported():
+    return 'api.routes' in sys.modules
+
+
+if __name__ == '__main__':
+    create_app()
+    print('parent', routes_imported())
+    print('worker', shared_executor(1).submit(routes_imported).result())
+""", encoding='utf-8')
+    env = dict(os.environ, AI_ENGINE_PRELOAD='0')
+    output = subprocess.run([sys.executable, str(script)], capture_output=True, text=True, timeout=120,
+                            env=env, check=True).stdout
+    assert 'parent True' in output and 'worker False' in output
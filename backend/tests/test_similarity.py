@@ -0,0 +1,107 @@
+import json
+import random
+
+from chess_engine.ai_suggestion import AIChessSuggestionEngine
+from chess_engine.board import ChessBoard
+from chess_engine.codec import canonical_board_string, encode
+from chess_engine.rules import ChessRules
+from chess_engine.similarity import ApproximateSimilarityIndex, SimilarityIndex, build_index
+
+
+def _random_boards(count, seed=7):
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(count):
+        board = ChessBoard()
+        for _ in range(rng.randint(0, 12)):
+            side = rng.choice(('red', 'black'))
+            moves = ChessRules.generate_legal_moves(board, side)
+            if moves:
+                board.make_move(*rng.choice(moves))
+        boards.append(board.to_string())
+    return boards
+
+
+def _char_similarity(a, b):
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+def test_scores_match_character_similarity():
+    boards = _random_boards(60)
+    index = SimilarityIndex.from_board_states(boards)
+    target = _random_boards(1, seed=99)[0]
+    expected = [_char_similarity(target, board) for board in boards]
+    assert [score / 180 for score in index.scores(target)] == expected
+
+    best_state, best_score = index.most_similar(target)[0]
+    assert best_score == max(expected)
+    assert best_state == boards[expected.index(max(expected))]
+
+    top = index.most_similar(target, 5)
+    assert [score for _, score in top] == sorted(expected, reverse=True)[:5]
+
+
+def test_invalid_states_are_skipped():
+    index = SimilarityIndex.from_board_states(['12', ChessBoard().to_string()])
+    assert len(index) == 1
+    assert index.most_similar('bad') == []
+    assert SimilarityIndex.from_board_states([]).most_similar(ChessBoard().to_string()) == []
+
+
+def test_engine_similar_state_search(tmp_path):
+    boards = _random_boards(20)
+    entries = [{'board': b, 'player': 'black', 'move': '0001', 'frequency': i} for i, b in enumerate(boards)]
+    path = tmp_path / 'freq.json'
+    path.write_text(json.dumps(entries), encoding='utf-8')
+    engine = AIChessSuggestionEngine(str(path))
+
+    target = _random_boards(1, seed=123)[0]
+    result = engine._find_most_similar_board_state(target, 'black', 3)
+    expected = max(_char_similarity(target, b) for b in boards)
+    assert abs(result['similarity_percentage'] - expected * 100) < 1e-9
+    assert engine._find_most_similar_board_state(target, 'red', 3)['status'] == 'no_similar_states'
+
+
+def _occupancy(*squares):
+    return encode([1 if sq in squares else 0 for sq in range(90)])
+
+
+def test_engine_similar_state_checks_both_orientations(tmp_path):
+    # 目标只比 near 多一个兵，但规范化方向相反；decoy 与目标的镜像更接近
+    near = _occupancy(40, 49, 46, 9)
+    decoy = _occupancy(40, 49, 46, 89, 6, 26, 66)
+    target = _occupancy(40, 49, 46, 9, 86)
+    assert not canonical_board_string(near)[1] and canonical_board_string(target)[1]
+    entries = [{'board': near, 'player': 'red', 'move': '0908', 'frequency': 1},
+               {'board': decoy, 'player': 'red', 'move': '0605', 'frequency': 1}]
+    path = tmp_path / 'freq.json'
+    path.write_text(json.dumps(entries), encoding='utf-8')
+    engine = AIChessSuggestionEngine(str(path))
+
+    result = engine._find_most_similar_board_state(target, 'red', 3)
+    assert result['similar_board_state'] == near
+    assert abs(result['similarity_percentage'] - _char_similarity(target, near) * 100) < 1e-9
+    assert [s['move'] for s in result['suggestions']] == ['0908']
+
+    # 目标镜像后，找到的局面和走法也镜像回来
+    mirrored = engine._find_most_similar_board_state(_occupancy(40, 49, 46, 89, 6), 'red', 3)
+    assert mirrored['similar_board_state'] == _occupancy(40, 49, 46, 89)
+    assert [s['move'] for s in mirrored['suggestions']] == ['8988']
+
+
+def test_approximate_index_finds_near_positions():
+    boards = _random_boards(200, seed=3)
+    exact = SimilarityIndex.from_board_states(boards)
+    approx = ApproximateSimilarityIndex.from_board_states(boards, probe_radius=2)
+    for target in boards[::20]:
+        # 已索引的局面一定能精确找回
+        assert approx.most_similar(target)[0] == (target, 1.0)
+    target = _random_boards(1, seed=321)[0]
+    assert approx.most_similar(target)[0][1] <= exact.most_similar(target)[0][1]
+    assert approx.last_candidates <= len(boards)
+
+
+def test_build_index_threshold():
+    boards = _random_boards(10)
+    assert type(build_index(boards)) is SimilarityIndex
+    assert type(build_index(boards, approximate_threshold=5)) is ApproximateSimilarityIndex
@@ -0,0 +1,58 @@
+import pytest
+
+from chess_engine.ai_suggestion import AIChessSuggestionEngine
+from chess_engine.board import ChessBoard
+from chess_engine.perft import PERFT_POSITIONS, position_board
+from chess_engine.search import search
+from chess_engine.transposition import EXACT, LOWER_BOUND, UPPER_BOUND, TranspositionTable
+
+
+def test_store_and_probe():
+    tt = TranspositionTable(0.01)
+    assert len(tt) == 2 * tt.buckets and tt.buckets & (tt.buckets - 1) == 0
+    assert tt.probe(12345) is None
+
+    tt.store(12345, 3, -40, LOWER_BOUND, (9, 19))
+    assert tt.probe(12345) == (3, -40, LOWER_BOUND, (9, 19))
+    # 同一局面原地更新，没有最佳走法时保留之前的走法
+    tt.store(12345, 4, 10, UPPER_BOUND)
+    assert tt.probe(12345) == (4, 10, UPPER_BOUND, (9, 19))
+    assert tt.stats()['used'] == 1 and tt.stats()['hit_rate'] == pytest.approx(2 / 3, abs=1e-4)
+
+
+def test_depth_preferred_and_always_replace_slots():
+    tt = TranspositionTable(0.01)
+    step = tt.buckets  # 这些键落在同一个桶
+    tt.store(1, 6, 100, EXACT, (0, 1))
+    tt.store(1 + step, 2, 20, EXACT, (0, 2))
+    tt.store(1 + 2 * step, 3, 30, EXACT, (0, 3))
+    # 深的结果留在深度优先槽位，总是替换槽位只保留最近的结果
+    assert tt.probe(1)[1] == 100
+    assert tt.probe(1 + step) is None
+    assert tt.probe(1 + 2 * step)[1] == 30
+    assert tt.stats()['overwrites'] == 1
+
+    # 新的一次搜索开始后，旧的深条目可以被替换
+    tt.new_search()
+    tt.store(1 + 3 * step, 1, 40, EXACT, (0, 4))
+    assert tt.probe(1) is None and tt.probe(1 + 3 * step)[1] == 40
+
+
+@pytest.mark.parametrize('position', PERFT_POSITIONS, ids=lambda p: p['name'])
+def test_search_with_table_matches_plain_search(position):
+    plain = search(position_board(position), position['side'], max_depth=3, node_budget=None)
+    tt = TranspositionTable(1)
+    with_table = search(position_board(position), position['side'], max_depth=3, node_budget=None, tt=tt)
+    assert with_table['score'] == plain['score']
+    assert with_table['nodes'] <= plain['nodes']
+    assert tt.stats()['hits'] > 0
+
+
+def test_engine_info_reports_table(tmp_path):
+    engine = AIChessSuggestionEngine(str(tmp_path / 'missing.json'), search_depth=2, tt_size_mb=1)
+    engine.get_ai_suggestions(ChessBoard().to_string(), 'red')
+    stats = engine.get_engine_info()['transposition_table']
+    assert stats['size_mb'] == 1 and stats['stores'] > 0 and 0 < stats['fill'] <= 1
+
+    assert 'transposition_table' not in AIChessSuggestionEngine(
+        str(tmp_path / 'missing.json'), tt_size_mb=0).get_engine_info()
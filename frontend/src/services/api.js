@@ -10,10 +10,10 @@ const api = axios.create({
 })
 
 export const chessAPI = {
-  // 初始化棋盘
-  initBoard: async () => {
+  // 初始化棋盘（format 可选 '180'、'fen'、'packed'，默认180字符格式）
+  initBoard: async (format = null) => {
     try {
-      const response = await api.get('/init')
+      const response = await api.get('/init', { params: format ? { format } : {} })
       return response.data
     } catch (error) {
       console.error('初始化棋盘失败:', error)
@@ -43,10 +43,48 @@ export const chessAPI = {
     }
   },
 
-  // 获取AI走法建议
-  getAISuggestion: async (board, side = 'red') => {
+  // 获取全部合法走法（指定 from 时只返回该格子上棋子的走法）
+  getLegalMoves: async (board, side = null, from = null) => {
     try {
-      const response = await api.post('/ai/suggest', { board, side })
+      const payload = { board }
+      if (side) payload.side = side
+      if (from) payload.from = from
+      const response = await api.post('/legal_moves', payload)
+      return response.data
+    } catch (error) {
+      console.error('获取合法走法失败:', error)
+      throw error
+    }
+  },
+
+  // 查询AI引擎是否加载完成（加载中时返回503，附带加载进度）
+  checkReady: async () => {
+    try {
+      const response = await api.get('/health/ready', { validateStatus: status => status === 200 || status === 503 })
+      return response.data
+    } catch (error) {
+      console.error('查询AI引擎状态失败:', error)
+      throw error
+    }
+  },
+
+  // 开局浏览：从开局起的走法序列之后的全部后续走法（分页）
+  getExplorer: async (moves = [], offset = 0, limit = 20) => {
+    try {
+      const response = await api.post('/explorer', { moves, offset, limit })
+      return response.data
+    } catch (error) {
+      console.error('获取开局库数据失败:', error)
+      throw error
+    }
+  },
+
+  // 获取AI走法建议（传入从开局起的走法序列时优先使用开局库）
+  getAISuggestion: async (board, side = 'red', moves = null) => {
+    try {
+      const payload = { board, side }
+      if (moves) payload.moves = moves
+      const response = await api.post('/ai/suggest', payload)
       return response.data
     } catch (error) {
       console.error('获取AI建议失败:', error)